@@ -0,0 +1,258 @@
+"""
+Measures rollout and compensation throughput and compares it against a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--output results.json]
+                                        [--baseline benchmarks/baseline.json] [--save-baseline]
+                                        [--tolerance 0.2]
+
+Every benchmark is run for each combination of its sweep parameters and reports the best
+rate over several repeats. With --save-baseline the results are written to the baseline file;
+otherwise they are compared against it and the script exits with status 1 if any rate dropped
+by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from environment import Environment  # noqa: E402
+from experiment import Experiment  # noqa: E402
+from reward_compensation import RewardCompensation  # noqa: E402
+from robot import Robot  # noqa: E402
+from task import Task  # noqa: E402
+from trajectory_buffer import TrajectoryBuffer  # noqa: E402
+from vector_environment import VectorEnvironment  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SWEEPS = {
+    "full": {
+        "episode_length": [100, 1000],
+        "state_dim": [2, 32],
+        "robot_count": [2, 8],
+        "batch_size": [16, 1024],
+        "transitions": [10_000, 1_000_000],
+    },
+    "quick": {
+        "episode_length": [100],
+        "state_dim": [2],
+        "robot_count": [2],
+        "batch_size": [64],
+        "transitions": [10_000],
+    },
+}
+
+def dynamics(state, action):
+    return 0.9 * state + 0.1 * action
+
+def dynamics_inplace(state, action, out=None):
+    if out is None:
+        out = np.empty_like(state)
+    np.multiply(state, 9.0, out=out)  # 0.1 * (9 * state + action) without temporaries
+    out += action
+    out *= 0.1
+    return out
+
+def reward_function(state, action):
+    return -np.sum(np.square(state - action), axis=-1)
+
+def policy(state):
+    return -0.5 * state
+
+def make_task():
+    return Task(dynamics, reward_function, vectorized=True)
+
+def make_robots(count, state_dim):
+    environment = StateDimEnvironment(make_task(), state_dim)
+    return [Robot(f"Robot{i}", environment, policy) for i in range(count)]
+
+class StateDimEnvironment(Environment):
+    """
+    An environment whose initial state has a configurable dimension.
+    """
+
+    def __init__(self, task, state_dim):
+        self.state_dim = state_dim
+        super().__init__(task)
+
+    def get_initial_state(self):
+        return np.ones(self.state_dim)
+
+def best_time(func, repeat):
+    """
+    Returns the shortest wall-clock time of several calls to func.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench_environment_step(sweep, repeat):
+    for episode_length in sweep["episode_length"]:
+        for state_dim in sweep["state_dim"]:
+            environment = StateDimEnvironment(make_task(), state_dim)
+            action = np.zeros(state_dim)
+
+            def run():
+                environment.reset()
+                for _ in range(episode_length):
+                    environment.step(action)
+
+            yield {"episode_length": episode_length, "state_dim": state_dim}, episode_length, "steps/sec", best_time(run, repeat)
+
+def bench_environment_step_inplace(sweep, repeat):
+    for episode_length in sweep["episode_length"]:
+        for state_dim in sweep["state_dim"]:
+            environment = StateDimEnvironment(Task(dynamics_inplace, reward_function, inplace=True), state_dim)
+            action = np.zeros(state_dim)
+
+            def run():
+                environment.reset()
+                for _ in range(episode_length):
+                    environment.step(action)
+
+            yield {"episode_length": episode_length, "state_dim": state_dim}, episode_length, "steps/sec", best_time(run, repeat)
+
+def bench_vector_environment_step(sweep, repeat):
+    for batch_size in sweep["batch_size"]:
+        for state_dim in sweep["state_dim"]:
+            environment = VectorEnvironment(make_task(), batch_size, state_dim=state_dim)
+            actions = np.zeros((batch_size, state_dim))
+            steps = 100
+
+            def run():
+                environment.reset()
+                for _ in range(steps):
+                    environment.step(actions)
+
+            yield {"batch_size": batch_size, "state_dim": state_dim}, steps * batch_size, "steps/sec", best_time(run, repeat)
+
+def bench_perform_task(sweep, repeat):
+    for episode_length in sweep["episode_length"]:
+        for state_dim in sweep["state_dim"]:
+            robot = make_robots(1, state_dim)[0]
+
+            def run():
+                robot.perform_task(horizon=episode_length)
+
+            yield {"episode_length": episode_length, "state_dim": state_dim}, episode_length, "steps/sec", best_time(run, repeat)
+
+def bench_run_multi_robot(sweep, repeat):
+    for robot_count in sweep["robot_count"]:
+        for state_dim in sweep["state_dim"]:
+            experiment = Experiment(make_robots(robot_count, state_dim))
+            yield {"robot_count": robot_count, "state_dim": state_dim}, 100 * robot_count, "steps/sec", best_time(experiment.run_multi_robot, repeat)
+
+def bench_run_co_training(sweep, repeat):
+    for robot_count in sweep["robot_count"]:
+        for state_dim in sweep["state_dim"]:
+            def run():
+                Experiment(make_robots(robot_count, state_dim)).run_co_training()
+
+            yield {"robot_count": robot_count, "state_dim": state_dim}, 200 * robot_count, "steps/sec", best_time(run, repeat)
+
+def bench_calculate_compensation(sweep, repeat):
+    rng = np.random.default_rng(0)
+    for transitions in sweep["transitions"]:
+        source, target = TrajectoryBuffer(capacity=transitions), TrajectoryBuffer(capacity=transitions)
+        for buffer in (source, target):
+            for reward in rng.normal(size=transitions):
+                buffer.append(0.0, 0.0, reward, 0.0)
+
+        def run():
+            RewardCompensation(source, target).calculate_compensation()
+
+        yield {"transitions": transitions}, 2 * transitions, "transitions/sec", best_time(run, repeat)
+
+BENCHMARKS = {
+    "environment_step": bench_environment_step,
+    "environment_step_inplace": bench_environment_step_inplace,
+    "vector_environment_step": bench_vector_environment_step,
+    "robot_perform_task": bench_perform_task,
+    "experiment_run_multi_robot": bench_run_multi_robot,
+    "experiment_run_co_training": bench_run_co_training,
+    "reward_compensation_calculate": bench_calculate_compensation,
+}
+
+def run_benchmarks(sweep, repeat, selected=None):
+    """
+    Runs the selected benchmarks over the sweep and returns their results.
+
+    Returns:
+        dict: The results, keyed by benchmark name and sweep parameters.
+    """
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        for params, work, unit, seconds in benchmark(sweep, repeat):
+            key = result_key(name, params)
+            results[key] = {"benchmark": name, "params": params, "unit": unit, "seconds": seconds, "rate": work / seconds}
+            print(f"{key:70s} {work / seconds:14.1f} {unit}")
+    return results
+
+def result_key(name, params):
+    return name + "[" + ",".join(f"{key}={value}" for key, value in sorted(params.items())) + "]"
+
+def compare(results, baseline, tolerance):
+    """
+    Compares results with a baseline and returns the keys whose rate dropped by more than the tolerance.
+
+    Returns:
+        list: Regression descriptions.
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        ratio = result["rate"] / reference["rate"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{key}: {result['rate']:.1f} vs baseline {reference['rate']:.1f} {result['unit']} ({ratio:.2f}x)")
+    return regressions
+
+def environment_info():
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "processor": platform.processor()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rollout and compensation throughput benchmarks")
+    parser.add_argument("--quick", action="store_true", help="run a reduced sweep")
+    parser.add_argument("--repeat", type=int, default=3, help="repeats per measurement; the best time is reported")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    sweep = SWEEPS["quick" if args.quick else "full"]
+    report = {"environment": environment_info(), "results": run_benchmarks(sweep, args.repeat, args.only)}
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)["results"]
+    regressions = compare(report["results"], baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
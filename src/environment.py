@@ -1,3 +1,4 @@
+from time import perf_counter
 import numpy as np
 
 class Environment:
@@ -7,18 +8,37 @@ class Environment:
     Attributes:
         task (Task): The task being performed in this environment, which includes specific dynamics and a reward function.
         current_state (any): The current state of the environment, which can be of any type defined by the specific task.
+        profiler (Profiler): An optional profiler timing the dynamics and reward phases of each step.
+        initial_state_noise (float): The standard deviation of the Gaussian noise added to every initial state.
+        rng (np.random.Generator): The random generator owned by this environment, used for all of its randomness.
     """
 
-    def __init__(self, task):
+    def __init__(self, task, profiler=None, initial_state_noise=0.0, seed=None):
         """
         Initializes the Environment with a given task.
 
         Args:
             task (Task): An instance of the Task class which defines the dynamics and reward function for the environment.
+            profiler (Profiler, optional): A profiler that accumulates timings of the dynamics and reward phases.
+            initial_state_noise (float): The standard deviation of Gaussian noise added to the initial state; 0 starts every episode at the same state.
+            seed (int or np.random.SeedSequence, optional): The seed of the environment's random generator.
         """
         self.task = task
+        self.profiler = profiler
+        self.initial_state_noise = initial_state_noise
+        self.rng = np.random.default_rng(seed)
+        self._state_buffers = None  # Two preallocated states that in-place steps alternate between
         self.current_state = self.get_initial_state()
 
+    def seed(self, seed):
+        """
+        Replaces the environment's random generator with a new one, so that subsequent episodes are reproducible.
+
+        Args:
+            seed (int or np.random.SeedSequence): The seed of the new random generator.
+        """
+        self.rng = np.random.default_rng(seed)
+
     def reset(self):
         """
         Resets the environment to an initial state, which is usually determined by the specifics of the task. This method is typically called at the start of each new simulation or experiment run.
@@ -33,17 +53,37 @@ class Environment:
         """
         Applies the given action to the environment, calculates the next state using the task's dynamics, and evaluates the reward using the task's reward function.
 
+        For in-place tasks the next state is written into one of two preallocated arrays that alternate between steps, so stepping does not allocate new states. The returned state is then only valid until the step after next; copy it to keep it longer.
+
         Args:
             action (any): The action taken by the robot, the type and structure of which depend on the specifics of the task.
 
         Returns:
             tuple: A tuple containing the next state and the reward obtained as a result of the action.
         """
-        next_state = self.task.dynamics(self.current_state, action)
-        reward = self.task.compute_reward(self.current_state, action)
+        out = self._next_state_buffer() if self.task.inplace else None
+        profiler = self.profiler
+        if profiler is None:
+            next_state = self.task.compute_next_state(self.current_state, action, out=out)
+            reward = self.task.compute_reward(self.current_state, action)
+        else:
+            start = perf_counter()
+            next_state = self.task.compute_next_state(self.current_state, action, out=out)
+            middle = perf_counter()
+            reward = self.task.compute_reward(self.current_state, action)
+            profiler.record("dynamics", middle - start)
+            profiler.record("reward", perf_counter() - middle)
         self.current_state = next_state  # Update the current state to the next state
         return next_state, reward
 
+    def _next_state_buffer(self):
+        state = self.current_state
+        buffers = self._state_buffers
+        if buffers is None or buffers[0].shape != np.shape(state):
+            template = np.asarray(state, dtype=np.result_type(np.asarray(state).dtype, np.float64))
+            self._state_buffers = buffers = (np.empty_like(template), np.empty_like(template))
+        return buffers[1] if state is buffers[0] else buffers[0]  # Never the array holding the current state
+
     def get_initial_state(self):
         """
         Generates an initial state for the environment. This method should be defined based on the requirements of the specific task. It could be a fixed starting point or generated randomly depending on the task's nature.
@@ -52,7 +92,10 @@ class Environment:
             any: The initial state of the environment, specific to the task's requirements.
         """
         # Initialize a more complex state for example in a robotic navigation task
-        return np.array([0.0, 0.0])  # Placeholder for a 2D coordinate start at the origin
+        state = np.array([0.0, 0.0])  # Placeholder for a 2D coordinate start at the origin
+        if self.initial_state_noise:
+            state += self.initial_state_noise * self.rng.normal(size=state.shape)
+        return state
 
     def __str__(self):
         """
@@ -64,3 +107,107 @@ class Environment:
         state_description = f"Current State: {self.current_state}"
         return f"Environment(Task: {self.task}, {state_description})"
 
+
+class CompensatedEnvironment:
+    """
+    Wraps an environment and transforms the rewards returned by its step method, leaving states and dynamics untouched. This is how reward compensation enters a rollout: the wrapped environment is stepped exactly once per action and only the returned reward is changed.
+
+    Attributes:
+        environment (Environment): The wrapped environment.
+        compensation_funcs (list): Functions taking (state, action, reward) and returning a compensated reward, applied in order.
+    """
+
+    def __init__(self, environment, compensation_funcs):
+        """
+        Initializes the CompensatedEnvironment around an existing environment.
+
+        Args:
+            environment (Environment): The environment whose rewards are compensated.
+            compensation_funcs (iterable): Functions taking (state, action, reward) and returning a compensated reward.
+        """
+        self.environment = environment
+        self.compensation_funcs = list(compensation_funcs)
+
+    @property
+    def task(self):
+        return self.environment.task
+
+    @property
+    def current_state(self):
+        return self.environment.current_state
+
+    @property
+    def rng(self):
+        return self.environment.rng
+
+    @property
+    def profiler(self):
+        return self.environment.profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        self.environment.profiler = profiler
+
+    def reset(self):
+        """
+        Resets the wrapped environment.
+
+        Returns:
+            any: The initial state of the environment.
+        """
+        return self.environment.reset()
+
+    def seed(self, seed):
+        """
+        Reseeds the wrapped environment.
+
+        Args:
+            seed (int or np.random.SeedSequence): The seed of the new random generator.
+        """
+        self.environment.seed(seed)
+
+    def get_initial_state(self):
+        """
+        Returns an initial state of the wrapped environment.
+
+        Returns:
+            any: The initial state of the environment.
+        """
+        return self.environment.get_initial_state()
+
+    def step(self, action):
+        """
+        Steps the wrapped environment once and compensates the reward it returns.
+
+        Args:
+            action (any): The action taken by the robot.
+
+        Returns:
+            tuple: A tuple containing the next state and the compensated reward.
+        """
+        state = self.environment.current_state
+        next_state, reward = self.environment.step(action)
+        for compensation_func in self.compensation_funcs:
+            reward = compensation_func(state, action, reward)
+        return next_state, reward
+
+    def with_compensation(self, compensation_func):
+        """
+        Returns a new wrapper around the same environment with an additional compensation function, without nesting wrappers.
+
+        Args:
+            compensation_func (callable): A function taking (state, action, reward) and returning a compensated reward.
+
+        Returns:
+            CompensatedEnvironment: The extended wrapper.
+        """
+        return CompensatedEnvironment(self.environment, self.compensation_funcs + [compensation_func])
+
+    def __str__(self):
+        """
+        Returns a string representation of the CompensatedEnvironment.
+
+        Returns:
+            str: A description of the wrapped environment and the number of compensation functions.
+        """
+        return f"CompensatedEnvironment({self.environment}, Compensations: {len(self.compensation_funcs)})"
@@ -1,4 +1,14 @@
+from contextlib import contextmanager
+import json
 import numpy as np
+from policy import Policy
+from policy_pipeline import AffineAdjustment
+from profiling import Profiler
+from reward_compensation import reward_chunks
+from reward_statistics import RewardStatistics
+from rollout_executor import RolloutSpec, run_rollouts
+from shared_trajectory import SharedStatisticsBoard, StatisticsBoard
+from spatial_compensation import StateConditionedCompensation
 
 class Experiment:
     """
@@ -6,16 +16,42 @@ class Experiment:
 
     Attributes:
         robots (list): A list of robots participating in the experiment.
+        executor (str): How robot rollouts are executed: "serial", "thread" or "process".
+        max_workers (int): The maximum number of workers for the thread and process executors.
+        profile (bool): Whether rollouts are instrumented with per-phase timers and call counters.
+        profiles (dict): Profilers keyed by experiment method and robot name, filled while profiling is enabled.
+        source_statistics (dict): Reward statistics of source robots keyed by robot name, reused across reward-transfer runs.
+        seed (int): The experiment seed, or None for unseeded runs.
+        seed_sequences (dict): The seed sequence of each robot, keyed by robot name, from which its episode seeds are spawned; empty for unseeded experiments.
+        logger (MetricsLogger): An optional sink receiving structured records of rollouts and transfer rounds.
     """
 
-    def __init__(self, robots):
+    def __init__(self, robots, executor="serial", max_workers=None, profile=False, seed=None, logger=None):
         """
         Initialize the Experiment with a list of robots.
         
         Args:
             robots (list of Robot): Robots to be included in the experiment.
+            executor (str): How robot rollouts are executed. "serial" runs them one after another, "thread" and "process" fan them out across workers. The process executor requires picklable policies and task callables.
+            max_workers (int, optional): The maximum number of workers; defaults to the executor's own default.
+            profile (bool): If True, time the phases of every rollout and aggregate them per robot and per experiment method.
+            seed (int, optional): The experiment seed. Each robot receives its own seed sequence spawned from it, and every episode is seeded from the robot's sequence before it is dispatched, so serial, threaded and multi-process runs produce identical data. Without a seed, episode seeds are drawn from the generators of each robot and its environment, so their own seeds still determine the episodes, and consecutive episodes differ whichever executor runs them.
+            logger (MetricsLogger, optional): A sink for structured records. Rollout summaries are logged at "info" and the first transitions of each rollout at "debug"; without a logger nothing is formatted or written.
         """
         self.robots = robots
+        self.executor = executor
+        self.max_workers = max_workers
+        self.profile = profile
+        self.profiles = {}
+        self.source_statistics = {}
+        self._source_keys = {}  # The horizon and policy each entry of source_statistics was computed for
+        self.seed = seed
+        self.seed_sequences = {}
+        self.logger = logger
+        if seed is not None:
+            self._root_sequence = np.random.SeedSequence(seed)
+            for robot, sequence in zip(robots, self._root_sequence.spawn(len(robots))):
+                self.seed_sequences[robot.name] = sequence
 
     def run_single_robot(self, robot, iterations=100):
         """
@@ -23,77 +59,288 @@ class Experiment:
         
         Args:
             robot (Robot): The robot to run the experiment on.
-            iterations (int): Number of iterations the robot should perform its task.
+            iterations (int): Maximum number of steps the robot should perform its task for.
 
         Returns:
             list: Collected data from the robot's task performance.
         """
-        return robot.perform_task(iterations)
+        with self._profiling("run_single_robot", [robot]):
+            return robot.perform_task(horizon=iterations, seed=self._episode_seed(robot))
 
-    def run_multi_robot(self):
+    def run_multi_robot(self, horizon=100):
         """
         Executes tasks for multiple robots, collecting and returning data without applying any learning transfer or compensation.
 
+        Args:
+            horizon (int): Maximum number of steps per robot.
+
         Returns:
             dict: A dictionary with robot names as keys and collected data as values.
         """
         results = {}
-        for robot in self.robots:
-            data = robot.perform_task()
+        with self._profiling("run_multi_robot", self.robots):
+            collected = self._perform_tasks(self.robots, horizon)
+        for robot, data in zip(self.robots, collected):
             results[robot.name] = data
-            print(f"Data collected for {robot.name}: {data[:5]}")
+            if self.logger is not None:
+                self._log_rollout("run_multi_robot", robot, data)
         return results
 
-    def run_co_training(self, learning_rate=0.1):
+    def run_co_training(self, learning_rate=0.1, horizon=100):
         """
         Executes a co-training scenario where robots learn simultaneously, potentially influencing each other's learning process through shared insights.
 
         Args:
             learning_rate (float): Learning rate for adjusting policies based on shared insights.
+            horizon (int): Maximum number of steps per robot and rollout.
 
         Returns:
             dict: Co-training results with adjustments made from shared data insights.
         """
         results = {}
         # Simulate a learning step where each robot adjusts its policy based on others' data
-        shared_data = np.mean([np.mean(robot.perform_task(), axis=0) for robot in self.robots], axis=0)
-        for robot in self.robots:
-            robot.adjust_policy(lambda state, action: action + learning_rate * (shared_data - state))
-            results[robot.name] = robot.perform_task()
-            print(f"Post-co-training data for {robot.name}: {results[robot.name][:5]}")
+        shape = np.shape(self.robots[0].environment.current_state)
+        board_class = SharedStatisticsBoard if self.executor == "process" else StatisticsBoard  # Only worker processes need shared memory
+        with self._profiling("run_co_training", self.robots), board_class(len(self.robots), shape) as board:
+            # Each rollout publishes its mean state to its own slot, so workers never ship trajectories to share them
+            self._perform_tasks(self.robots, horizon, board=board)
+            shared_data = board.mean()
+            for robot in self.robots:
+                robot.adjust_policy(AffineAdjustment(state_scale=-learning_rate, offset=learning_rate * shared_data))
+            collected = self._perform_tasks(self.robots, horizon)
+        for robot, data in zip(self.robots, collected):
+            results[robot.name] = data
+            if self.logger is not None:
+                self._log_rollout("run_co_training", robot, data)
         return results
 
-    def apply_reward_compensation(self, source_robot, target_robot):
+    def apply_reward_compensation(self, source_robot, target_robot, mode="global", k=8, bandwidth=None):
         """
         Applies a reward compensation based on the performance data of the source robot to improve the target robot's learning efficiency.
 
         Args:
             source_robot (Robot): The robot whose data serves as the basis for compensation.
             target_robot (Robot): The robot whose policy will be adjusted.
+            mode (str): "global" offsets every action by the difference of the mean rewards; "state" offsets actions by a state-conditioned reward difference estimated from nearest neighbors in both robots' data.
+            k (int): The number of neighbors per estimate in "state" mode.
+            bandwidth (float, optional): The width of the Gaussian kernel on neighbor distances in "state" mode.
         """
-        source_avg_reward = np.mean([r[2] for r in source_robot.data])
-        target_avg_reward = np.mean([r[2] for r in target_robot.data])
+        if mode == "state":
+            compensation = StateConditionedCompensation(source_robot.data.states, source_robot.data.rewards,
+                                                        target_robot.data.states, target_robot.data.rewards,
+                                                        k=k, bandwidth=bandwidth)
+            target_robot.adjust_policy(compensation.adjust_action)
+            return
+        if mode != "global":
+            raise ValueError(f"Unknown compensation mode {mode!r}, expected 'global' or 'state'")
+        source_avg_reward = np.mean(source_robot.data.rewards)
+        target_avg_reward = np.mean(target_robot.data.rewards)
         compensation_factor = source_avg_reward - target_avg_reward
+        target_robot.adjust_policy(AffineAdjustment(offset=compensation_factor))
+
+    def run_reward_transfer(self, source_robot, target_robot, max_iters=20, tol=1e-3, patience=3, horizon=100, scale=1.0, refresh_source=False):
+        """
+        Iterates data collection, reward compensation and policy update for the target robot until its rewards align with the source robot's. The source reward statistics are computed once and cached, so each round only collects target data. Every round offsets the target policy by the scaled gap between the mean source and target rewards, and the cumulative offset is tracked as the compensation factor.
+
+        The loop stops when the gap falls within tol, when the gap has changed by at most tol for patience consecutive rounds, or after max_iters rounds.
+
+        Args:
+            source_robot (Robot): The robot whose rewards serve as the reference. On first use its current data is used if present; otherwise one rollout is collected. The statistics are collected again when the horizon or the source policy changes.
+            target_robot (Robot): The robot whose policy is adjusted.
+            max_iters (int): The maximum number of rounds.
+            tol (float): The tolerance on the reward gap and on its change between rounds.
+            patience (int): The number of consecutive rounds without a change above tol after which the gap counts as settled.
+            horizon (int): Maximum number of steps per target rollout.
+            scale (float): The scaling factor applied to the gap before it is added to the target policy.
+            refresh_source (bool): If True, collect a fresh source rollout and recompute the cached source statistics.
+
+        Returns:
+            dict: The per-round history, the cumulative compensation factor, the number of rounds, whether the gap fell within tol, and the reason for stopping.
+        """
+        source_stats = self._source_statistics(source_robot, horizon, refresh_source)
+        history = []
+        compensation_factor = 0.0
+        converged = False
+        reason = "max_iters"
+        stale_rounds = 0
+        previous_gap = None
+        with self._profiling("run_reward_transfer", [target_robot]):
+            for iteration in range(max_iters):
+                target_data = self._perform_tasks([target_robot], horizon)[0]
+                target_stats = RewardStatistics.from_chunks(reward_chunks(target_data))
+                gap = source_stats.mean - target_stats.mean
+                magnitude = float(np.max(np.abs(gap)))
+                history.append({"iteration": iteration, "target_mean": target_stats.mean, "gap": gap,
+                                "gap_magnitude": magnitude, "compensation_factor": compensation_factor})
+                if self.logger is not None:
+                    self.logger.log("transfer_round", source=source_robot.name, target=target_robot.name, **history[-1])
+                if magnitude <= tol:
+                    converged, reason = True, "converged"
+                    break
+                if previous_gap is not None and np.max(np.abs(gap - previous_gap)) <= tol:
+                    stale_rounds += 1
+                    if stale_rounds >= patience:
+                        reason = "settled"
+                        break
+                else:
+                    stale_rounds = 0
+                previous_gap = gap
+                compensation_factor = compensation_factor + scale * gap
+                target_robot.adjust_policy(AffineAdjustment(offset=scale * gap))
+        return {"history": history, "compensation_factor": compensation_factor, "iterations": len(history),
+                "converged": converged, "reason": reason}
+
+    def profile_summary(self):
+        """
+        Summarizes the profiling measurements collected so far.
+
+        Returns:
+            dict: For each experiment method, the per-phase summary of every robot and a "total" entry aggregating all robots.
+        """
+        summary = {}
+        for method, profilers in self.profiles.items():
+            total = Profiler()
+            summary[method] = {}
+            for robot_name, profiler in profilers.items():
+                summary[method][robot_name] = profiler.summary()
+                total.merge(profiler)
+            summary[method]["total"] = total.summary()
+        return summary
+
+    def profile_json(self, **kwargs):
+        """
+        Returns the profiling summary as a JSON string.
+
+        Args:
+            **kwargs: Keyword arguments passed to json.dumps.
+
+        Returns:
+            str: The JSON-encoded summary.
+        """
+        return json.dumps(self.profile_summary(), **kwargs)
+
+    @contextmanager
+    def _profiling(self, method, robots):
+        """
+        Attaches the profilers of an experiment method to the given robots for the duration of the block and restores their previous profilers afterwards. Does nothing when profiling is disabled.
+
+        Args:
+            method (str): The name of the experiment method being profiled.
+            robots (list of Robot): The robots whose rollouts are profiled.
+        """
+        if not self.profile:
+            yield
+            return
+        profilers = self.profiles.setdefault(method, {})
+        previous = [robot.profiler for robot in robots]
+        for robot in robots:
+            robot.profiler = profilers.setdefault(robot.name, Profiler())
+        try:
+            yield
+        finally:
+            for robot, profiler in zip(robots, previous):
+                robot.profiler = profiler
 
-        def compensation_function(state, action):
-            return action + compensation_factor
+    def _source_statistics(self, robot, horizon, refresh=False):
+        """
+        Returns the cached reward statistics of a source robot. The statistics are computed from the robot's current data on first use, and from a fresh rollout when a refresh is requested or when the cached statistics were computed for another horizon or before the robot's policy changed.
+
+        Args:
+            robot (Robot): The source robot.
+            horizon (int): Maximum number of steps of a source rollout.
+            refresh (bool): If True, collect a fresh rollout and recompute the statistics even if they are cached.
+
+        Returns:
+            RewardStatistics: The reward statistics of the robot.
+        """
+        key = (horizon, robot.policy, _policy_fingerprint(robot.policy))
+        cached = robot.name in self.source_statistics
+        if cached and not refresh and self._source_keys.get(robot.name) == key:
+            return self.source_statistics[robot.name]
+        if cached or refresh or not len(robot.data):
+            data = self._perform_tasks([robot], horizon)[0]
+        else:
+            data = robot.data
+        self.source_statistics[robot.name] = RewardStatistics.from_chunks(reward_chunks(data))
+        self._source_keys[robot.name] = key
+        return self.source_statistics[robot.name]
+
+    def _log_rollout(self, method, robot, data):
+        """
+        Reports a rollout to the logger: a summary at "info" and, at "debug", copies of the first transitions, since the robot's buffer is reused by its next rollout.
+
+        Args:
+            method (str): The experiment method that collected the data.
+            robot (Robot): The robot that performed the rollout.
+            data (TrajectoryBuffer): The collected transitions.
+        """
+        logger = self.logger
+        if logger.enabled_for("info"):
+            logger.log("rollout", method=method, robot=robot.name, transitions=len(data),
+                       reward_mean=np.mean(data.rewards, axis=0) if len(data) else None)
+        if logger.enabled_for("debug"):
+            logger.log("trajectory_head", level="debug", method=method, robot=robot.name,
+                       states=data.states[:5].copy(), actions=data.actions[:5].copy(), rewards=data.rewards[:5].copy())
+
+    def _episode_seed(self, robot):
+        """
+        Spawns the seed of the robot's next episode. Seeds are spawned in the parent process when a rollout is dispatched, so they do not depend on the executor, and detached copies of a robot never replay the noise of an earlier episode.
+
+        Args:
+            robot (Robot): The robot about to perform an episode.
+
+        Returns:
+            np.random.SeedSequence: The episode seed.
+        """
+        if self.seed is None:
+            # Drawing from the robot's and environment's generators honors their seeds and advances them in the parent, so copies run by workers never replay an earlier episode
+            entropy = robot.rng.integers(2 ** 32, size=4).tolist() + robot.environment.rng.integers(2 ** 32, size=4).tolist()
+            return np.random.SeedSequence(entropy)
+        if robot.name not in self.seed_sequences:
+            self.seed_sequences[robot.name] = self._root_sequence.spawn(1)[0]  # Robots added after construction
+        return self.seed_sequences[robot.name].spawn(1)[0]
+
+    def _perform_tasks(self, robots, horizon=100, board=None):
+        """
+        Runs one task performance per robot with the configured executor.
+
+        Args:
+            robots (list of Robot): The robots whose tasks are performed.
+            horizon (int): Maximum number of steps per robot.
+            board (StatisticsBoard, optional): A board with one slot per robot, to which each rollout publishes its mean state.
 
-        target_robot.adjust_policy(compensation_function)
+        Returns:
+            list: The collected data of each robot, in the same order as robots.
+        """
+        specs = [RolloutSpec(robot, board=board, slot=slot, horizon=horizon, seed=self._episode_seed(robot)) for slot, robot in enumerate(robots)]
+        return run_rollouts(specs, executor=self.executor, max_workers=self.max_workers)
+
+def _policy_fingerprint(policy):
+    """
+    Summarizes the parameters of a Policy, so in-place updates of a policy invalidate statistics computed with it. Other callables are only identified by the object itself.
+    """
+    if not isinstance(policy, Policy):
+        return None
+    return tuple(param.tobytes() for param in policy.params())
 
 def main():
+    import sys
     from robot import Robot
     from environment import Environment
+    from metrics_logger import MetricsLogger
+    from policy import LinearPolicy
     from task import Task
 
-    # Setting up the environment and tasks
-    task = Task(lambda s, a: s + a, lambda s, a: -np.sqrt(abs(s - a)))
+    # Setting up the environment and tasks; the dynamics are damped, so states stay bounded and the transfer can converge
+    task = Task(lambda s, a: 0.5 * s + 0.1 * a, lambda s, a: -np.sqrt(abs(s - a)))
     env = Environment(task)
 
     # Robots with different initial policies
-    robot1 = Robot("Robot1", env, lambda s: s + 1)
-    robot2 = Robot("Robot2", env, lambda s: s * 2)
+    robot1 = Robot("Robot1", env, LinearPolicy(1.0, bias=1.0))  # s + 1
+    robot2 = Robot("Robot2", env, LinearPolicy(2.0))  # s * 2
 
-    experiment = Experiment([robot1, robot2])
+    logger = MetricsLogger(sys.stdout, level="debug")
+    experiment = Experiment([robot1, robot2], seed=0, logger=logger)
 
     # Run different types of experiments
     print("Running single robot experiment:")
@@ -110,6 +357,12 @@ def main():
     experiment.apply_reward_compensation(robot1, robot2)
     experiment.run_single_robot(robot2)  # Re-run experiment for robot2 after compensation
 
+    # Iterate compensation and policy updates until robot2's rewards align with robot1's
+    print("\nRunning iterative reward transfer:")
+    transfer = experiment.run_reward_transfer(robot1, robot2)
+    logger.log("transfer_result", iterations=transfer["iterations"], reason=transfer["reason"], converged=transfer["converged"])
+    logger.close()
+
 if __name__ == "__main__":
     main()
 
@@ -0,0 +1,168 @@
+import json
+import queue
+import random
+import threading
+import time
+import numpy as np
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+class MetricsLogger:
+    """
+    A structured logging sink for experiment metrics. Records are dictionaries with an event name, a level and arbitrary fields; they are filtered by level, thinned by per-event sampling rates and handed to a background thread, which encodes them as JSON and writes them in batches as JSON Lines. Encoding and I/O therefore happen off the rollout path, and callers only pay for a queue insertion.
+
+    Callers that would have to compute expensive fields should check enabled_for first. A disabled logger starts no thread and drops every record after a single attribute check.
+
+    Records that cannot be encoded or written, for example because the stream was closed or the disk is full, are dropped and counted, and the writer carries on with the next batch. The next flush or close raises a RuntimeError reporting them.
+
+    Attributes:
+        level (str): The lowest level that is recorded: "debug", "info", "warning" or "error".
+        sample_rates (dict): The fraction of records kept for each event name; events not listed are always kept.
+        batch_size (int): The maximum number of records written at once.
+        enabled (bool): Whether records are written at all.
+        logged (int): The number of records queued for writing.
+        sampled_out (int): The number of records dropped by sampling.
+        failed (int): The number of records that could not be written.
+    """
+
+    def __init__(self, stream=None, path=None, level="info", sample_rates=None, batch_size=256, seed=None, enabled=True):
+        """
+        Initializes a MetricsLogger and starts its writer thread.
+
+        Args:
+            stream (file-like, optional): A text stream receiving the JSON lines, such as sys.stdout. The logger does not close it.
+            path (str, optional): A file to which JSON lines are appended, used when no stream is given.
+            level (str): The lowest level that is recorded.
+            sample_rates (dict, optional): The fraction of records kept for each event name, between 0 and 1.
+            batch_size (int): The maximum number of records written at once.
+            seed (int, optional): The seed of the sampling generator.
+            enabled (bool): If False, the logger drops every record and starts no thread.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level {level!r}, expected one of {tuple(LEVELS)}")
+        self.level = level
+        self.sample_rates = dict(sample_rates or {})
+        self.batch_size = batch_size
+        self.enabled = enabled and (stream is not None or path is not None)
+        self.logged = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self._error = None  # The first write error since the last report
+        self._threshold = LEVELS[level]
+        self._random = random.Random(seed)
+        self._owns_stream = stream is None and path is not None
+        self._stream = None
+        self._queue = None
+        self._thread = None
+        if self.enabled:
+            self._stream = stream if stream is not None else open(path, "a")
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._write_loop, name="MetricsLogger", daemon=True)
+            self._thread.start()
+
+    def enabled_for(self, level="info"):
+        """
+        Checks whether records of a level would be written, so callers can skip computing their fields.
+
+        Args:
+            level (str): The level of the prospective record.
+
+        Returns:
+            bool: True if records of this level are written.
+        """
+        return self.enabled and LEVELS[level] >= self._threshold
+
+    def log(self, event, level="info", **fields):
+        """
+        Queues a record for writing, subject to the level threshold and the event's sampling rate. NumPy arrays and scalars in the fields are converted to lists and numbers by the writer thread, so arrays that the caller keeps modifying should be copied.
+
+        Args:
+            event (str): The name of the event.
+            level (str): The level of the record.
+            **fields: The fields of the record.
+        """
+        if not self.enabled or LEVELS[level] < self._threshold:
+            return
+        rate = self.sample_rates.get(event)
+        if rate is not None and self._random.random() >= rate:
+            self.sampled_out += 1
+            return
+        self.logged += 1
+        self._queue.put({"time": time.time(), "event": event, "level": level, **fields})
+
+    def flush(self):
+        """
+        Blocks until every queued record has been written.
+
+        Raises:
+            RuntimeError: If records could not be written since the last report, or if the writer thread has stopped with records left in the queue.
+        """
+        if not self.enabled:
+            return
+        records = self._queue
+        with records.all_tasks_done:
+            while records.unfinished_tasks:
+                if not self._thread.is_alive():
+                    raise RuntimeError(f"The writer thread of {self} has stopped with {records.unfinished_tasks} records unwritten")
+                records.all_tasks_done.wait(0.1)
+        self._report_errors()
+
+    def close(self):
+        """
+        Writes the remaining records, stops the writer thread and closes the output file if the logger opened it.
+
+        Raises:
+            RuntimeError: If records could not be written since the last report.
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._owns_stream:
+            self._stream.close()
+        self._report_errors()
+
+    def _report_errors(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise RuntimeError(f"{self} could not write {self.failed} records") from error
+
+    def _write_loop(self):
+        records = self._queue
+        while True:
+            batch = [records.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(records.get_nowait())
+                except queue.Empty:
+                    break
+            pending = [record for record in batch if record is not None]
+            try:
+                if pending:
+                    lines = [json.dumps(record, default=_json_default) for record in pending]
+                    self._stream.write("\n".join(lines) + "\n")
+                    self._stream.flush()
+            except Exception as error:  # Keep serving the queue, so flush and close never wait on a lost batch
+                self.failed += len(pending)
+                self._error = self._error or error
+            finally:
+                for _ in batch:
+                    records.task_done()
+            if len(pending) < len(batch):
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self):
+        return f"MetricsLogger(Level: {self.level}, Enabled: {self.enabled}, Logged: {self.logged}, Sampled Out: {self.sampled_out}, Failed: {self.failed})"
+
+def _json_default(value):
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return str(value)
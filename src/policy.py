@@ -0,0 +1,335 @@
+from abc import ABC, abstractmethod
+import copy
+import numpy as np
+from policy_pipeline import AffineAdjustment
+
+class Policy(ABC):
+    """
+    Base class for parametric policies whose parameters are stored in compact NumPy arrays. Unlike bare callables, policies can act on a batch of states at once, can be pickled and sent to worker processes, and can be updated in place.
+
+    Subclasses implement act and params; calling a policy with a single state returns a single action, so a policy can be used anywhere a callable policy is expected.
+    """
+
+    __slots__ = ()
+
+    def __call__(self, state):
+        """
+        Computes the action for a single state.
+
+        Args:
+            state (any): The current state.
+
+        Returns:
+            np.ndarray: The action.
+        """
+        return self.act(np.asarray(state, dtype=float)[np.newaxis])[0]
+
+    @abstractmethod
+    def act(self, states):
+        """
+        Computes the actions for a batch of states.
+
+        Args:
+            states (array-like): The states, with a leading batch axis.
+
+        Returns:
+            np.ndarray: The actions, with the same leading batch axis.
+        """
+
+    def act_into(self, state, out):
+        """
+        Computes the action for a single state and writes it into a preallocated array. Subclasses that can evaluate without temporaries override this; the default copies the result of calling the policy.
+
+        Args:
+            state (any): The current state.
+            out (np.ndarray): The array receiving the action.
+
+        Returns:
+            np.ndarray: out.
+        """
+        out[...] = self(state)
+        return out
+
+    @abstractmethod
+    def params(self):
+        """
+        Returns the parameter arrays of the policy. The arrays are the policy's own storage, not copies.
+
+        Returns:
+            list of np.ndarray: The parameter arrays.
+        """
+
+    def set_params(self, values):
+        """
+        Overwrites the parameters in place.
+
+        Args:
+            values (list of array-like): New values, one per parameter array, in the order returned by params.
+        """
+        params = _matching_params(self, values)
+        for param, value in zip(params, values):
+            param[...] = value
+
+    def update(self, deltas, learning_rate=1.0):
+        """
+        Adds scaled deltas, such as gradient steps, to the parameters in place.
+
+        Args:
+            deltas (list of array-like): One delta per parameter array, in the order returned by params.
+            learning_rate (float): The factor applied to each delta.
+        """
+        params = _matching_params(self, deltas)
+        for param, delta in zip(params, deltas):
+            param += learning_rate * np.asarray(delta)
+
+    def absorb(self, adjustment):
+        """
+        Folds an action adjustment into the parameters in place, if the adjustment can be expressed by this policy class.
+
+        Args:
+            adjustment (callable): The adjustment, typically an AffineAdjustment.
+
+        Returns:
+            bool: True if the adjustment was absorbed, False if it has to be applied as a separate stage.
+        """
+        return False
+
+    def absorbed(self, adjustment):
+        """
+        Folds an action adjustment into a copy of the policy, leaving this policy unchanged so it can still be shared by other robots.
+
+        Args:
+            adjustment (callable): The adjustment, typically an AffineAdjustment.
+
+        Returns:
+            Policy: The adjusted copy, or None if the adjustment has to be applied as a separate stage.
+        """
+        policy = copy.deepcopy(self)
+        return policy if policy.absorb(adjustment) else None
+
+class LinearPolicy(Policy):
+    """
+    An affine policy computing weights @ state + bias. Scalar or vector weights act elementwise, matrix weights act as a linear map.
+
+    Attributes:
+        weights (np.ndarray): The weights, a scalar, a vector or a matrix of shape (action_dim, state_dim).
+        bias (np.ndarray): The bias added to every action.
+    """
+
+    __slots__ = ("weights", "bias")
+
+    def __init__(self, weights, bias=0.0):
+        """
+        Initializes a LinearPolicy.
+
+        Args:
+            weights (array-like): The weights; scalars and vectors are applied elementwise.
+            bias (array-like): The bias added to every action.
+        """
+        self.weights = np.array(weights, dtype=float)
+        self.bias = np.array(bias, dtype=float)
+
+    def __call__(self, state):
+        state = np.asarray(state, dtype=float)
+        if self.weights.ndim == 2:
+            return self.weights @ state + self.bias
+        return self.weights * state + self.bias
+
+    def act(self, states):
+        states = np.asarray(states, dtype=float)
+        if self.weights.ndim == 2:
+            return states @ self.weights.T + self.bias
+        return self.weights * states + self.bias
+
+    def act_into(self, state, out):
+        if self.weights.ndim == 2:
+            np.matmul(self.weights, state, out=out)
+        else:
+            np.multiply(self.weights, state, out=out)
+        out += self.bias
+        return out
+
+    def params(self):
+        return [self.weights, self.bias]
+
+    def absorb(self, adjustment):
+        """
+        Folds an AffineAdjustment into the weights and bias. Elementwise weights absorb any affine adjustment; matrix weights absorb state-dependent terms only when they are square.
+        """
+        if not isinstance(adjustment, AffineAdjustment):
+            return False
+        action_scale = np.asarray(adjustment.action_scale, dtype=float)
+        state_scale = np.asarray(adjustment.state_scale, dtype=float)
+        if self.weights.ndim == 2:
+            rows, columns = self.weights.shape
+            if np.any(state_scale != 0) and rows != columns:
+                return False
+            scale = action_scale[:, np.newaxis] if action_scale.ndim == 1 else action_scale
+            weights = scale * self.weights + state_scale * np.eye(rows, columns)
+        else:
+            weights = action_scale * self.weights + state_scale
+        bias = action_scale * self.bias + adjustment.offset
+        self.weights = _assign(self.weights, weights)
+        self.bias = _assign(self.bias, bias)
+        return True
+
+    def __str__(self):
+        return f"LinearPolicy(Weights: {self.weights.tolist()}, Bias: {self.bias.tolist()})"
+
+class TabularPolicy(Policy):
+    """
+    A policy that looks up actions in a table over a regular grid of states. Each state dimension between low and high is divided into a number of bins; states outside the grid use the nearest edge cell.
+
+    Attributes:
+        table (np.ndarray): The actions, one row per grid cell in row-major order.
+        low (np.ndarray): The lower corner of the grid.
+        high (np.ndarray): The upper corner of the grid.
+        bins (tuple): The number of bins per state dimension.
+    """
+
+    __slots__ = ("table", "low", "high", "bins")
+
+    def __init__(self, low, high, bins, action_shape=(), table=None):
+        """
+        Initializes a TabularPolicy.
+
+        Args:
+            low (array-like): The lower corner of the grid.
+            high (array-like): The upper corner of the grid.
+            bins (int or sequence of int): The number of bins per state dimension.
+            action_shape (tuple): The shape of a single action; used when no table is given.
+            table (array-like, optional): Initial actions, one row per grid cell. Defaults to zeros.
+        """
+        self.low = np.atleast_1d(np.array(low, dtype=float))
+        self.high = np.atleast_1d(np.array(high, dtype=float))
+        self.bins = tuple(np.broadcast_to(bins, self.low.shape).tolist())
+        cells = int(np.prod(self.bins))
+        if table is None:
+            self.table = np.zeros((cells,) + tuple(action_shape))
+        else:
+            self.table = np.array(table, dtype=float)
+            if len(self.table) != cells:
+                raise ValueError(f"Expected a table with {cells} rows, got {len(self.table)}")
+
+    def cells(self, states):
+        """
+        Returns the table rows of a batch of states.
+
+        Args:
+            states (array-like): The states, with a leading batch axis.
+
+        Returns:
+            np.ndarray: The row index of each state.
+        """
+        states = np.asarray(states, dtype=float).reshape(-1, len(self.bins))
+        bins = np.asarray(self.bins)
+        indices = np.floor((states - self.low) / (self.high - self.low) * bins).astype(np.int64)
+        indices = np.clip(indices, 0, bins - 1)
+        return np.ravel_multi_index(indices.T, self.bins)
+
+    def act(self, states):
+        return self.table[self.cells(states)]
+
+    def params(self):
+        return [self.table]
+
+    def absorb(self, adjustment):
+        """
+        Folds a state-independent AffineAdjustment into the table.
+        """
+        if not isinstance(adjustment, AffineAdjustment) or np.any(np.asarray(adjustment.state_scale) != 0):
+            return False
+        self.table = _assign(self.table, adjustment.action_scale * self.table + adjustment.offset)
+        return True
+
+    def __str__(self):
+        return f"TabularPolicy(Bins: {self.bins}, Low: {self.low.tolist()}, High: {self.high.tolist()})"
+
+class MLPPolicy(Policy):
+    """
+    A small multi-layer perceptron policy evaluated in NumPy, with tanh activations between layers and a linear output layer.
+
+    Attributes:
+        weights (list of np.ndarray): The weight matrix of each layer, of shape (outputs, inputs).
+        biases (list of np.ndarray): The bias vector of each layer.
+    """
+
+    __slots__ = ("weights", "biases")
+
+    def __init__(self, weights, biases):
+        """
+        Initializes an MLPPolicy from its layer parameters.
+
+        Args:
+            weights (list of array-like): The weight matrix of each layer, of shape (outputs, inputs).
+            biases (list of array-like): The bias vector of each layer.
+        """
+        if len(weights) != len(biases):
+            raise ValueError(f"Got {len(weights)} weight matrices but {len(biases)} bias vectors")
+        self.weights = [np.array(w, dtype=float) for w in weights]
+        self.biases = [np.array(b, dtype=float) for b in biases]
+
+    @classmethod
+    def random(cls, sizes, rng=None, scale=0.1):
+        """
+        Creates an MLPPolicy with normally distributed weights and zero biases.
+
+        Args:
+            sizes (list of int): The layer sizes, starting with the state dimension and ending with the action dimension.
+            rng (np.random.Generator, optional): The random generator used for the weights.
+            scale (float): The standard deviation of the weights.
+
+        Returns:
+            MLPPolicy: The new policy.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        weights = [rng.normal(0.0, scale, size=(outputs, inputs)) for inputs, outputs in zip(sizes[:-1], sizes[1:])]
+        biases = [np.zeros(outputs) for outputs in sizes[1:]]
+        return cls(weights, biases)
+
+    def act(self, states):
+        hidden = np.asarray(states, dtype=float)
+        last = len(self.weights) - 1
+        for layer, (weights, bias) in enumerate(zip(self.weights, self.biases)):
+            hidden = hidden @ weights.T + bias
+            if layer < last:
+                hidden = np.tanh(hidden)
+        return hidden
+
+    def params(self):
+        return self.weights + self.biases
+
+    def absorb(self, adjustment):
+        """
+        Folds a state-independent AffineAdjustment into the output layer.
+        """
+        if not isinstance(adjustment, AffineAdjustment) or np.any(np.asarray(adjustment.state_scale) != 0):
+            return False
+        action_scale = np.asarray(adjustment.action_scale, dtype=float)
+        row_scale = action_scale[:, np.newaxis] if action_scale.ndim == 1 else action_scale
+        self.weights[-1] = _assign(self.weights[-1], row_scale * self.weights[-1])
+        self.biases[-1] = _assign(self.biases[-1], action_scale * self.biases[-1] + adjustment.offset)
+        return True
+
+    def __str__(self):
+        sizes = [self.weights[0].shape[1]] + [w.shape[0] for w in self.weights]
+        return f"MLPPolicy(Sizes: {sizes})"
+
+def _matching_params(policy, values):
+    """
+    Returns the parameter arrays of a policy after checking that one value was given per array.
+    """
+    params = policy.params()
+    if len(values) != len(params):
+        raise ValueError(f"Expected {len(params)} arrays for {policy}, got {len(values)}")
+    return params
+
+def _assign(param, value):
+    """
+    Writes value into param in place when the shapes agree, and returns a new array otherwise.
+    """
+    value = np.asarray(value, dtype=float)
+    if value.shape == param.shape:
+        param[...] = value
+        return param
+    return value.copy()
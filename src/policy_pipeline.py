@@ -0,0 +1,129 @@
+import numpy as np
+
+class AffineAdjustment:
+    """
+    An action adjustment of the form action_scale * action + state_scale * state + offset. Consecutive affine adjustments compose into a single affine adjustment, which lets a PolicyPipeline fold them into one precomputed transform.
+
+    Attributes:
+        action_scale (float or np.ndarray): The elementwise factor applied to the action.
+        state_scale (float or np.ndarray): The elementwise factor applied to the state.
+        offset (float or np.ndarray): The constant added to the action.
+    """
+
+    def __init__(self, action_scale=1.0, state_scale=0.0, offset=0.0):
+        """
+        Initializes an AffineAdjustment. The defaults leave the action unchanged.
+
+        Args:
+            action_scale (float or array-like): The elementwise factor applied to the action.
+            state_scale (float or array-like): The elementwise factor applied to the state.
+            offset (float or array-like): The constant added to the action.
+        """
+        self.action_scale = action_scale
+        self.state_scale = state_scale
+        self.offset = offset
+        self._uses_state = np.any(np.asarray(state_scale) != 0)
+
+    def __call__(self, state, action):
+        """
+        Applies the adjustment to an action.
+
+        Args:
+            state (any): The state in which the action is taken.
+            action (any): The action to adjust.
+
+        Returns:
+            any: The adjusted action.
+        """
+        if self._uses_state:
+            return self.action_scale * action + self.state_scale * state + self.offset
+        return self.action_scale * action + self.offset
+
+    def followed_by(self, other):
+        """
+        Composes this adjustment with another one applied after it.
+
+        Args:
+            other (AffineAdjustment): The adjustment applied to the output of this one.
+
+        Returns:
+            AffineAdjustment: A single adjustment equivalent to applying self and then other.
+        """
+        return AffineAdjustment(
+            action_scale=other.action_scale * self.action_scale,
+            state_scale=other.action_scale * self.state_scale + other.state_scale,
+            offset=other.action_scale * self.offset + other.offset,
+        )
+
+    def __str__(self):
+        return f"AffineAdjustment(Action Scale: {self.action_scale}, State Scale: {self.state_scale}, Offset: {self.offset})"
+
+class PolicyPipeline:
+    """
+    A policy built from a base policy and a flat list of adjustment stages. Each stage takes a state and the action produced so far and returns a new action. Instead of wrapping the previous policy in another closure, adjustments are appended to the list, and consecutive affine adjustments are folded into one, so the cost of an action does not grow with the number of refinement rounds.
+
+    Attributes:
+        base_policy (callable): The policy producing the initial action for a state.
+        stages (list): The adjustment stages applied in order.
+    """
+
+    def __init__(self, base_policy, stages=()):
+        """
+        Initializes a PolicyPipeline. A pipeline given as the base policy is flattened into the new one.
+
+        Args:
+            base_policy (callable): A function that takes a state and returns an action.
+            stages (iterable): Adjustment stages, each a callable taking a state and an action.
+        """
+        if isinstance(base_policy, PolicyPipeline):
+            stages = list(base_policy.stages) + list(stages)
+            base_policy = base_policy.base_policy
+        self.base_policy = base_policy
+        self.stages = []
+        for stage in stages:
+            self._append(stage)
+
+    def then(self, stage):
+        """
+        Returns a new pipeline with an additional stage. The current pipeline is left unchanged, so it can still be shared by other robots.
+
+        Args:
+            stage (callable): A function that takes a state and an action and returns the adjusted action.
+
+        Returns:
+            PolicyPipeline: The extended pipeline.
+        """
+        pipeline = PolicyPipeline(self.base_policy, self.stages)
+        pipeline._append(stage)
+        return pipeline
+
+    @property
+    def depth(self):
+        """
+        Returns the number of stages applied after the base policy.
+        """
+        return len(self.stages)
+
+    def _append(self, stage):
+        if isinstance(stage, AffineAdjustment) and self.stages and isinstance(self.stages[-1], AffineAdjustment):
+            self.stages[-1] = self.stages[-1].followed_by(stage)
+        else:
+            self.stages.append(stage)
+
+    def __call__(self, state):
+        """
+        Computes the action for a state by running the base policy and then every stage in order.
+
+        Args:
+            state (any): The current state.
+
+        Returns:
+            any: The adjusted action.
+        """
+        action = self.base_policy(state)
+        for stage in self.stages:
+            action = stage(state, action)
+        return action
+
+    def __str__(self):
+        return f"PolicyPipeline(Depth: {self.depth})"
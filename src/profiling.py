@@ -0,0 +1,82 @@
+import json
+
+class Profiler:
+    """
+    Accumulates wall-clock time and call counts per phase of a rollout, such as the policy, the task's dynamics and reward function, and data recording. Profiling is opt-in: environments and robots only time their phases when a profiler is attached, so the uninstrumented path costs a single attribute check per step.
+
+    Attributes:
+        times (dict): Total seconds spent in each phase.
+        counts (dict): Number of calls of each phase.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty Profiler.
+        """
+        self.times = {}
+        self.counts = {}
+
+    def record(self, phase, seconds, calls=1):
+        """
+        Adds a timing measurement to a phase.
+
+        Args:
+            phase (str): The name of the phase.
+            seconds (float): The time spent in the phase.
+            calls (int): The number of calls the measurement covers.
+        """
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + calls
+
+    def merge(self, other):
+        """
+        Adds the measurements of another profiler to this one.
+
+        Args:
+            other (Profiler): The profiler to merge.
+
+        Returns:
+            Profiler: The profiler itself, to allow chaining.
+        """
+        for phase, seconds in other.times.items():
+            self.record(phase, seconds, other.counts[phase])
+        return self
+
+    def reset(self):
+        """
+        Discards all measurements.
+        """
+        self.times.clear()
+        self.counts.clear()
+
+    def summary(self):
+        """
+        Summarizes the measurements per phase.
+
+        Returns:
+            dict: For each phase, the number of calls, the total seconds and the mean seconds per call.
+        """
+        return {
+            phase: {
+                "calls": self.counts[phase],
+                "total_seconds": seconds,
+                "mean_seconds": seconds / self.counts[phase] if self.counts[phase] else 0.0,
+            }
+            for phase, seconds in self.times.items()
+        }
+
+    def to_json(self, **kwargs):
+        """
+        Returns the summary as a JSON string.
+
+        Args:
+            **kwargs: Keyword arguments passed to json.dumps.
+
+        Returns:
+            str: The JSON-encoded summary.
+        """
+        return json.dumps(self.summary(), **kwargs)
+
+    def __str__(self):
+        phases = ", ".join(f"{phase}: {self.counts[phase]} calls, {seconds:.6f}s" for phase, seconds in self.times.items())
+        return f"Profiler({phases})"
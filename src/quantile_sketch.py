@@ -0,0 +1,219 @@
+import numpy as np
+
+class QuantileSketch:
+    """
+    A mergeable streaming quantile sketch in the style of KLL (Karnin, Lang and Liberty). Values are kept in a hierarchy of compactors: level i holds items that each stand for 2**i values, and a level that exceeds its capacity is sorted and every other item, starting at a random offset, is promoted to the next level. Capacities shrink geometrically towards the lower levels, so the sketch holds O(k) items regardless of how many values it has seen, and the rank error of its quantiles is roughly proportional to 1/k.
+
+    Sketches built from separate chunks or separate workers can be merged into one sketch of the combined stream. Rewards are summarized as scalars; array rewards are flattened.
+
+    Attributes:
+        k (int): The capacity of the top compactor, controlling accuracy and memory.
+        count (int): The number of values summarized.
+        min (float): The smallest value seen.
+        max (float): The largest value seen.
+    """
+
+    def __init__(self, k=200, seed=0):
+        """
+        Initializes an empty QuantileSketch.
+
+        Args:
+            k (int): The capacity of the top compactor; larger values are more accurate and use more memory.
+            seed (int, optional): The seed of the generator choosing which items a compaction keeps, so sketches are reproducible.
+        """
+        if k < 8:
+            raise ValueError(f"k must be at least 8, got {k}")
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None  # Cached (items, ranks) for queries
+
+    def update(self, values):
+        """
+        Adds a chunk of values to the sketch.
+
+        Args:
+            values (array-like): The values; arrays of any shape are flattened.
+
+        Returns:
+            QuantileSketch: The sketch itself, to allow chaining.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one. The result summarizes both streams.
+
+        Args:
+            other (QuantileSketch): The sketch to merge.
+
+        Returns:
+            QuantileSketch: The sketch itself, to allow chaining.
+        """
+        if other.count == 0:
+            return self
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self._compress()
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, k=200, seed=0):
+        """
+        Builds a sketch by consuming an iterable of value chunks, such as a generator reading from disk.
+
+        Args:
+            chunks (iterable): Chunks of values accepted by update.
+            k (int): The capacity of the top compactor.
+            seed (int, optional): The seed of the compaction generator.
+
+        Returns:
+            QuantileSketch: The sketch of all chunks.
+        """
+        sketch = cls(k=k, seed=seed)
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch
+
+    def quantile(self, q):
+        """
+        Estimates quantiles of the summarized values.
+
+        Args:
+            q (float or array-like): Quantile levels between 0 and 1.
+
+        Returns:
+            np.ndarray: The estimated quantiles, with the shape of q.
+        """
+        if self.count == 0:
+            raise ValueError("Cannot query an empty QuantileSketch")
+        items, ranks = self._cdf_points()
+        return np.interp(np.clip(q, 0.0, 1.0), ranks, items)
+
+    def cdf(self, values):
+        """
+        Estimates the fraction of summarized values below each given value.
+
+        Args:
+            values (float or array-like): The values to rank.
+
+        Returns:
+            np.ndarray: The estimated cumulative probabilities, with the shape of values.
+        """
+        if self.count == 0:
+            raise ValueError("Cannot query an empty QuantileSketch")
+        items, ranks = self._cdf_points()
+        return np.interp(values, items, ranks)
+
+    @property
+    def size(self):
+        """
+        The number of items retained by the sketch.
+        """
+        return sum(len(items) for items in self._levels)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        self._sorted = None
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+                level = 0  # A new top level shrinks the capacities below it, so check them again
+                continue
+            items = np.sort(items)
+            paired = len(items) - len(items) % 2  # An odd item out stays on this level
+            promoted = items[self._rng.integers(2):paired:2]
+            self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            self._levels[level] = items[paired:]
+            level += 1
+
+    def _cdf_points(self):
+        if self._sorted is None:
+            items = np.concatenate(self._levels)
+            weights = np.concatenate([np.full(len(level_items), 2.0 ** level) for level, level_items in enumerate(self._levels)])
+            order = np.argsort(items, kind="stable")
+            items, weights = items[order], weights[order]
+            ranks = (np.cumsum(weights) - 0.5 * weights) / weights.sum()  # Midpoint rank of each item
+            self._sorted = (np.concatenate([[self.min], items, [self.max]]), np.concatenate([[0.0], ranks, [1.0]]))
+        return self._sorted
+
+    def __len__(self):
+        return self.count
+
+    def __str__(self):
+        return f"QuantileSketch(Count: {self.count}, Items: {self.size}, k: {self.k})"
+
+class QuantileMapping:
+    """
+    A reward compensation that matches distributions instead of means. A target reward r is mapped to the source reward at the same quantile, F_source^-1(F_target(r)), so the compensated target rewards follow the source distribution in shape as well as location.
+
+    Instances are picklable and work both as a reward compensation function (state, action, reward) and, through map, on whole reward arrays.
+
+    Attributes:
+        source_sketch (QuantileSketch): The sketch of the source rewards.
+        target_sketch (QuantileSketch): The sketch of the target rewards.
+    """
+
+    def __init__(self, source_sketch, target_sketch):
+        """
+        Initializes a QuantileMapping from the sketches of both reward distributions.
+
+        Args:
+            source_sketch (QuantileSketch): The sketch of the source rewards.
+            target_sketch (QuantileSketch): The sketch of the target rewards.
+        """
+        self.source_sketch = source_sketch
+        self.target_sketch = target_sketch
+
+    def map(self, rewards):
+        """
+        Maps target rewards onto the source distribution.
+
+        Args:
+            rewards (float or array-like): Target rewards of any shape.
+
+        Returns:
+            np.ndarray: The mapped rewards, with the shape of rewards.
+        """
+        return self.source_sketch.quantile(self.target_sketch.cdf(rewards))
+
+    def __call__(self, state, action, reward):
+        """
+        Compensates a reward observed in a state.
+
+        Args:
+            state (any): The state in which the reward was observed; unused.
+            action (any): The action taken; unused.
+            reward (any): The reward to compensate.
+
+        Returns:
+            np.ndarray: The compensated reward.
+        """
+        return self.map(reward)
+
+    def __str__(self):
+        return f"QuantileMapping(Source: {self.source_sketch}, Target: {self.target_sketch})"
@@ -1,61 +1,170 @@
+from functools import partial
+import numpy as np
+from environment import CompensatedEnvironment
+from quantile_sketch import QuantileMapping, QuantileSketch
+from reward_statistics import RewardStatistics
+from spatial_compensation import StateConditionedCompensation
+from trajectory_dataset import TrajectoryDataset
+
+CHUNK_SIZE = 65536  # Rewards summarized per step when streaming over a dataset
+
 class RewardCompensation:
     """
     Manages the calculation and application of reward compensation between different robots or tasks.
     
     Attributes:
-        source_data (list): Collected data from the source robot or task, containing tuples of (state, action, reward).
-        target_data (list): Collected data from the target robot or task, similar to source_data.
+        source_data (TrajectoryBuffer, TrajectoryDataset or list): Collected data from the source robot or task, either a trajectory buffer, an on-disk dataset or a list of (state, action, reward) tuples.
+        target_data (TrajectoryBuffer, TrajectoryDataset or list): Collected data from the target robot or task, similar to source_data.
+        source_stats (RewardStatistics): Streaming statistics of the source rewards, computed on first use.
+        target_stats (RewardStatistics): Streaming statistics of the target rewards, computed on first use.
+        source_sketch (QuantileSketch): A quantile sketch of the source rewards, computed on first use in "quantile" mode.
+        target_sketch (QuantileSketch): A quantile sketch of the target rewards, computed on first use in "quantile" mode.
     """
 
-    def __init__(self, source_data, target_data):
+    def __init__(self, source_data, target_data, source_stats=None, target_stats=None, source_sketch=None, target_sketch=None):
         """
         Initializes the RewardCompensation object with data from both source and target robots or tasks.
 
         Args:
-            source_data (list): Data from the source task, each item is a tuple (state, action, reward).
-            target_data (list): Data from the target task, each item is a tuple (state, action, reward).
+            source_data (TrajectoryBuffer, TrajectoryDataset or list): Data from the source task, a trajectory buffer, an on-disk dataset or a list of (state, action, reward) tuples. May be None when source_stats is given.
+            target_data (TrajectoryBuffer, TrajectoryDataset or list): Data from the target task, in the same format as source_data. May be None when target_stats is given.
+            source_stats (RewardStatistics, optional): Precomputed statistics of the source rewards.
+            target_stats (RewardStatistics, optional): Precomputed statistics of the target rewards.
+            source_sketch (QuantileSketch, optional): A precomputed quantile sketch of the source rewards.
+            target_sketch (QuantileSketch, optional): A precomputed quantile sketch of the target rewards.
         """
         self.source_data = source_data
         self.target_data = target_data
+        self.source_stats = source_stats
+        self.target_stats = target_stats
+        self.source_sketch = source_sketch
+        self.target_sketch = target_sketch
+
+    @classmethod
+    def from_streams(cls, source_chunks, target_chunks, sketch_k=None):
+        """
+        Creates a RewardCompensation from streams of reward chunks without keeping the data in memory. Partial statistics computed elsewhere, for example by separate workers, can be combined with RewardStatistics.merge and QuantileSketch.merge and passed to the constructor instead.
+
+        Args:
+            source_chunks (iterable): Chunks of source rewards, either reward arrays or trajectory buffers.
+            target_chunks (iterable): Chunks of target rewards, in the same format as source_chunks.
+            sketch_k (int, optional): If given, quantile sketches with this accuracy parameter are built in the same pass, enabling "quantile" mode.
+
+        Returns:
+            RewardCompensation: An instance backed only by the accumulated statistics.
+        """
+        source_stats, source_sketch = _summarize(source_chunks, sketch_k)
+        target_stats, target_sketch = _summarize(target_chunks, sketch_k)
+        return cls(None, None, source_stats=source_stats, target_stats=target_stats, source_sketch=source_sketch, target_sketch=target_sketch)
+
+    @classmethod
+    def from_datasets(cls, source_path, target_path):
+        """
+        Creates a RewardCompensation from on-disk trajectory datasets. The datasets are memory mapped and their rewards are streamed in chunks, so source data collected once can be reused across many target experiments without loading it into RAM.
+
+        Args:
+            source_path (str): The directory of the source dataset.
+            target_path (str): The directory of the target dataset.
+
+        Returns:
+            RewardCompensation: An instance backed by the memory-mapped datasets.
+        """
+        return cls(TrajectoryDataset(source_path), TrajectoryDataset(target_path))
+
+    def source_statistics(self):
+        """
+        Returns the statistics of the source rewards, streaming over the source data on first use.
+
+        Returns:
+            RewardStatistics: The source reward statistics.
+        """
+        if self.source_stats is None:
+            self.source_stats = RewardStatistics.from_chunks(reward_chunks(self.source_data))
+        return self.source_stats
+
+    def target_statistics(self):
+        """
+        Returns the statistics of the target rewards, streaming over the target data on first use.
+
+        Returns:
+            RewardStatistics: The target reward statistics.
+        """
+        if self.target_stats is None:
+            self.target_stats = RewardStatistics.from_chunks(reward_chunks(self.target_data))
+        return self.target_stats
+
+    def source_quantiles(self, sketch_k=200):
+        """
+        Returns a quantile sketch of the source rewards, streaming over the source data on first use.
+
+        Args:
+            sketch_k (int): The accuracy parameter of a newly built sketch.
 
-    def calculate_compensation(self):
+        Returns:
+            QuantileSketch: The source reward sketch.
+        """
+        if self.source_sketch is None:
+            self.source_sketch = QuantileSketch.from_chunks(reward_chunks(_require_data(self.source_data)), k=sketch_k)
+        return self.source_sketch
+
+    def target_quantiles(self, sketch_k=200):
+        """
+        Returns a quantile sketch of the target rewards, streaming over the target data on first use.
+
+        Args:
+            sketch_k (int): The accuracy parameter of a newly built sketch.
+
+        Returns:
+            QuantileSketch: The target reward sketch.
+        """
+        if self.target_sketch is None:
+            self.target_sketch = QuantileSketch.from_chunks(reward_chunks(_require_data(self.target_data)), k=sketch_k)
+        return self.target_sketch
+
+    def calculate_compensation(self, mode="global", k=8, bandwidth=None, sketch_k=200):
         """
         Calculates a compensation function based on the differences in reward distributions between the source and target data.
 
+        Args:
+            mode (str): "global" for a single offset, the difference of the mean rewards; "state" for a state-conditioned offset estimated from the nearest source and target transitions; or "quantile" to map each target reward to the source reward at the same quantile, estimated from fixed-size quantile sketches.
+            k (int): The number of neighbors per estimate in "state" mode.
+            bandwidth (float, optional): The width of the Gaussian kernel on neighbor distances in "state" mode; if None, neighbors are averaged uniformly.
+            sketch_k (int): The accuracy parameter of the quantile sketches built in "quantile" mode.
+
         Returns:
             function: A compensation function that can be used to adjust actions or rewards.
         """
+        if mode == "state":
+            source_states, source_rewards = state_reward_columns(self.source_data)
+            target_states, target_rewards = state_reward_columns(self.target_data)
+            return StateConditionedCompensation(source_states, source_rewards, target_states, target_rewards, k=k, bandwidth=bandwidth)
+        if mode == "quantile":
+            return QuantileMapping(self.source_quantiles(sketch_k), self.target_quantiles(sketch_k))
+        if mode != "global":
+            raise ValueError(f"Unknown compensation mode {mode!r}, expected 'global', 'state' or 'quantile'")
+
         # Calculate average rewards for source and target
-        source_avg_reward = sum([data[2] for data in self.source_data]) / len(self.source_data)
-        target_avg_reward = sum([data[2] for data in self.target_data]) / len(self.target_data)
+        source_avg_reward = self.source_statistics().mean
+        target_avg_reward = self.target_statistics().mean
 
         # Determine the compensation factor as the difference in average rewards
         compensation_factor = source_avg_reward - target_avg_reward
 
         # Create a compensation function that adjusts the reward by this factor
-        def compensation_func(state, action, reward):
-            return reward + compensation_factor
-
-        return compensation_func
+        return partial(_offset_reward, compensation_factor)
 
     def apply_compensation(self, robot, compensation_func):
         """
-        Applies the calculated reward compensation to adjust the robot's policy or reward mechanism.
+        Applies the calculated reward compensation to the robot's reward mechanism. The robot's environment is wrapped in a CompensatedEnvironment, so each step of a rollout runs the dynamics and reward once and only the returned reward is compensated. The robot's policy is left unchanged.
 
         Args:
             robot (Robot): The robot to which the compensation will be applied.
             compensation_func (function): The compensation function to adjust the robot's rewards.
         """
-        original_policy = robot.policy
-
-        def compensated_policy(state):
-            action = original_policy(state)
-            _, reward = robot.environment.step(action)
-            compensated_reward = compensation_func(state, action, reward)
-            return action, compensated_reward
-
-        # Set the new policy with compensation on the robot
-        robot.policy = compensated_policy
+        if isinstance(robot.environment, CompensatedEnvironment):
+            robot.environment = robot.environment.with_compensation(compensation_func)
+        else:
+            robot.environment = CompensatedEnvironment(robot.environment, [compensation_func])
 
     def __str__(self):
         """
@@ -64,5 +173,63 @@ class RewardCompensation:
         Returns:
             str: A brief summary of the RewardCompensation instance.
         """
-        return f"RewardCompensation(Source Data Length: {len(self.source_data)}, Target Data Length: {len(self.target_data)})"
+        source_length = len(self.source_data) if self.source_data is not None else self.source_stats.count
+        target_length = len(self.target_data) if self.target_data is not None else self.target_stats.count
+        return f"RewardCompensation(Source Data Length: {source_length}, Target Data Length: {target_length})"
+
+
+def reward_chunks(data, chunk_size=CHUNK_SIZE):
+    """
+    Yields the rewards of a dataset in chunks. Column-backed datasets are sliced without copying; lists of (state, action, reward) tuples are converted one chunk at a time.
+
+    Args:
+        data (TrajectoryBuffer, TrajectoryDataset or list): The dataset to read rewards from.
+        chunk_size (int): The maximum number of rewards per chunk.
+
+    Yields:
+        np.ndarray: Consecutive chunks of rewards.
+    """
+    rewards = getattr(data, "rewards", None)
+    for start in range(0, len(data), chunk_size):
+        if rewards is not None:
+            yield rewards[start:start + chunk_size]
+        else:
+            yield np.array([transition[2] for transition in data[start:start + chunk_size]])
+
+def state_reward_columns(data):
+    """
+    Returns the states and rewards of a dataset as arrays. Column-backed datasets return their columns directly; lists of (state, action, reward) tuples are converted once.
+
+    Args:
+        data (TrajectoryBuffer, TrajectoryDataset or list): The dataset to read.
+
+    Returns:
+        tuple: The states and the rewards, one row per transition.
+    """
+    if data is None:
+        raise ValueError("State-conditioned compensation needs the source and target transitions, not only their statistics")
+    if getattr(data, "rewards", None) is not None:
+        return data.states, data.rewards
+    return np.array([transition[0] for transition in data]), np.array([transition[2] for transition in data])
+
+def _summarize(chunks, sketch_k):
+    statistics = RewardStatistics()
+    sketch = QuantileSketch(k=sketch_k) if sketch_k is not None else None
+    for chunk in chunks:
+        rewards = _chunk_rewards(chunk)
+        statistics.update(rewards)
+        if sketch is not None:
+            sketch.update(rewards)
+    return statistics, sketch
+
+def _require_data(data):
+    if data is None:
+        raise ValueError("Quantile compensation needs the rewards or a quantile sketch; pass sketch_k to from_streams")
+    return data
+
+def _offset_reward(offset, state, action, reward):
+    return reward + offset
 
+def _chunk_rewards(chunk):
+    rewards = getattr(chunk, "rewards", None)
+    return chunk if rewards is None else rewards
@@ -0,0 +1,117 @@
+import numpy as np
+
+class RewardStatistics:
+    """
+    Accumulates reward statistics online, one chunk of rewards at a time. Mean and variance are maintained with Welford's algorithm in the pairwise form of Chan et al., so accumulators built from separate chunks or separate workers can be merged exactly and memory use does not depend on the number of rewards seen.
+
+    Rewards may be scalars or arrays; statistics are kept elementwise over the leading axis of each chunk.
+
+    Attributes:
+        count (int): The number of rewards accumulated.
+        mean (np.ndarray): The running mean of the rewards, or None before the first update.
+        min (np.ndarray): The smallest reward seen, or None before the first update.
+        max (np.ndarray): The largest reward seen, or None before the first update.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty RewardStatistics accumulator.
+        """
+        self.count = 0
+        self.mean = None
+        self.min = None
+        self.max = None
+        self._m2 = None  # Sum of squared deviations from the mean
+
+    def update(self, rewards):
+        """
+        Adds a chunk of rewards to the accumulator.
+
+        Args:
+            rewards (array-like): Rewards with a leading axis over transitions; a scalar counts as a single reward.
+
+        Returns:
+            RewardStatistics: The accumulator itself, to allow chaining.
+        """
+        rewards = np.asarray(rewards, dtype=float)
+        if rewards.ndim == 0:
+            rewards = rewards[np.newaxis]
+        if len(rewards) == 0:
+            return self
+        chunk_mean = rewards.mean(axis=0)
+        chunk_m2 = np.square(rewards - chunk_mean).sum(axis=0)
+        self._combine(len(rewards), chunk_mean, chunk_m2, rewards.min(axis=0), rewards.max(axis=0))
+        return self
+
+    def merge(self, other):
+        """
+        Merges the statistics of another accumulator into this one. The result is the same as if all rewards had been added to a single accumulator.
+
+        Args:
+            other (RewardStatistics): The accumulator to merge.
+
+        Returns:
+            RewardStatistics: The accumulator itself, to allow chaining.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other._m2, other.min, other.max)
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """
+        Builds an accumulator by consuming an iterable of reward chunks, such as a generator reading from disk.
+
+        Args:
+            chunks (iterable): Chunks of rewards accepted by update.
+
+        Returns:
+            RewardStatistics: The accumulated statistics.
+        """
+        statistics = cls()
+        for chunk in chunks:
+            statistics.update(chunk)
+        return statistics
+
+    @property
+    def variance(self):
+        """
+        Returns the population variance of the rewards, or None before the first update.
+        """
+        if self.count == 0:
+            return None
+        return self._m2 / self.count
+
+    @property
+    def std(self):
+        """
+        Returns the population standard deviation of the rewards, or None before the first update.
+        """
+        if self.count == 0:
+            return None
+        return np.sqrt(self.variance)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        if self.count == 0:
+            self.count = count
+            self.mean = np.array(mean, dtype=float)
+            self._m2 = np.array(m2, dtype=float)
+            self.min = np.array(minimum, dtype=float)
+            self.max = np.array(maximum, dtype=float)
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self._m2 = self._m2 + m2 + np.square(delta) * (self.count * count / total)
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+        self.count = total
+
+    def __str__(self):
+        """
+        Returns a string representation of the RewardStatistics.
+
+        Returns:
+            str: A summary of the count, mean and variance.
+        """
+        return f"RewardStatistics(Count: {self.count}, Mean: {self.mean}, Variance: {self.variance})"
@@ -1,4 +1,10 @@
+from functools import partial
+from time import perf_counter
 import numpy as np
+from policy import Policy
+from policy_pipeline import PolicyPipeline
+from trajectory_buffer import TrajectoryBuffer
+from trajectory_dataset import TrajectoryDatasetWriter
 
 class Robot:
     """
@@ -7,11 +13,14 @@ class Robot:
     Attributes:
         name (str): The name of the robot.
         environment (Environment): The environment in which the robot operates.
-        policy (callable): A function that takes a state and returns an action.
-        data (list): A list to store tuples of (state, action, reward) from task performances.
+        policy (callable): A function that takes a state and returns an action, typically a Policy.
+        data (TrajectoryBuffer): A columnar buffer storing the transitions of the last task performance.
+        profiler (Profiler): An optional profiler timing the policy, environment step, dynamics, reward and recording phases of each rollout.
+        exploration_noise (float): The standard deviation of the Gaussian noise added to every action.
+        rng (np.random.Generator): The random generator owned by this robot, used for exploration noise.
     """
 
-    def __init__(self, name, environment, initial_policy):
+    def __init__(self, name, environment, initial_policy, buffer_capacity=100, profiler=None, exploration_noise=0.0, seed=None):
         """
         Initializes a Robot with a given name, environment, and an initial policy.
 
@@ -19,46 +28,163 @@ class Robot:
             name (str): The name of the robot.
             environment (Environment): The environment object in which the robot will operate.
             initial_policy (callable): A function that defines the robot's decision-making strategy.
+            buffer_capacity (int): The number of transitions preallocated in the robot's trajectory buffer.
+            profiler (Profiler, optional): A profiler that accumulates per-phase timings of this robot's rollouts.
+            exploration_noise (float): The standard deviation of Gaussian noise added to the policy's actions; 0 follows the policy exactly.
+            seed (int or np.random.SeedSequence, optional): The seed of the robot's random generator.
         """
         self.name = name
         self.environment = environment
         self.policy = initial_policy
-        self.data = []
+        self.data = TrajectoryBuffer(capacity=buffer_capacity)
+        self.profiler = profiler
+        self.exploration_noise = exploration_noise
+        self.rng = np.random.default_rng(seed)
 
-    def perform_task(self):
+    def seed_episode(self, seed):
+        """
+        Derives fresh generators for the robot and its environment from an episode seed. Since both are reseeded, an episode depends only on its seed and the robot's policy, not on which worker runs it or on other robots sharing the environment.
+
+        Args:
+            seed (int or np.random.SeedSequence): The episode seed.
+        """
+        sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        robot_seed, environment_seed = sequence.spawn(2)
+        self.rng = np.random.default_rng(robot_seed)
+        self.environment.seed(environment_seed)
+
+    def perform_task(self, horizon=100, writer=None, seed=None):
         """
         Simulates the robot performing its task in the environment by following its policy.
         Collects data on states, actions, and rewards.
 
+        For in-place tasks the environment alternates between two preallocated states, and a Policy writes its actions into one preallocated array. Transitions are copied into the robot's preallocated trajectory buffer, so once the buffer is large enough for the horizon, steps do not allocate arrays.
+
+        Args:
+            horizon (int): The maximum number of steps; the episode ends earlier when the task reports a terminal state.
+            writer (TrajectoryDatasetWriter, optional): A dataset writer that receives every transition as it is produced, so the data outlives the next call to perform_task.
+            seed (int or np.random.SeedSequence, optional): An episode seed passed to seed_episode before the rollout.
+
         Returns:
-            list: A list of tuples containing (state, action, reward) for each step performed.
+            TrajectoryBuffer: The buffer holding the transitions of each step performed.
         """
+        if seed is not None:
+            self.seed_episode(seed)
         self.data.clear()  # Clear previous task data
-        state = self.environment.reset()  # Reset the environment and get the initial state
-        for _ in range(100):  # Perform 100 steps in the environment
-            action = self.policy(state)  # Determine action based on the current state and policy
-            next_state, reward = self.environment.step(action)  # Take the action in the environment
-            self.data.append((state, action, reward))  # Store the state, action, and reward
-            state = next_state  # Update the current state to the next state
+        profiler = self.profiler
+        for state, action, reward, next_state, done in self._transitions(horizon):
+            if profiler is None:
+                self._record(state, action, reward, next_state, done, writer)  # Store the transition
+            else:
+                _timed(profiler, "record", self._record, state, action, reward, next_state, done, writer)
         return self.data
 
+    def rollout(self, horizon=100, chunk_size=None, seed=None):
+        """
+        Streams a rollout of the robot's policy, producing transitions as they happen instead of collecting the whole episode first. The episode ends after horizon steps or as soon as the task reports a terminal state. Unlike perform_task, the robot's data buffer is left untouched. For in-place tasks the yielded states and actions are reused buffers; copy them to keep them beyond the next step, or use chunk_size.
+
+        Args:
+            horizon (int): The maximum number of steps.
+            chunk_size (int, optional): If given, transitions are grouped into trajectory buffers of this many transitions; the last chunk may be shorter.
+            seed (int or np.random.SeedSequence, optional): An episode seed passed to seed_episode before the rollout.
+
+        Returns:
+            generator: Yields (state, action, reward, next_state, done) tuples, or TrajectoryBuffer chunks when chunk_size is given. The done flag marks the last transition of the episode.
+        """
+        if seed is not None:
+            self.seed_episode(seed)
+        if chunk_size is None:
+            return self._transitions(horizon)
+        return self._chunks(horizon, chunk_size)
+
+    def _act(self, state):
+        action = self.policy(state)
+        if self.exploration_noise:
+            action = action + self.exploration_noise * self.rng.normal(size=np.shape(action))
+        return action
+
+    def _act_into(self, state, out, noise):
+        self.policy.act_into(state, out)
+        if self.exploration_noise:
+            self.rng.standard_normal(out=noise)
+            noise *= self.exploration_noise
+            out += noise
+        return out
+
+    def _transitions(self, horizon):
+        profiler = self.profiler
+        environment = self.environment
+        task = environment.task
+        if profiler is not None:
+            previous_profiler = environment.profiler
+            environment.profiler = profiler  # Attribute dynamics and reward timings to this robot
+        try:
+            state = environment.reset()  # Reset the environment and get the initial state
+            act = self._act
+            if task.inplace and isinstance(self.policy, Policy):
+                # Reuse one action array for the whole episode instead of allocating one per step
+                action_buffer = np.array(self.policy(state), dtype=float)
+                act = partial(self._act_into, out=action_buffer, noise=np.empty_like(action_buffer))
+            for step in range(horizon):
+                if profiler is None:
+                    action = act(state)  # Determine action based on the current state and policy
+                    next_state, reward = environment.step(action)  # Take the action in the environment
+                else:
+                    action = _timed(profiler, "policy", act, state)
+                    next_state, reward = _timed(profiler, "step", environment.step, action)
+                terminal = task.is_terminal(next_state)
+                yield state, action, reward, next_state, terminal or step == horizon - 1
+                if terminal:
+                    break
+                state = next_state  # Update the current state to the next state
+        finally:
+            if profiler is not None:
+                environment.profiler = previous_profiler
+
+    def _chunks(self, horizon, chunk_size):
+        chunk = TrajectoryBuffer(capacity=chunk_size)
+        for transition in self._transitions(horizon):
+            chunk.append(*transition)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = TrajectoryBuffer(capacity=chunk_size)  # Consumers may keep earlier chunks
+        if len(chunk):
+            yield chunk
+
+    def _record(self, state, action, reward, next_state, done, writer):
+        self.data.append(state, action, reward, next_state, done)
+        if writer is not None:
+            writer.append(state, action, reward, next_state, done)
+
+    def open_dataset(self, path, flush_every=4096):
+        """
+        Creates a writer for an on-disk trajectory dataset whose header records this robot and its task.
+
+        Args:
+            path (str): The directory of the dataset.
+            flush_every (int): The number of transitions collected in memory before they are appended to disk.
+
+        Returns:
+            TrajectoryDatasetWriter: A writer to pass to perform_task.
+        """
+        metadata = {"robot": self.name, "task": str(self.environment.task)}
+        return TrajectoryDatasetWriter(path, metadata=metadata, flush_every=flush_every)
+
     def adjust_policy(self, compensation_func):
         """
         Adjusts the robot's policy based on a compensation function provided externally,
-        typically for reward compensation adjustments.
+        typically for reward compensation adjustments. The robot receives a new policy; the previous one is left unchanged, since it may be shared with other robots.
 
         Args:
             compensation_func (callable): A function that modifies the action based on the state.
         """
-        original_policy = self.policy  # Keep the original policy
-
-        # Define a new policy that incorporates the compensation
-        def compensated_policy(state):
-            original_action = original_policy(state)  # Get the original action
-            compensated_action = compensation_func(state, original_action)  # Apply compensation
-            return compensated_action
-
-        self.policy = compensated_policy  # Set the new compensated policy
+        if isinstance(self.policy, Policy):
+            policy = self.policy.absorbed(compensation_func)
+            if policy is not None:
+                self.policy = policy  # Folded into the parameters of a copy
+                return
+        # Record the compensation as a pipeline stage instead of nesting another closure
+        self.policy = PolicyPipeline(self.policy).then(compensation_func)
 
     def __str__(self):
         """
@@ -69,3 +195,8 @@ class Robot:
         """
         return f"Robot(name={self.name})"
 
+def _timed(profiler, phase, func, *args):
+    start = perf_counter()
+    result = func(*args)
+    profiler.record(phase, perf_counter() - start)
+    return result
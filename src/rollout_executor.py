@@ -0,0 +1,145 @@
+import copy
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from profiling import Profiler
+from shared_trajectory import SharedTrajectoryHandle
+from trajectory_buffer import TrajectoryBuffer
+
+EXECUTORS = ("serial", "thread", "process")
+
+class RolloutSpec:
+    """
+    Describes a single rollout so that it can be executed by a worker. A spec carries the robot together with the keyword arguments for Robot.perform_task; for process workers the spec is pickled, so the robot's policy and the task's dynamics and reward function must be module-level functions or other picklable callables rather than lambdas. Detached and pickled specs leave the robot's collected data behind.
+
+    Attributes:
+        robot (Robot): The robot whose task performance is executed.
+        kwargs (dict): Keyword arguments passed to Robot.perform_task.
+        board (StatisticsBoard): An optional board to which the mean state of the rollout is published.
+        slot (int): The board slot owned by this rollout.
+    """
+
+    def __init__(self, robot, board=None, slot=None, **kwargs):
+        """
+        Initializes a RolloutSpec for the given robot.
+
+        Args:
+            robot (Robot): The robot whose task performance is executed.
+            board (StatisticsBoard, optional): A board to which the mean state of the rollout is published, so others can read it without receiving the trajectory. Process workers need a SharedStatisticsBoard.
+            slot (int, optional): The board slot owned by this rollout.
+            **kwargs: Keyword arguments passed to Robot.perform_task.
+        """
+        self.robot = robot
+        self.board = board
+        self.slot = slot
+        self.kwargs = kwargs
+
+    def run(self):
+        """
+        Executes the rollout on the spec's robot and publishes its mean state if the spec has a board.
+
+        Returns:
+            TrajectoryBuffer: The data collected by the robot.
+        """
+        data = self.robot.perform_task(**self.kwargs)
+        if self.board is not None and len(data):
+            self.board.publish(self.slot, np.mean(data.states, axis=0), count=len(data))
+        return data
+
+    def detached(self):
+        """
+        Returns a copy of the spec with its own copy of the robot and environment, so that concurrent rollouts of robots sharing an environment do not interfere. A task's TransitionCache is not copied; all detached copies share it.
+
+        Returns:
+            RolloutSpec: The detached spec.
+        """
+        return RolloutSpec(copy.deepcopy(_without_data(self.robot)), board=self.board, slot=self.slot, **self.kwargs)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["robot"] = _without_data(self.robot)  # Workers collect their own data
+        return state
+
+    def __str__(self):
+        return f"RolloutSpec(Robot: {self.robot.name})"
+
+def run_rollouts(specs, executor="serial", max_workers=None):
+    """
+    Executes rollouts and gathers their data in the order in which the specs were given. Serial rollouts run in place on each robot; thread and process rollouts run on detached copies, and the collected data and profiler measurements are stored back on the original robots. Process workers return their trajectories through shared memory rather than pickling them, and the gathered buffers are views of the shared blocks. If any rollout fails, the blocks exported by the others are unlinked before the error is raised.
+
+    Args:
+        specs (list of RolloutSpec): The rollouts to execute.
+        executor (str): One of "serial", "thread" or "process".
+        max_workers (int, optional): The maximum number of worker threads or processes.
+
+    Returns:
+        list: The data collected by each rollout, in submission order.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}, expected one of {EXECUTORS}")
+    if executor == "serial":
+        return [spec.run() for spec in specs]
+    if executor == "thread":
+        pool_class = ThreadPoolExecutor
+        worker_specs = [spec.detached() for spec in specs]
+        worker = _run_detached_spec
+    else:
+        pool_class = ProcessPoolExecutor
+        worker_specs = [_pickled(spec) for spec in specs]  # Pickled once here, so unpicklable specs fail early and clearly
+        worker = _run_pickled_spec
+    with pool_class(max_workers=max_workers) as pool:
+        futures = [pool.submit(worker, spec) for spec in worker_specs]
+    outcomes = _gather(futures)
+    results = []
+    for spec, (data, profiler) in zip(specs, outcomes):
+        if isinstance(data, SharedTrajectoryHandle):
+            data = data.attach()
+        spec.robot.data = data
+        if profiler is not None:
+            spec.robot.profiler.merge(profiler)
+        results.append(data)
+    return results
+
+def _without_data(robot):
+    """
+    Returns a shallow copy of a robot whose trajectory buffer is replaced by an empty one of the same configuration, so copies sent to workers do not carry the previous trajectory along.
+    """
+    robot = copy.copy(robot)
+    data = robot.data
+    robot.data = TrajectoryBuffer(capacity=data.capacity, overwrite=data.overwrite, growth_factor=data.growth_factor)
+    return robot
+
+def _run_detached_spec(spec):
+    robot = spec.robot
+    if robot.profiler is not None:
+        robot.profiler = Profiler()  # Only report the measurements of this rollout
+    data = spec.run()
+    return data, robot.profiler
+
+def _run_pickled_spec(payload):
+    data, profiler = _run_detached_spec(pickle.loads(payload))
+    return SharedTrajectoryHandle.export(data), profiler
+
+def _gather(futures):
+    """
+    Collects the outcomes of finished rollouts. If any rollout raised, the shared blocks exported by the successful ones are unlinked and the first error is raised.
+    """
+    outcomes = []
+    error = None
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as exception:
+            error = error or exception
+    if error is not None:
+        for data, _ in outcomes:
+            if isinstance(data, SharedTrajectoryHandle):
+                data.discard()
+        raise error
+    return outcomes
+
+def _pickled(spec):
+    try:
+        return pickle.dumps(spec)
+    except (pickle.PicklingError, AttributeError, TypeError) as error:
+        raise ValueError(f"{spec} cannot be sent to a worker process; use module-level functions instead of lambdas or local functions for policies and task callables") from error
@@ -0,0 +1,302 @@
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from trajectory_buffer import TrajectoryBuffer
+
+ALIGNMENT = 64  # Byte alignment of each column inside a shared block
+READ_TIMEOUT = 1.0  # Seconds a slot may stay locked before its writer is assumed to have died mid-update
+MAX_READ_BACKOFF = 0.001  # Longest pause between attempts to read a locked slot, in seconds
+
+class SharedTrajectoryHandle:
+    """
+    A picklable reference to a trajectory stored in a shared-memory block. A worker process exports its trajectory buffer into a block and returns only this small handle; the parent attaches to the block and wraps its columns in a TrajectoryBuffer without copying or unpickling any transition data.
+
+    Attaching unlinks the block immediately, so its memory is released as soon as the attached buffer and all views of its columns are gone, and a handle can be attached only once.
+
+    Attributes:
+        name (str): The name of the shared-memory block, or None for an empty trajectory.
+        length (int): The number of transitions in the trajectory.
+        layout (list): For each column, its name, dtype string, shape and byte offset in the block.
+    """
+
+    def __init__(self, name, length, layout):
+        """
+        Initializes a SharedTrajectoryHandle.
+
+        Args:
+            name (str): The name of the shared-memory block, or None for an empty trajectory.
+            length (int): The number of transitions in the trajectory.
+            layout (list): For each column, its name, dtype string, shape and byte offset in the block.
+        """
+        self.name = name
+        self.length = length
+        self.layout = layout
+
+    @classmethod
+    def export(cls, buffer):
+        """
+        Copies a trajectory buffer into a new shared-memory block, in chronological order. The block is left for the receiving process to attach and unlink; the exporting process stops tracking it, so its resource tracker neither reports it as leaked nor unlinks it when the process exits.
+
+        Args:
+            buffer (TrajectoryBuffer): The trajectory to export.
+
+        Returns:
+            SharedTrajectoryHandle: A handle to the exported trajectory.
+        """
+        if len(buffer) == 0:
+            return cls(None, 0, [])
+        columns = [(name, buffer.ordered_column(name)) for name in TrajectoryBuffer.COLUMNS]
+        layout = []
+        size = 0
+        for name, column in columns:
+            layout.append((name, column.dtype.str, column.shape, size))
+            size += _aligned(column.nbytes)
+        block = _SharedBlock(_create_untracked(size))  # Ownership passes to the process that attaches the handle
+        raw = np.asarray(block)
+        for (name, column), (_, _, shape, offset) in zip(columns, layout):
+            raw[offset:offset + column.nbytes].view(column.dtype).reshape(shape)[...] = column
+        return cls(block.name, len(buffer), layout)
+
+    def attach(self):
+        """
+        Attaches to the exported block, unlinks it and wraps its columns in a TrajectoryBuffer.
+
+        Returns:
+            TrajectoryBuffer: A buffer whose columns are views of the shared block.
+        """
+        if self.name is None:
+            return TrajectoryBuffer()
+        shm = shared_memory.SharedMemory(name=self.name)
+        shm.unlink()  # The mapping stays valid; the memory is freed once the last view is gone
+        raw = np.asarray(_SharedBlock(shm))
+        columns = {}
+        for name, dtype, shape, offset in self.layout:
+            dtype = np.dtype(dtype)
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            columns[name] = raw[offset:offset + nbytes].view(dtype).reshape(shape)
+        return TrajectoryBuffer.from_columns(columns)
+
+    def discard(self):
+        """
+        Unlinks the exported block without attaching it, for handles whose trajectories are no longer needed.
+        """
+        if self.name is None:
+            return
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return  # Already attached or discarded
+        shm.close()
+        shm.unlink()
+
+    def __str__(self):
+        return f"SharedTrajectoryHandle(Block: {self.name}, Transitions: {self.length})"
+
+class StatisticsBoard:
+    """
+    A table of per-slot statistics that rollouts publish to and readers snapshot without exchanging trajectories. Each slot holds a value array, a count and a version counter. The board lives in process memory and serves serial and threaded rollouts; SharedStatisticsBoard places the same table in shared memory for worker processes.
+
+    Updates follow a sequence-lock protocol: a writer makes the slot's version odd, writes the value and count, and makes the version even again. Readers copy a slot and retry until they see the same even version before and after the copy, so they always observe a consistent snapshot without blocking writers. Every slot must have a single writer at a time; a lock serializes writers that share slots.
+
+    Attributes:
+        slots (int): The number of slots.
+        shape (tuple): The shape of the value stored in each slot.
+        lock (Lock): An optional lock serializing writers.
+    """
+
+    def __init__(self, slots, shape=(), lock=None):
+        """
+        Creates a board with all versions and counts at zero.
+
+        Args:
+            slots (int): The number of slots, typically one per robot.
+            shape (tuple): The shape of the value stored in each slot.
+            lock (Lock, optional): A lock serializing writers; not needed when every slot has a single writer.
+        """
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.lock = lock
+        self._versions = np.zeros(slots, dtype=np.int64)
+        self._counts = np.zeros(slots, dtype=np.int64)
+        self._values = np.zeros((slots,) + self.shape)
+
+    def publish(self, slot, value, count=1):
+        """
+        Writes a value and its count to a slot.
+
+        Args:
+            slot (int): The slot to write.
+            value (array-like): The value, broadcastable to the board's shape.
+            count (int): The number of samples summarized by the value.
+        """
+        if self.lock is not None:
+            with self.lock:
+                self._write(slot, value, count)
+        else:
+            self._write(slot, value, count)
+
+    def read(self, slot, timeout=READ_TIMEOUT):
+        """
+        Returns a consistent copy of a slot. While a write is in progress the reader yields, backing off up to MAX_READ_BACKOFF between attempts, so a descheduled writer process or a writer thread waiting for the GIL can finish.
+
+        Args:
+            slot (int): The slot to read.
+            timeout (float): The number of seconds to wait for a write in progress before giving up.
+
+        Returns:
+            tuple: The value, its count and the slot's version.
+
+        Raises:
+            RuntimeError: If the slot stays locked for longer than timeout.
+        """
+        versions = self._versions
+        deadline = None
+        pause = 0.0
+        while True:
+            version = int(versions[slot])
+            if version % 2 == 0:
+                value = self._values[slot].copy()
+                count = int(self._counts[slot])
+                if int(versions[slot]) == version:
+                    return value, count, version
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise RuntimeError(f"Slot {slot} of {self} stayed locked for {timeout} seconds; a writer may have died during an update")
+            time.sleep(pause)  # sleep(0) yields the GIL and the processor to the writer
+            pause = min(MAX_READ_BACKOFF, 2 * pause or 1e-6)
+
+    def snapshot(self):
+        """
+        Returns consistent copies of all slots.
+
+        Returns:
+            tuple: The values with one row per slot, the counts and the versions.
+        """
+        rows = [self.read(slot) for slot in range(self.slots)]
+        values = np.array([row[0] for row in rows]).reshape((self.slots,) + self.shape)
+        return values, np.array([row[1] for row in rows]), np.array([row[2] for row in rows])
+
+    def mean(self):
+        """
+        Averages the values of all slots that have been published to.
+
+        Returns:
+            np.ndarray: The mean value, or None if nothing has been published.
+        """
+        values, counts, _ = self.snapshot()
+        published = counts > 0
+        if not np.any(published):
+            return None
+        return np.mean(values[published], axis=0)
+
+    def close(self):
+        """
+        Releases the board's storage. An in-process board has nothing to release.
+        """
+
+    def _write(self, slot, value, count):
+        versions = self._versions
+        versions[slot] += 1  # Odd: readers retry until the write completes
+        self._values[slot] = value
+        self._counts[slot] = count
+        versions[slot] += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self):
+        return f"{type(self).__name__}(Slots: {self.slots}, Shape: {self.shape})"
+
+class SharedStatisticsBoard(StatisticsBoard):
+    """
+    A StatisticsBoard stored in a shared-memory block, so that worker processes can publish to it and the parent can read it without copying trajectories between processes.
+
+    The board is picklable: unpickling attaches to the same block. Only the process that created the board unlinks it.
+    """
+
+    def __init__(self, slots, shape=(), lock=None):
+        """
+        Creates a board in a new shared-memory block, with all versions and counts at zero.
+
+        Args:
+            slots (int): The number of slots, typically one per robot.
+            shape (tuple): The shape of the value stored in each slot.
+            lock (Lock, optional): A lock serializing writers, such as one from a multiprocessing manager; not needed when every slot has a single writer.
+        """
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.lock = lock
+        self._owner = True
+        self._attach(shared_memory.SharedMemory(create=True, size=self._size()))
+        self._versions[...] = 0
+        self._counts[...] = 0
+
+    def close(self):
+        """
+        Detaches this process from the board and, in the creating process, unlinks the block.
+        """
+        if self._block is None:
+            return
+        if self._owner:
+            self._block.unlink()
+        self._versions = self._counts = self._values = self._block = None
+
+    def _size(self):
+        values = self.slots * 8 * int(np.prod(self.shape))
+        return 2 * _aligned(self.slots * 8) + max(values, 1)
+
+    def _attach(self, shm):
+        self._block = _SharedBlock(shm)
+        raw = np.asarray(self._block)
+        header = _aligned(self.slots * 8)
+        self._versions = raw[:self.slots * 8].view(np.int64)
+        self._counts = raw[header:header + self.slots * 8].view(np.int64)
+        values = self.slots * int(np.prod(self.shape))
+        self._values = raw[2 * header:2 * header + 8 * values].view(np.float64).reshape((self.slots,) + self.shape)
+
+    def __getstate__(self):
+        return {"name": self._block.name, "slots": self.slots, "shape": self.shape, "lock": self.lock}
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.shape = state["shape"]
+        self.lock = state["lock"]
+        self._owner = False
+        self._attach(shared_memory.SharedMemory(name=state["name"]))
+
+class _SharedBlock:
+    """
+    Owns a shared-memory mapping and exposes it as a flat byte array. Arrays created from the block keep it alive through their base, so the mapping is closed only after the last view is gone.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self.name = shm.name
+        address = np.frombuffer(shm.buf, dtype=np.uint8).__array_interface__["data"][0]  # Temporary export, released right away
+        self.__array_interface__ = {"shape": (shm.size,), "typestr": "|u1", "data": (address, False), "version": 3}
+
+    def unlink(self):
+        self._shm.unlink()
+
+    def __del__(self):
+        self._shm.close()
+
+def _create_untracked(size):
+    """
+    Creates a shared-memory block that this process's resource tracker does not own, so the tracker neither unlinks it nor warns about a leak when the process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)  # Python 3.13 and later
+    except TypeError:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        if os.name == "posix":
+            resource_tracker.unregister("/" + shm.name, "shared_memory")  # The tracker knows POSIX blocks by their leading-slash name
+        return shm
+
+def _aligned(nbytes):
+    return -(-nbytes // ALIGNMENT) * ALIGNMENT
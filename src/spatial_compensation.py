@@ -0,0 +1,143 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+class SpatialRewardIndex:
+    """
+    Indexes the states of a dataset in a KD-tree and estimates the reward at arbitrary query states from their nearest neighbors. Queries are batched and cost O(k log n) per state, so the index stays fast as datasets grow to millions of transitions.
+
+    Attributes:
+        tree (cKDTree): The KD-tree over the flattened dataset states.
+        rewards (np.ndarray): The rewards of the indexed transitions, one row per state.
+        k (int): The number of neighbors used per estimate.
+        bandwidth (float): The width of the Gaussian kernel weighting the neighbors, or None for a plain average.
+    """
+
+    def __init__(self, states, rewards, k=8, bandwidth=None, leafsize=32):
+        """
+        Builds the index over a dataset.
+
+        Args:
+            states (array-like): The dataset states with a leading axis over transitions.
+            rewards (array-like): The rewards observed in those states.
+            k (int): The number of neighbors used per estimate.
+            bandwidth (float, optional): The width of a Gaussian kernel on neighbor distances; if None, neighbors are averaged uniformly.
+            leafsize (int): The leaf size of the KD-tree.
+        """
+        states = np.asarray(states, dtype=float)
+        rewards = np.asarray(rewards, dtype=float)
+        if len(states) == 0:
+            raise ValueError("Cannot build a SpatialRewardIndex from an empty dataset")
+        if len(states) != len(rewards):
+            raise ValueError(f"Got {len(states)} states but {len(rewards)} rewards")
+        self.tree = cKDTree(states.reshape(len(states), -1), leafsize=leafsize)
+        self.rewards = rewards
+        self.k = min(k, len(states))
+        self.bandwidth = bandwidth
+
+    def estimate(self, states):
+        """
+        Estimates the rewards at one or many query states.
+
+        Args:
+            states (array-like): A single state or a batch of states with a leading axis.
+
+        Returns:
+            np.ndarray: The estimated reward for a single state, or one row per state for a batch.
+        """
+        points, single = self._points(states)
+        distances, indices = self.tree.query(points, k=self.k)
+        if self.k == 1:
+            distances, indices = distances[:, np.newaxis], indices[:, np.newaxis]
+        if self.bandwidth is None:
+            weights = np.full(distances.shape, 1.0 / self.k)
+        else:
+            weights = np.exp(-0.5 * np.square(distances / self.bandwidth))
+            totals = weights.sum(axis=1, keepdims=True)
+            weights = np.where(totals > 0, weights / np.where(totals > 0, totals, 1.0), 1.0 / self.k)  # Fall back to a plain average far from all data
+        neighbor_rewards = self.rewards[indices]
+        weights = weights.reshape(weights.shape + (1,) * (neighbor_rewards.ndim - 2))
+        estimates = (weights * neighbor_rewards).sum(axis=1)
+        return estimates[0] if single else estimates
+
+    def _points(self, states):
+        points = np.asarray(states, dtype=float)
+        dim = self.tree.m
+        single = points.ndim == 0 if dim == 1 else points.size == dim and points.ndim == 1
+        return points.reshape(-1, dim), single
+
+    def __len__(self):
+        return self.tree.n
+
+    def __str__(self):
+        return f"SpatialRewardIndex(States: {self.tree.n}, Dimension: {self.tree.m}, k: {self.k}, Bandwidth: {self.bandwidth})"
+
+class StateConditionedCompensation:
+    """
+    A reward compensation that depends on the state. Source and target rewards are each estimated at the target state from a spatial index over the respective dataset, and the compensation is the scaled difference scale * (r_source(s) - r_target(s)). This replaces the single global offset when the dynamics differ across the state space.
+
+    Instances are picklable and can be used both as a reward compensation function (state, action, reward) and, through adjust_action, as a policy adjustment stage.
+
+    Attributes:
+        source_index (SpatialRewardIndex): The index over the source states and rewards.
+        target_index (SpatialRewardIndex): The index over the target states and rewards.
+        scale (float): The scaling factor applied to the reward difference.
+    """
+
+    def __init__(self, source_states, source_rewards, target_states, target_rewards, k=8, bandwidth=None, scale=1.0):
+        """
+        Builds the source and target indices.
+
+        Args:
+            source_states (array-like): The states of the source dataset.
+            source_rewards (array-like): The rewards of the source dataset.
+            target_states (array-like): The states of the target dataset.
+            target_rewards (array-like): The rewards of the target dataset.
+            k (int): The number of neighbors used per estimate.
+            bandwidth (float, optional): The width of a Gaussian kernel on neighbor distances; if None, neighbors are averaged uniformly.
+            scale (float): The scaling factor applied to the reward difference.
+        """
+        self.source_index = SpatialRewardIndex(source_states, source_rewards, k=k, bandwidth=bandwidth)
+        self.target_index = SpatialRewardIndex(target_states, target_rewards, k=k, bandwidth=bandwidth)
+        self.scale = scale
+
+    def difference(self, states):
+        """
+        Computes the reward compensation at one or many target states.
+
+        Args:
+            states (array-like): A single state or a batch of states with a leading axis.
+
+        Returns:
+            np.ndarray: The compensation for a single state, or one row per state for a batch.
+        """
+        return self.scale * (self.source_index.estimate(states) - self.target_index.estimate(states))
+
+    def __call__(self, state, action, reward):
+        """
+        Compensates a reward observed in a state.
+
+        Args:
+            state (any): The state in which the reward was observed.
+            action (any): The action taken; unused.
+            reward (any): The reward to compensate.
+
+        Returns:
+            any: The compensated reward.
+        """
+        return reward + self.difference(state)
+
+    def adjust_action(self, state, action):
+        """
+        Offsets an action by the compensation at its state, for use as a policy adjustment stage.
+
+        Args:
+            state (any): The state in which the action is taken.
+            action (any): The action to adjust.
+
+        Returns:
+            any: The adjusted action.
+        """
+        return action + self.difference(state)
+
+    def __str__(self):
+        return f"StateConditionedCompensation(Source: {self.source_index}, Target: {self.target_index}, Scale: {self.scale})"
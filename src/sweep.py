@@ -0,0 +1,346 @@
+import hashlib
+import itertools
+import json
+import os
+import types
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+from environment import Environment
+from experiment import Experiment
+from policy import Policy
+from robot import Robot
+from rollout_executor import EXECUTORS
+
+CACHE_FORMAT_VERSION = 2  # Bump to invalidate cached cells when the cell computation changes
+
+class TransferPair:
+    """
+    A source and target robot for a reward-transfer sweep. Both robots are built on tasks from the sweep's task factory; the pair's parameter overrides are merged into every grid cell, so a pair can, for example, pin the source to nominal dynamics while the target's dynamics are swept.
+
+    Attributes:
+        name (str): The name of the pair, used in the sweep results.
+        source_policy (callable): The policy of the source robot.
+        target_policy (callable): The initial policy of the target robot.
+        source_params (dict): Task parameters overriding the grid cell for the source robot.
+        target_params (dict): Task parameters overriding the grid cell for the target robot.
+    """
+
+    def __init__(self, name, source_policy, target_policy, source_params=None, target_params=None):
+        """
+        Initializes a TransferPair.
+
+        Args:
+            name (str): The name of the pair.
+            source_policy (callable): The policy of the source robot.
+            target_policy (callable): The initial policy of the target robot. Adjusting a robot replaces its policy, so the policy is never modified by a sweep.
+            source_params (dict, optional): Task parameters overriding the grid cell for the source robot.
+            target_params (dict, optional): Task parameters overriding the grid cell for the target robot.
+        """
+        self.name = name
+        self.source_policy = source_policy
+        self.target_policy = target_policy
+        self.source_params = dict(source_params or {})
+        self.target_params = dict(target_params or {})
+
+    def __str__(self):
+        return f"TransferPair(Name: {self.name})"
+
+class SweepCell:
+    """
+    One unit of work of a sweep: a reward-transfer run for one pair under one combination of task parameters and one seed.
+
+    Attributes:
+        params (dict): The task parameters of the grid cell.
+        pair (TransferPair): The source and target robots.
+        seed (int): The experiment seed.
+        sweep (Sweep): The sweep the cell belongs to, providing the task factory and run settings.
+    """
+
+    def __init__(self, params, pair, seed, sweep):
+        self.params = params
+        self.pair = pair
+        self.seed = seed
+        self.sweep = sweep
+
+    def config(self):
+        """
+        Returns everything that determines the cell's result, in a form that can be content-addressed.
+
+        Returns:
+            dict: The cell configuration.
+        """
+        sweep = self.sweep
+        return {
+            "version": CACHE_FORMAT_VERSION,
+            "task_factory": sweep.task_factory,
+            "source_params": dict(self.params, **self.pair.source_params),
+            "target_params": dict(self.params, **self.pair.target_params),
+            "source_policy": self.pair.source_policy,
+            "target_policy": self.pair.target_policy,
+            "seed": self.seed,
+            "horizon": sweep.horizon,
+            "environment_kwargs": sweep.environment_kwargs,
+            "robot_kwargs": sweep.robot_kwargs,
+            "transfer_kwargs": sweep.transfer_kwargs,
+        }
+
+    def key(self):
+        """
+        Returns the content hash of the cell's configuration.
+
+        Returns:
+            str: A hexadecimal SHA-256 digest.
+        """
+        return config_hash(self.config())
+
+    def run(self):
+        """
+        Builds fresh tasks, environments and robots for the cell and runs the reward transfer.
+
+        Returns:
+            dict: The JSON-serializable result of the cell.
+        """
+        sweep = self.sweep
+        config = self.config()
+        robots = []
+        for role in ("source", "target"):
+            task = sweep.task_factory(**config[f"{role}_params"])
+            environment = Environment(task, **sweep.environment_kwargs)
+            robots.append(Robot(f"{self.pair.name}-{role}", environment, config[f"{role}_policy"], **sweep.robot_kwargs))
+        source, target = robots
+        experiment = Experiment(robots, seed=self.seed)
+        transfer = experiment.run_reward_transfer(source, target, horizon=sweep.horizon, **sweep.transfer_kwargs)
+        history = transfer["history"]
+        return _jsonable({
+            "pair": self.pair.name,
+            "params": self.params,
+            "seed": self.seed,
+            "iterations": transfer["iterations"],
+            "converged": transfer["converged"],
+            "reason": transfer["reason"],
+            "compensation_factor": transfer["compensation_factor"],
+            "source_mean": experiment.source_statistics[source.name].mean,
+            "target_mean": history[-1]["target_mean"] if history else None,
+            "gap_history": [entry["gap_magnitude"] for entry in history],
+        })
+
+    def __str__(self):
+        return f"SweepCell(Pair: {self.pair.name}, Params: {self.params}, Seed: {self.seed})"
+
+class Sweep:
+    """
+    Evaluates reward transfer over a grid of task parameters, a set of transfer pairs and a set of seeds. Every combination is a cell; cells are scheduled across the configured executor and each cell's result is stored on disk under the content hash of its configuration, so re-running a sweep, or a larger sweep sharing cells with an earlier one, only computes the new cells.
+
+    Content hashing requires stable identities for everything that enters a cell: the task factory and callable policies must be module-level functions, and Policy objects are hashed by their class and parameters. These are also the requirements of the process executor. Functions are hashed by their code as well as their name, so editing a task factory or a policy function invalidates its cached cells; edits to other functions it calls are not detected, and call for a bump of CACHE_FORMAT_VERSION or a fresh cache directory.
+
+    Attributes:
+        task_factory (callable): A function taking task parameters as keyword arguments and returning a Task.
+        grid (dict): The values of each task parameter; the sweep covers their Cartesian product.
+        pairs (list of TransferPair): The source and target robots.
+        seeds (list of int): The experiment seeds of each grid cell and pair.
+        horizon (int): Maximum number of steps per rollout.
+        cache_dir (str): The directory holding cached cell results, or None to disable caching.
+        executor (str): How cells are executed: "serial", "thread" or "process".
+        max_workers (int): The maximum number of workers for the thread and process executors.
+        environment_kwargs (dict): Keyword arguments for every Environment.
+        robot_kwargs (dict): Keyword arguments for every Robot.
+        transfer_kwargs (dict): Keyword arguments for Experiment.run_reward_transfer.
+        cached (int): The number of cells loaded from the cache by the last run.
+        computed (int): The number of cells computed and stored by the last run.
+    """
+
+    def __init__(self, task_factory, grid, pairs, seeds=(0,), horizon=100, cache_dir=None, executor="serial", max_workers=None,
+                 environment_kwargs=None, robot_kwargs=None, transfer_kwargs=None):
+        """
+        Initializes a Sweep.
+
+        Args:
+            task_factory (callable): A function taking task parameters as keyword arguments and returning a Task.
+            grid (dict): Maps each task parameter name to the list of values to sweep.
+            pairs (list of TransferPair): The source and target robots.
+            seeds (iterable of int): The experiment seeds of each grid cell and pair.
+            horizon (int): Maximum number of steps per rollout.
+            cache_dir (str, optional): A directory for cached cell results; created if missing.
+            executor (str): How cells are executed: "serial", "thread" or "process".
+            max_workers (int, optional): The maximum number of workers.
+            environment_kwargs (dict, optional): Keyword arguments for every Environment, such as initial_state_noise.
+            robot_kwargs (dict, optional): Keyword arguments for every Robot, such as exploration_noise.
+            transfer_kwargs (dict, optional): Keyword arguments for Experiment.run_reward_transfer, such as max_iters or tol.
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}, expected one of {EXECUTORS}")
+        self.task_factory = task_factory
+        self.grid = {name: list(values) for name, values in grid.items()}
+        self.pairs = list(pairs)
+        self.seeds = list(seeds)
+        self.horizon = horizon
+        self.cache_dir = cache_dir
+        self.executor = executor
+        self.max_workers = max_workers
+        self.environment_kwargs = dict(environment_kwargs or {})
+        self.robot_kwargs = dict(robot_kwargs or {})
+        self.transfer_kwargs = dict(transfer_kwargs or {})
+        self.cached = 0
+        self.computed = 0
+
+    def cells(self):
+        """
+        Lists the cells of the sweep, iterating the grid in row-major order, then the pairs, then the seeds.
+
+        Returns:
+            list of SweepCell: The cells.
+        """
+        names = list(self.grid)
+        return [SweepCell(dict(zip(names, values)), pair, seed, self)
+                for values in itertools.product(*(self.grid[name] for name in names))
+                for pair in self.pairs
+                for seed in self.seeds]
+
+    def run(self):
+        """
+        Computes the results of all cells, loading cached cells from disk and storing each newly computed cell as soon as it finishes, so a failing cell or an interrupted sweep keeps the cells completed so far.
+
+        Returns:
+            list of dict: The result of each cell, in the order of cells().
+
+        Raises:
+            Exception: The first error raised by a cell, after every other cell has finished and been stored.
+        """
+        cells = self.cells()
+        results = [None] * len(cells)
+        keys = [cell.key() for cell in cells] if self.cache_dir is not None else [None] * len(cells)
+        pending = []
+        for index, key in enumerate(keys):
+            cached = self._load(key)
+            if cached is None:
+                pending.append(index)
+            else:
+                results[index] = cached
+        self.cached = len(cells) - len(pending)
+        self.computed = 0
+        error = None
+        for index, result, cell_error in self._compute(cells, pending):
+            if cell_error is not None:
+                error = error or cell_error
+                continue
+            results[index] = result
+            self._store(keys[index], result)
+            self.computed += 1
+        if error is not None:
+            raise error
+        return results
+
+    def _compute(self, cells, pending):
+        """
+        Runs the pending cells and yields (index, result, error) for each cell as it finishes.
+        """
+        if self.executor == "serial" or len(pending) <= 1:
+            for index in pending:
+                try:
+                    yield index, cells[index].run(), None
+                except Exception as error:
+                    yield index, None, error
+            return
+        pool_class = ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+        with pool_class(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(_run_cell, cells[index]): index for index in pending}
+            for future in as_completed(futures):
+                error = future.exception()
+                yield futures[future], None if error is not None else future.result(), error
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load(self, key):
+        if key is None:
+            return None
+        try:
+            with open(self._path(key)) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None  # Missing or partially written cells are recomputed
+
+    def _store(self, key, result):
+        if key is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump(result, handle)
+        os.replace(temporary, path)  # Readers never see a partially written cell
+
+    def __str__(self):
+        return f"Sweep(Grid: {self.grid}, Pairs: {len(self.pairs)}, Seeds: {len(self.seeds)}, Executor: {self.executor})"
+
+def config_hash(config):
+    """
+    Computes a content hash of a configuration. Numbers, strings, lists, dicts and NumPy arrays are hashed by value, functions by their module, qualified name, bytecode, constants, referenced names, defaults and closure values, other callables by their module and qualified name, and Policy objects by their class and parameters.
+
+    Args:
+        config (any): The configuration to hash.
+
+    Returns:
+        str: A hexadecimal SHA-256 digest.
+    """
+    encoded = json.dumps(_canonical(config), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def _canonical(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return {"array": value.dtype.str, "shape": list(value.shape), "sha256": hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, Policy):
+        return {"policy": _qualified_name(type(value)), "params": [_canonical(param) for param in value.params()]}
+    if isinstance(value, types.FunctionType):
+        closure = [cell.cell_contents for cell in value.__closure__ or ()]
+        return {"callable": _qualified_name(value), "code": _code_digest(value.__code__),
+                "defaults": _canonical(value.__defaults__), "kwdefaults": _canonical(value.__kwdefaults__),
+                "closure": _canonical(closure)}
+    if callable(value) and hasattr(value, "__qualname__"):
+        return {"callable": _qualified_name(value)}
+    raise ValueError(f"Cannot content-address {value!r}; use primitives, arrays, Policy objects or module-level functions")
+
+def _qualified_name(value):
+    name = f"{value.__module__}.{value.__qualname__}"
+    if "<lambda>" in name or "<locals>" in name:
+        raise ValueError(f"{name} has no stable identity; use a module-level function so sweep cells can be cached")
+    return name
+
+def _code_digest(code):
+    """
+    Hashes the behavior of a code object: its bytecode, the globals and attributes it refers to and its constants, including nested functions.
+    """
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr((code.co_names, code.co_varnames, code.co_freevars)).encode())
+    for constant in code.co_consts:
+        digest.update(_constant_repr(constant).encode())
+    return digest.hexdigest()
+
+def _constant_repr(constant):
+    if isinstance(constant, types.CodeType):
+        return _code_digest(constant)
+    if isinstance(constant, tuple):
+        return "(" + ",".join(_constant_repr(item) for item in constant) + ")"
+    if isinstance(constant, frozenset):
+        return "frozenset(" + ",".join(sorted(_constant_repr(item) for item in constant)) + ")"  # Set order varies with hash randomization
+    return repr(constant)
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+def _run_cell(cell):
+    return cell.run()
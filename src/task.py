@@ -1,3 +1,5 @@
+import numpy as np
+
 class Task:
     """
     Represents a specific task with defined dynamics and a reward function.
@@ -5,18 +7,35 @@ class Task:
     Attributes:
         dynamics (callable): A function that takes a state and an action and returns the next state.
         reward_function (callable): A function that takes a state and an action and returns a reward.
+        vectorized (bool): Whether dynamics and reward_function accept states and actions with a leading batch axis.
+        termination (callable): An optional predicate that takes a state and returns True when the episode is over.
+        cache (TransitionCache): An optional cache memoizing deterministic dynamics and rewards.
+        inplace (bool): Whether dynamics accepts an out keyword argument and writes the next state into it.
     """
 
-    def __init__(self, dynamics, reward_function):
+    def __init__(self, dynamics, reward_function, vectorized=False, example_state=None, example_action=None, termination=None, cache=None, inplace=False):
         """
         Initializes a Task with specified dynamics and reward function.
 
         Args:
             dynamics (callable): The function defining how the state changes in response to an action.
             reward_function (callable): The function that calculates the reward based on state and action.
+            vectorized (bool): Declares that both callables operate on a leading batch axis, so batches can be simulated in a single call.
+            example_state (any, optional): A single state used to validate the vectorized callables against the scalar path on construction.
+            example_action (any, optional): A single action used together with example_state for the validation.
+            termination (callable, optional): A predicate on states that ends an episode early when it returns True.
+            cache (TransitionCache, optional): A cache for the results of compute_next_state and compute_reward. Only use it with deterministic dynamics and reward functions; it is shared by every environment and robot using this task, including the copies run by thread workers, while worker processes start from an empty cache.
+            inplace (bool): Declares that dynamics can be called as dynamics(state, action, out=array) and writes the next state into the preallocated array instead of allocating a new one. The out array never aliases state.
         """
         self.dynamics = dynamics
         self.reward_function = reward_function
+        self.vectorized = vectorized
+        self.termination = termination
+        self.cache = cache
+        self.inplace = inplace
+        self._batch_validated = False
+        if vectorized and example_state is not None and example_action is not None:
+            self.validate_batch(example_state, example_action)
 
     def compute_reward(self, state, action):
         """
@@ -29,8 +48,34 @@ class Task:
         Returns:
             float: The reward resulting from the given state and action.
         """
+        if self.cache is not None:
+            return self.cache.get_or_compute("reward", state, action, self.reward_function)
         return self.reward_function(state, action)
 
+    def compute_next_state(self, state, action, out=None):
+        """
+        Computes the next state for a given state and action using the task's dynamics.
+
+        Args:
+            state (any): The current state in the task environment.
+            action (any): The action taken in the current state.
+            out (np.ndarray, optional): A preallocated array receiving the next state. In-place tasks write into it directly; for other tasks, and for cached results, the next state is copied into it.
+
+        Returns:
+            any: The state reached after taking the action; out if it was given.
+        """
+        if out is not None and self.inplace and self.cache is None:
+            self.dynamics(state, action, out=out)
+            return out
+        if self.cache is not None:
+            next_state = self.cache.get_or_compute("dynamics", state, action, self.dynamics)
+        else:
+            next_state = self.dynamics(state, action)
+        if out is None:
+            return next_state
+        out[...] = next_state
+        return out
+
     def simulate_step(self, state, action):
         """
         Simulates a single step in the task by applying the dynamics to the current state and action.
@@ -42,10 +87,97 @@ class Task:
         Returns:
             tuple: A tuple containing the next state and the reward for the step.
         """
-        next_state = self.dynamics(state, action)
+        next_state = self.compute_next_state(state, action)
         reward = self.compute_reward(state, action)
         return next_state, reward
 
+    def is_terminal(self, state):
+        """
+        Checks whether a state ends the episode according to the task's termination predicate.
+
+        Args:
+            state (any): The state reached in the task environment.
+
+        Returns:
+            bool: True if the episode is over; always False for tasks without a termination predicate.
+        """
+        if self.termination is None:
+            return False
+        return bool(self.termination(state))
+
+    def simulate_batch(self, states, actions):
+        """
+        Simulates one step for a batch of states and actions. Vectorized tasks evaluate the whole batch in a single call, while scalar tasks fall back to a loop over the batch.
+
+        Args:
+            states (array-like): The current states, with a leading batch axis.
+            actions (array-like): The actions taken in each state, with the same leading batch axis.
+
+        Returns:
+            tuple: A tuple containing the next states and the rewards, both with the leading batch axis.
+        """
+        states, actions = self._check_batch(states, actions)
+        if not self.vectorized:
+            return self._simulate_loop(states, actions)
+        if not self._batch_validated:
+            self.validate_batch(states[0], actions[0])
+        return np.asarray(self.dynamics(states, actions)), np.asarray(self.reward_function(states, actions))
+
+    def compute_reward_batch(self, states, actions):
+        """
+        Computes the rewards for a batch of states and actions, falling back to a loop over the batch for scalar tasks.
+
+        Args:
+            states (array-like): The current states, with a leading batch axis.
+            actions (array-like): The actions taken in each state, with the same leading batch axis.
+
+        Returns:
+            np.ndarray: The rewards for the batch.
+        """
+        states, actions = self._check_batch(states, actions)
+        if not self.vectorized:
+            return np.array([self.reward_function(s, a) for s, a in zip(states, actions)])
+        if not self._batch_validated:
+            self.validate_batch(states[0], actions[0])
+        return np.asarray(self.reward_function(states, actions))
+
+    def validate_batch(self, state, action):
+        """
+        Checks that the vectorized dynamics and reward function agree with the scalar path. A batch of two copies of the given state and action is evaluated in one call and each row is compared with the result for the single state and action.
+
+        Args:
+            state (any): A single state in the task environment.
+            action (any): A single action taken in that state.
+
+        Raises:
+            ValueError: If the batched results do not have a leading batch axis or differ from the scalar results.
+        """
+        expected_state, expected_reward = self.simulate_step(state, action)
+        states = np.stack([np.asarray(state)] * 2)
+        actions = np.stack([np.asarray(action)] * 2)
+        for name, batched, expected in (
+            ("dynamics", self.dynamics(states, actions), expected_state),
+            ("reward_function", self.reward_function(states, actions), expected_reward),
+        ):
+            batched = np.asarray(batched)
+            expected = np.asarray(expected)
+            if batched.shape != (2,) + expected.shape or not np.allclose(batched, expected):
+                raise ValueError(f"Task declared vectorized, but its {name} does not match the scalar path on a batch")
+        self._batch_validated = True
+
+    def _check_batch(self, states, actions):
+        states = np.asarray(states)
+        actions = np.asarray(actions)
+        if states.ndim == 0 or actions.ndim == 0 or len(states) != len(actions):
+            raise ValueError(f"States and actions must share a leading batch axis, got shapes {states.shape} and {actions.shape}")
+        return states, actions
+
+    def _simulate_loop(self, states, actions):
+        results = [self.simulate_step(s, a) for s, a in zip(states, actions)]
+        next_states = np.array([next_state for next_state, _ in results])
+        rewards = np.array([reward for _, reward in results])
+        return next_states, rewards
+
     def __str__(self):
         """
         Returns a string representation of the Task, typically showing the type of dynamics and reward structure.
@@ -54,4 +186,3 @@ class Task:
             str: A description of the task.
         """
         return f"Task(Dynamics={self.dynamics.__name__}, Reward Function={self.reward_function.__name__})"
-
@@ -0,0 +1,216 @@
+import numpy as np
+
+class TrajectoryBuffer:
+    """
+    Stores transitions in preallocated NumPy columns instead of a list of tuples. Each column holds one field of every transition, so statistics over a field can be computed directly on a column without rebuilding Python lists.
+
+    Column shapes and dtypes are inferred from the first appended transition. Once the buffer is full it either overwrites its oldest transitions (ring-buffer mode) or grows its capacity by a constant factor. Zero-copy views of the columns are available through the states, actions, rewards, next_states and dones properties.
+
+    Attributes:
+        capacity (int): The number of transitions the columns can currently hold.
+        overwrite (bool): Whether a full buffer overwrites its oldest transitions instead of growing.
+        growth_factor (float): The factor by which the capacity grows when a full buffer is appended to and overwrite is disabled.
+    """
+
+    COLUMNS = ("states", "actions", "rewards", "next_states", "dones")
+
+    def __init__(self, capacity=100, overwrite=False, growth_factor=2.0):
+        """
+        Initializes an empty TrajectoryBuffer.
+
+        Args:
+            capacity (int): The initial number of transitions to preallocate.
+            overwrite (bool): If True, the buffer acts as a ring buffer and never grows.
+            growth_factor (float): The factor by which the capacity grows when the buffer is full.
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        if not overwrite and growth_factor <= 1:
+            raise ValueError(f"growth_factor must be greater than 1, got {growth_factor}")
+        self.capacity = capacity
+        self.overwrite = overwrite
+        self.growth_factor = growth_factor
+        self._columns = None
+        self._size = 0
+        self._start = 0  # Storage index of the oldest transition
+
+    @classmethod
+    def from_columns(cls, columns, overwrite=False, growth_factor=2.0):
+        """
+        Wraps existing column arrays in a TrajectoryBuffer without copying them, for example arrays backed by shared memory. The buffer is full; appending to it grows it into newly allocated columns or, in ring-buffer mode, overwrites the oldest transitions in place.
+
+        Args:
+            columns (dict): One array per column name, all with the same number of rows, in chronological order.
+            overwrite (bool): If True, the buffer acts as a ring buffer and never grows.
+            growth_factor (float): The factor by which the capacity grows when the buffer is full.
+
+        Returns:
+            TrajectoryBuffer: The buffer holding the given columns.
+        """
+        lengths = {len(columns[name]) for name in cls.COLUMNS}
+        if len(lengths) != 1:
+            raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+        length = lengths.pop()
+        buffer = cls(capacity=max(length, 1), overwrite=overwrite, growth_factor=growth_factor)
+        if length:
+            buffer._columns = {name: columns[name] for name in cls.COLUMNS}
+            buffer._size = length
+        return buffer
+
+    def append(self, state, action, reward, next_state, done=False):
+        """
+        Appends a single transition to the buffer.
+
+        Args:
+            state (any): The state in which the action was taken.
+            action (any): The action taken.
+            reward (any): The reward obtained for the action.
+            next_state (any): The state reached after the action.
+            done (bool): Whether the episode ended with this transition.
+
+        Raises:
+            ValueError: If a value does not fit the shape of its column, which is set by the first transition.
+        """
+        if self._columns is None:
+            self._allocate(state, action, reward, next_state)
+        columns = self._columns
+        values = {"states": state, "actions": action, "rewards": reward, "next_states": next_state, "dones": done}
+        for name, value in values.items():
+            row_shape = columns[name].shape[1:]
+            shape = np.shape(value)
+            if shape != row_shape and np.broadcast_shapes(shape, row_shape) != row_shape:
+                raise ValueError(f"Cannot store a value of shape {shape} in the {name} column with rows of shape {row_shape}")
+        if self._size == self.capacity and not self.overwrite:
+            self._grow()
+            columns = self._columns
+        full = self._size == self.capacity
+        index = self._start if full else (self._start + self._size) % self.capacity
+        for name, value in values.items():
+            columns[name][index] = value
+        # Only count the transition once every column holds it, so a rejected transition leaves the buffer unchanged
+        if full:
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._size += 1
+
+    def clear(self):
+        """
+        Removes all transitions while keeping the allocated columns for reuse.
+        """
+        self._size = 0
+        self._start = 0
+
+    def column(self, name):
+        """
+        Returns a zero-copy view of a column, covering the stored transitions in storage order. Storage order is chronological until a ring buffer wraps around; use ordered_column for chronological order in that case.
+
+        Args:
+            name (str): One of "states", "actions", "rewards", "next_states" or "dones".
+
+        Returns:
+            np.ndarray: A view of the column with one row per stored transition.
+        """
+        if name not in self.COLUMNS:
+            raise KeyError(f"Unknown column {name!r}, expected one of {self.COLUMNS}")
+        if self._columns is None:
+            return np.empty(0)
+        return self._columns[name][:self._size]
+
+    def ordered_column(self, name):
+        """
+        Returns a column in chronological order. This is a view unless a ring buffer has wrapped around, in which case a reordered copy is returned.
+
+        Args:
+            name (str): One of "states", "actions", "rewards", "next_states" or "dones".
+
+        Returns:
+            np.ndarray: The column with one row per stored transition, oldest first.
+        """
+        column = self.column(name)
+        if self._start == 0:
+            return column
+        return np.roll(column, -self._start, axis=0)
+
+    @property
+    def states(self):
+        return self.column("states")
+
+    @property
+    def actions(self):
+        return self.column("actions")
+
+    @property
+    def rewards(self):
+        return self.column("rewards")
+
+    @property
+    def next_states(self):
+        return self.column("next_states")
+
+    @property
+    def dones(self):
+        return self.column("dones")
+
+    def _allocate(self, state, action, reward, next_state):
+        self._columns = {
+            "states": self._empty_like(state),
+            "actions": self._empty_like(action),
+            "rewards": self._empty_like(reward),
+            "next_states": self._empty_like(next_state),
+            "dones": np.zeros(self.capacity, dtype=bool),
+        }
+
+    def _empty_like(self, value):
+        value = np.asarray(value)
+        dtype = value.dtype
+        if dtype.kind in "biu":
+            dtype = np.promote_types(dtype, np.float64)  # Integer states usually evolve into floats
+        return np.empty((self.capacity,) + value.shape, dtype=dtype)
+
+    def _grow(self):
+        new_capacity = max(self.capacity + 1, int(self.capacity * self.growth_factor))
+        for name, column in self._columns.items():
+            grown = np.empty((new_capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self._size] = np.roll(column, -self._start, axis=0) if self._start else column
+            self._columns[name] = grown
+        self.capacity = new_capacity
+        self._start = 0
+
+    def _storage_index(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("TrajectoryBuffer index out of range")
+        return (self._start + index) % self.capacity
+
+    def __getitem__(self, index):
+        """
+        Returns transitions in chronological order as (state, action, reward) tuples, matching the format previously stored in Robot.data.
+
+        Args:
+            index (int or slice): The position of the transition, or a slice of positions.
+
+        Returns:
+            tuple or list: A (state, action, reward) tuple, or a list of them for a slice.
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        i = self._storage_index(index)
+        columns = self._columns
+        return columns["states"][i], columns["actions"][i], columns["rewards"][i]
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def __len__(self):
+        return self._size
+
+    def __str__(self):
+        """
+        Returns a string representation of the TrajectoryBuffer.
+
+        Returns:
+            str: A summary of the number of stored transitions and the capacity.
+        """
+        return f"TrajectoryBuffer(Transitions: {self._size}, Capacity: {self.capacity}, Overwrite: {self.overwrite})"
@@ -0,0 +1,220 @@
+import json
+import os
+import struct
+import numpy as np
+from trajectory_buffer import TrajectoryBuffer
+
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+NPY_HEADER_BYTES = 256  # Fixed .npy header size, so the final shape can be written in place on close
+
+class TrajectoryDatasetWriter:
+    """
+    Writes transitions to an on-disk trajectory dataset while a robot rolls out. A dataset is a directory with one .npy file per column (states, actions, rewards, next_states and dones) and a JSON header holding the number of transitions, the column layouts and task/robot metadata.
+
+    Transitions are collected in a small in-memory buffer and appended to the column files in blocks, so memory use does not depend on the size of the dataset. The dataset becomes readable once the writer is closed.
+
+    Attributes:
+        path (str): The directory of the dataset.
+        metadata (dict): Task/robot metadata stored in the JSON header.
+    """
+
+    def __init__(self, path, metadata=None, flush_every=4096):
+        """
+        Initializes the writer and creates the dataset directory.
+
+        Args:
+            path (str): The directory of the dataset.
+            metadata (dict, optional): JSON-serializable task/robot metadata stored in the header.
+            flush_every (int): The number of transitions collected in memory before they are appended to disk.
+        """
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self._pending = TrajectoryBuffer(capacity=flush_every)
+        self._files = None
+        self._layouts = None
+        self._length = 0
+        self.closed = False
+        os.makedirs(path, exist_ok=True)
+
+    def append(self, state, action, reward, next_state, done=False):
+        """
+        Appends a single transition to the dataset.
+
+        Args:
+            state (any): The state in which the action was taken.
+            action (any): The action taken.
+            reward (any): The reward obtained for the action.
+            next_state (any): The state reached after the action.
+            done (bool): Whether the episode ended with this transition.
+        """
+        self._pending.append(state, action, reward, next_state, done)
+        if len(self._pending) == self._pending.capacity:
+            self.flush()
+
+    def extend(self, buffer):
+        """
+        Appends every transition of a trajectory buffer to the dataset.
+
+        Args:
+            buffer (TrajectoryBuffer): The transitions to append, written in chronological order.
+        """
+        self.flush()
+        self._write({name: buffer.ordered_column(name) for name in TrajectoryBuffer.COLUMNS})
+
+    def flush(self):
+        """
+        Appends the transitions collected in memory to the column files.
+        """
+        if len(self._pending):
+            self._write({name: self._pending.column(name) for name in TrajectoryBuffer.COLUMNS})
+            self._pending.clear()
+
+    def close(self):
+        """
+        Flushes the remaining transitions, writes the final column shapes and the JSON header, and closes the column files.
+        """
+        if self.closed:
+            return
+        self.flush()
+        columns = {}
+        if self._files is not None:
+            for name, handle in self._files.items():
+                dtype, row_shape = self._layouts[name]
+                handle.seek(0)
+                handle.write(_npy_header(dtype, (self._length,) + row_shape))
+                handle.close()
+                columns[name] = {"dtype": dtype.str, "shape": list(row_shape)}
+        header = {"format_version": FORMAT_VERSION, "length": self._length, "columns": columns, "metadata": self.metadata}
+        with open(os.path.join(self.path, HEADER_FILE), "w") as handle:
+            json.dump(header, handle, indent=2)
+        self.closed = True
+
+    def _write(self, columns):
+        if self.closed:
+            raise ValueError(f"Cannot write to closed dataset {self.path}")
+        lengths = {name: len(column) for name, column in columns.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"All columns of a block must have the same length, got {lengths}")
+        if self._files is None:
+            self._open(columns)
+        for name, column in columns.items():
+            _, row_shape = self._layouts[name]
+            if column.shape[1:] != row_shape:
+                raise ValueError(f"Column {name!r} has rows of shape {column.shape[1:]}, but the dataset {self.path} stores rows of shape {row_shape}")
+        for name, column in columns.items():
+            dtype, _ = self._layouts[name]
+            self._files[name].write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+        self._length += len(columns["rewards"])
+
+    def _open(self, columns):
+        self._files = {}
+        self._layouts = {}
+        for name, column in columns.items():
+            if column.dtype.hasobject:
+                raise ValueError(f"Column {name!r} holds Python objects and cannot be stored in a trajectory dataset")
+            self._layouts[name] = (column.dtype, column.shape[1:])
+            handle = open(os.path.join(self.path, f"{name}.npy"), "wb")
+            handle.write(_npy_header(column.dtype, (0,) + column.shape[1:]))  # Rewritten with the final length on close
+            self._files[name] = handle
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self):
+        return f"TrajectoryDatasetWriter(Path: {self.path}, Transitions: {self._length + len(self._pending)})"
+
+class TrajectoryDataset:
+    """
+    Reads an on-disk trajectory dataset written by TrajectoryDatasetWriter. Columns are opened as read-only memory maps, so datasets larger than RAM can be summarized and reused across experiments without loading them. The dataset exposes the same columns and tuple access as a TrajectoryBuffer and can be passed to RewardCompensation directly.
+
+    Attributes:
+        path (str): The directory of the dataset.
+        metadata (dict): Task/robot metadata stored in the JSON header.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a dataset directory.
+
+        Args:
+            path (str): The directory of the dataset.
+        """
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as handle:
+            header = json.load(handle)
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported trajectory dataset format {header.get('format_version')!r} in {path}")
+        self.metadata = header["metadata"]
+        self._length = header["length"]
+        self._columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in header["columns"]
+        } if self._length else {}  # Empty columns cannot be memory mapped
+
+    def column(self, name):
+        """
+        Returns a column as a read-only memory map.
+
+        Args:
+            name (str): One of "states", "actions", "rewards", "next_states" or "dones".
+
+        Returns:
+            np.memmap: The column with one row per transition.
+        """
+        if name not in TrajectoryBuffer.COLUMNS:
+            raise KeyError(f"Unknown column {name!r}, expected one of {TrajectoryBuffer.COLUMNS}")
+        if not self._columns:
+            return np.empty(0)
+        return self._columns[name]
+
+    @property
+    def states(self):
+        return self.column("states")
+
+    @property
+    def actions(self):
+        return self.column("actions")
+
+    @property
+    def rewards(self):
+        return self.column("rewards")
+
+    @property
+    def next_states(self):
+        return self.column("next_states")
+
+    @property
+    def dones(self):
+        return self.column("dones")
+
+    def __getitem__(self, index):
+        """
+        Returns transitions as (state, action, reward) tuples.
+
+        Args:
+            index (int or slice): The position of the transition, or a slice of positions.
+
+        Returns:
+            tuple or list: A (state, action, reward) tuple, or a list of them for a slice.
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        return self.states[index], self.actions[index], self.rewards[index]
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return f"TrajectoryDataset(Path: {self.path}, Transitions: {self._length}, Metadata: {self.metadata})"
+
+def _npy_header(dtype, shape):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(dtype), tuple(shape))
+    header_length = NPY_HEADER_BYTES - 10  # Magic string, version and length field take 10 bytes
+    if len(header) + 1 > header_length:
+        raise ValueError(f"Column shape {shape} does not fit in the reserved .npy header")
+    header = header.ljust(header_length - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", header_length) + header.encode("latin1")
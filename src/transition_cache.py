@@ -0,0 +1,135 @@
+from collections import OrderedDict
+import threading
+import numpy as np
+
+ENTRY_OVERHEAD_BYTES = 200  # Rough per-entry cost of the dictionary slot, key tuple and value wrapper
+
+class TransitionCache:
+    """
+    Memoizes the results of deterministic task dynamics and reward functions. Entries are keyed by the kind of result, the function computing it and the state and action, so one cache can serve several tasks, such as a source and a target task with different dynamics. States and actions are optionally quantized to a grid so that nearby states share an entry, and entries are evicted in least-recently-used order once the cache exceeds its memory bound.
+
+    Quantization trades accuracy for hits: every state and action in a grid cell receives the result computed for the first one seen in that cell. Cached arrays are returned read-only, so callers cannot corrupt the cache.
+
+    The cache is safe to use from several threads, and copies of a task made for thread workers share it, so robots rolled out concurrently reuse each other's evaluations. Sharing does not extend to worker processes: a pickled cache arrives empty, with the same bounds, so process rollouts never pay for shipping the entries and only benefit from repeats within their own rollout.
+
+    Attributes:
+        max_bytes (int): The approximate memory bound of the cache.
+        max_entries (int): An optional bound on the number of entries.
+        quantization (float): The grid spacing for states and actions, or None for exact keys.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to be computed.
+        evictions (int): The number of entries evicted to respect the bounds.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20, quantization=None, max_entries=None):
+        """
+        Initializes an empty TransitionCache.
+
+        Args:
+            max_bytes (int): The approximate memory bound of the cache.
+            quantization (float, optional): The grid spacing used to discretize states and actions for the cache key.
+            max_entries (int, optional): An additional bound on the number of entries.
+        """
+        if quantization is not None and quantization <= 0:
+            raise ValueError(f"quantization must be positive, got {quantization}")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.quantization = quantization
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, kind, state, action, compute):
+        """
+        Returns the cached result for a state and action, computing and storing it on a miss.
+
+        Args:
+            kind (str): The kind of result, such as "dynamics" or "reward".
+            state (any): The state passed to compute.
+            action (any): The action passed to compute.
+            compute (callable): The function computing the result from the state and action. It is part of the key, so different functions never receive each other's results.
+
+        Returns:
+            any: The cached or newly computed result.
+        """
+        key = self._key(kind, compute, state, action)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = _freeze(compute(state, action))  # Computed outside the lock, so workers do not serialize on slow callables
+        size = _nbytes(value) + len(key[2]) + len(key[3]) + ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            if key not in self._entries:  # Another thread may have stored the same key meanwhile
+                self._entries[key] = (value, size)
+                self._bytes += size
+                self._evict()
+        return value
+
+    def clear(self):
+        """
+        Removes all entries and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def statistics(self):
+        """
+        Summarizes the cache usage.
+
+        Returns:
+            dict: The hits, misses, evictions, number of entries, approximate size in bytes and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _key(self, kind, compute, state, action):
+        return kind, compute, self._encode(state), self._encode(action)
+
+    def _encode(self, value):
+        value = np.asarray(value, dtype=float)
+        if self.quantization is not None:
+            value = np.round(value / self.quantization).astype(np.int64)
+        return value.tobytes() + str(value.shape).encode()
+
+    def _evict(self):
+        while self._entries and (self._bytes > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def __deepcopy__(self, memo):
+        return self  # Detached copies of a task for thread workers keep sharing the entries
+
+    def __reduce__(self):
+        return TransitionCache, (self.max_bytes, self.quantization, self.max_entries)  # Worker processes start empty
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return f"TransitionCache(Entries: {len(self._entries)}, Bytes: {self._bytes}, Hits: {self.hits}, Misses: {self.misses}, Evictions: {self.evictions})"
+
+def _freeze(value):
+    if isinstance(value, np.ndarray):
+        value = value.copy()
+        value.flags.writeable = False
+    return value
+
+def _nbytes(value):
+    return value.nbytes if isinstance(value, np.ndarray) else 32
@@ -0,0 +1,112 @@
+import numpy as np
+
+class VectorEnvironment:
+    """
+    Simulates several copies of an environment in lockstep. The states of all copies are held in a single array of shape (num_envs, state_dim) and are advanced together through Task.simulate_batch, so for vectorized tasks the cost of a step does not grow with the number of Python calls.
+
+    Attributes:
+        task (Task): The task shared by all copies. Vectorized tasks advance all copies in one call; scalar tasks fall back to a loop.
+        num_envs (int): The number of environment copies simulated together.
+        state_dim (int): The dimension of the state of a single copy.
+        current_states (np.ndarray): The current states of all copies, of shape (num_envs, state_dim).
+        initial_state_noise (float): The standard deviation of the Gaussian noise added to every initial state.
+        rngs (list of np.random.Generator): One random generator per copy.
+    """
+
+    def __init__(self, task, num_envs, state_dim=2, initial_state_noise=0.0, seed=None):
+        """
+        Initializes the VectorEnvironment with a task and the number of copies to simulate.
+
+        Args:
+            task (Task): An instance of the Task class which defines the dynamics and reward function for every copy.
+            num_envs (int): The number of environment copies.
+            state_dim (int): The dimension of the state of a single copy.
+            initial_state_noise (float): The standard deviation of Gaussian noise added to the initial states.
+            seed (int or np.random.SeedSequence, optional): The seed from which one generator per copy is spawned.
+        """
+        if num_envs < 1:
+            raise ValueError(f"num_envs must be at least 1, got {num_envs}")
+        self.task = task
+        self.num_envs = num_envs
+        self.state_dim = state_dim
+        self.initial_state_noise = initial_state_noise
+        self.seed(seed)
+        self.current_states = self.get_initial_states()
+
+    def seed(self, seed):
+        """
+        Spawns one independent random generator per copy from a seed. Copy i draws the same numbers as an Environment seeded with the i-th child of the same seed sequence, so batched and per-environment runs agree.
+
+        Args:
+            seed (int or np.random.SeedSequence): The seed from which the generators are spawned.
+        """
+        sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rngs = [np.random.default_rng(child) for child in sequence.spawn(self.num_envs)]
+
+    def reset(self, mask=None):
+        """
+        Resets the environment copies to their initial states. When a mask is given, only the copies selected by it are reset and the others keep their current states.
+
+        Args:
+            mask (array-like of bool, optional): A boolean array of shape (num_envs,) selecting the copies to reset.
+
+        Returns:
+            np.ndarray: The current states of all copies after the reset.
+        """
+        if mask is None:
+            self.current_states = self.get_initial_states()
+        else:
+            mask = self._check_mask(mask)
+            self.current_states[mask] = self.get_initial_states(mask)[mask]
+        return self.current_states
+
+    def step(self, actions):
+        """
+        Applies one action per copy, advancing all copies with a single call to Task.simulate_batch.
+
+        Args:
+            actions (array-like): The actions for all copies, with a leading axis of length num_envs.
+
+        Returns:
+            tuple: A tuple containing the next states, of shape (num_envs, state_dim), and the rewards for all copies.
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 0 or actions.shape[0] != self.num_envs:
+            raise ValueError(f"Expected actions with a leading axis of length {self.num_envs}, got shape {actions.shape}")
+        next_states, rewards = self.task.simulate_batch(self.current_states, actions)
+        self.current_states = next_states  # Update the current states to the next states
+        return next_states, rewards
+
+    def get_initial_states(self, mask=None):
+        """
+        Generates the initial states of the copies. Like Environment.get_initial_state, every copy starts at the origin, perturbed by noise drawn from the copy's own generator when initial_state_noise is set.
+
+        Args:
+            mask (np.ndarray of bool, optional): The copies that draw noise; the generators of the other copies are left untouched.
+
+        Returns:
+            np.ndarray: An array of shape (num_envs, state_dim) with the initial states.
+        """
+        states = np.zeros((self.num_envs, self.state_dim))
+        if self.initial_state_noise:
+            for index in np.flatnonzero(np.ones(self.num_envs, dtype=bool) if mask is None else mask):
+                states[index] += self.initial_state_noise * self.rngs[index].normal(size=self.state_dim)
+        return states
+
+    def _check_mask(self, mask):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (self.num_envs,):
+            raise ValueError(f"Expected a reset mask of shape ({self.num_envs},), got {mask.shape}")
+        return mask
+
+    def __len__(self):
+        return self.num_envs
+
+    def __str__(self):
+        """
+        Returns a string representation of the VectorEnvironment.
+
+        Returns:
+            str: A description of the environment, its task and the number of copies.
+        """
+        return f"VectorEnvironment(Task: {self.task}, Copies: {self.num_envs}, State Dim: {self.state_dim})"
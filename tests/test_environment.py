@@ -1,7 +1,28 @@
+import tracemalloc
 import unittest
-from environment import Environment
+import numpy as np
+from environment import CompensatedEnvironment, Environment
 from task import Task
 
+STATE_DIM = 20_000  # Large enough that copying a single state dominates the per-step bookkeeping
+
+# Shared with the in-place tests of test_robot
+def damped_dynamics(state, action, out=None):
+    if out is None:
+        out = np.empty_like(state)
+    np.multiply(state, 0.9, out=out)
+    return np.add(out, action, out=out)
+
+def zero_reward(state, action):
+    return 0.0
+
+class LargeEnvironment(Environment):
+    def get_initial_state(self):
+        state = np.ones(STATE_DIM)
+        if self.initial_state_noise:
+            state += self.initial_state_noise * self.rng.normal(size=STATE_DIM)
+        return state
+
 class TestEnvironment(unittest.TestCase):
     def setUp(self):
         # Setup simple task dynamics and reward function for the environment
@@ -35,6 +56,52 @@ class TestEnvironment(unittest.TestCase):
         initial_state = self.environment.get_initial_state()
         self.assertEqual(initial_state, 0, "get_initial_state should return the correct initial state")
 
+    def test_compensated_step(self):
+        # The wrapper steps the environment once and only transforms the reward
+        compensated = CompensatedEnvironment(self.environment, [lambda s, a, r: r + 1, lambda s, a, r: r * 2])
+        initial_state = compensated.reset()
+        next_state, reward = compensated.step(5)
+        np.testing.assert_array_equal(next_state, self.dynamics(initial_state, 5))
+        np.testing.assert_array_equal(compensated.current_state, next_state)
+        np.testing.assert_array_equal(reward, (self.reward_function(initial_state, 5) + 1) * 2)
+
+    def test_seeded_initial_state_noise(self):
+        # Noisy initial states are reproducible from the seed
+        first, second = Environment(self.task, initial_state_noise=1.0, seed=3), Environment(self.task, initial_state_noise=1.0, seed=3)
+        np.testing.assert_array_equal(first.reset(), second.reset())
+        self.assertFalse(np.array_equal(first.reset(), first.get_initial_state()))
+        first.seed(5)
+        second.seed(5)
+        np.testing.assert_array_equal(first.reset(), second.reset())
+
+    def test_inplace_step_matches_allocating_step(self):
+        # In-place stepping alternates between two buffers and reproduces the allocating path
+        inplace = LargeEnvironment(Task(damped_dynamics, zero_reward, inplace=True))
+        allocating = LargeEnvironment(Task(damped_dynamics, zero_reward))
+        action = np.full(STATE_DIM, 0.5)
+        first, _ = inplace.step(action)
+        second, _ = inplace.step(action)
+        self.assertIsNot(first, second)
+        self.assertIs(inplace.step(action)[0], first, "The third step reuses the first buffer")
+        for _ in range(3):
+            expected, _ = allocating.step(action)
+        np.testing.assert_array_equal(inplace.current_state, expected)
+
+    def test_inplace_step_allocates_less_than_a_state(self):
+        # Steady-state in-place steps allocate far less than a single state array
+        environment = LargeEnvironment(Task(damped_dynamics, zero_reward, inplace=True))
+        action = np.zeros(STATE_DIM)
+        environment.step(action)  # Allocates the two state buffers
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            for _ in range(100):
+                environment.step(action)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak - baseline, action.nbytes // 10, "100 in-place steps should allocate less than a tenth of one state")
+
 if __name__ == '__main__':
     unittest.main()
 
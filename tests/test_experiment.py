@@ -0,0 +1,241 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import pickle
+import unittest
+import numpy as np
+from environment import Environment
+from experiment import Experiment, main
+from metrics_logger import MetricsLogger
+from policy import LinearPolicy
+from policy_pipeline import AffineAdjustment
+from robot import Robot
+from rollout_executor import RolloutSpec
+from task import Task
+
+# Module-level callables, so robots can be pickled for the process executor
+def dynamics(state, action):
+    return 0.5 * state + action
+
+def reward_function(state, action):
+    return -np.abs(state - action)
+
+def increment_policy(state):
+    return state + 1
+
+def halving_policy(state):
+    return state / 2 - 1
+
+def action_reward(state, action):
+    return np.mean(action)
+
+def failing_policy(state):
+    raise RuntimeError("Policy failed")
+
+def constant_reward(state, action):
+    return 1.0
+
+def zero_reward(state, action):
+    return 0.0
+
+class TestExperiment(unittest.TestCase):
+    def make_experiment(self, executor):
+        # Both robots share one environment, as in experiment.main
+        env = Environment(Task(dynamics, reward_function))
+        robots = [Robot("Robot1", env, increment_policy), Robot("Robot2", env, halving_policy)]
+        return Experiment(robots, executor=executor, max_workers=2)
+
+    def assert_same_results(self, expected, actual):
+        self.assertEqual(list(expected), list(actual), "Results should be gathered in submission order")
+        for name in expected:
+            for column in ("states", "actions", "rewards"):
+                np.testing.assert_array_equal(getattr(expected[name], column), getattr(actual[name], column))
+
+    def test_run_multi_robot_executors(self):
+        # Parallel rollouts should produce exactly the serial data
+        serial = self.make_experiment("serial").run_multi_robot()
+        for executor in ("thread", "process"):
+            experiment = self.make_experiment(executor)
+            results = experiment.run_multi_robot()
+            self.assert_same_results(serial, results)
+            self.assertIs(experiment.robots[0].data, results["Robot1"], "Gathered data should be stored on the robot")
+
+    def test_run_co_training_executors(self):
+        # Co-training adjustments must survive the trip to worker processes
+        serial = self.make_experiment("serial").run_co_training()
+        for executor in ("thread", "process"):
+            self.assert_same_results(serial, self.make_experiment(executor).run_co_training())
+
+    def make_noisy_experiment(self, executor, seed):
+        # Noisy starts and exploration make every episode depend on the random streams
+        env = Environment(Task(dynamics, reward_function), initial_state_noise=0.5)
+        robots = [Robot("Robot1", env, increment_policy, exploration_noise=0.1), Robot("Robot2", env, halving_policy, exploration_noise=0.1)]
+        return Experiment(robots, executor=executor, max_workers=2, seed=seed)
+
+    def test_seeded_executors_are_bit_identical(self):
+        # Episode seeds are spawned in the parent, so every executor reproduces the serial data
+        def run(experiment):
+            # Serial rollouts reuse the robots' buffers, so keep a copy of each phase's data
+            return [{name: copy.deepcopy(data) for name, data in phase().items()} for phase in (experiment.run_multi_robot, experiment.run_co_training)]
+
+        expected = run(self.make_noisy_experiment("serial", 42))
+        for executor in ("thread", "process"):
+            for reference, results in zip(expected, run(self.make_noisy_experiment(executor, 42))):
+                self.assert_same_results(reference, results)
+
+    def test_seeds_change_the_data(self):
+        # Different seeds and successive episodes draw different noise
+        first = self.make_noisy_experiment("serial", 1).run_multi_robot()
+        other = self.make_noisy_experiment("serial", 2).run_multi_robot()
+        self.assertFalse(np.array_equal(first["Robot1"].states, other["Robot1"].states))
+        experiment = self.make_noisy_experiment("serial", 1)
+        experiment.run_multi_robot()
+        self.assertFalse(np.array_equal(first["Robot1"].states, experiment.run_multi_robot()["Robot1"].states))
+
+    def test_unseeded_runs_differ(self):
+        # Unseeded experiments still spawn fresh episode seeds, so detached copies do not replay the same noise
+        for executor in ("serial", "thread"):
+            experiment = self.make_noisy_experiment(executor, None)
+            first = copy.deepcopy(experiment.run_multi_robot(horizon=10))
+            second = experiment.run_multi_robot(horizon=10)
+            self.assertFalse(np.array_equal(first["Robot1"].rewards, second["Robot1"].rewards), executor)
+
+    def test_unseeded_experiment_honors_object_seeds(self):
+        # Without an experiment seed, seeded robots and environments still reproduce their episodes
+        def run(executor):
+            env = Environment(Task(dynamics, reward_function), initial_state_noise=0.5, seed=1)
+            robot = Robot("Robot1", env, increment_policy, exploration_noise=0.1, seed=1)
+            return Experiment([robot], executor=executor).run_multi_robot(horizon=10)["Robot1"].actions.copy()
+        np.testing.assert_array_equal(run("serial"), run("serial"))
+        np.testing.assert_array_equal(run("serial"), run("thread"))
+
+    def test_unpicklable_policy(self):
+        # Lambda policies cannot be sent to worker processes
+        env = Environment(Task(dynamics, reward_function))
+        experiment = Experiment([Robot("Robot1", env, lambda s: s + 1)], executor="process")
+        with self.assertRaises(ValueError):
+            experiment.run_multi_robot()
+
+    def test_reward_transfer_converges(self):
+        # Offsetting the target's actions by the reward gap closes it after one update
+        env = Environment(Task(dynamics, action_reward))
+        source = Robot("Source", env, LinearPolicy(0.0, bias=2.0))
+        target = Robot("Target", env, LinearPolicy(0.0, bias=0.0))
+        experiment = Experiment([source, target])
+        result = experiment.run_reward_transfer(source, target, horizon=10)
+        self.assertTrue(result["converged"])
+        self.assertEqual(result["iterations"], 2)
+        np.testing.assert_allclose(result["compensation_factor"], 2.0)
+        np.testing.assert_allclose(target.policy(np.zeros(2)), [2.0, 2.0])
+
+    def test_reward_transfer_stops_when_settled(self):
+        # A gap the policy cannot influence stops the loop after patience unchanged rounds
+        source = Robot("Source", Environment(Task(dynamics, constant_reward)), increment_policy)
+        target = Robot("Target", Environment(Task(dynamics, zero_reward)), LinearPolicy(0.0))
+        result = Experiment([source, target]).run_reward_transfer(source, target, max_iters=50, patience=3, horizon=10)
+        self.assertFalse(result["converged"])
+        self.assertEqual(result["reason"], "settled")
+        self.assertEqual(result["iterations"], 4)
+
+    def test_reward_transfer_reuses_source_statistics(self):
+        # Source statistics are computed once and reused by later runs
+        env = Environment(Task(dynamics, action_reward))
+        source = Robot("Source", env, LinearPolicy(0.0, bias=2.0))
+        target = Robot("Target", env, LinearPolicy(0.0))
+        experiment = Experiment([source, target])
+        experiment.run_reward_transfer(source, target, horizon=10)
+        statistics = experiment.source_statistics["Source"]
+        source.data.clear()
+        experiment.run_reward_transfer(source, target, horizon=10)
+        self.assertIs(experiment.source_statistics["Source"], statistics)
+        self.assertEqual(len(source.data), 0, "The source should not be rolled out again")
+
+    def test_logger_replaces_printing(self):
+        # Rollouts are reported as structured records and nothing is printed
+        stream = io.StringIO()
+        experiment = self.make_experiment("serial")
+        experiment.logger = MetricsLogger(stream, level="debug")
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            experiment.run_multi_robot()
+            experiment.run_co_training()
+        experiment.logger.close()
+        self.assertEqual(printed.getvalue(), "")
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        rollouts = [record for record in records if record["event"] == "rollout"]
+        self.assertEqual([(record["method"], record["robot"]) for record in rollouts],
+                         [("run_multi_robot", "Robot1"), ("run_multi_robot", "Robot2"), ("run_co_training", "Robot1"), ("run_co_training", "Robot2")])
+        heads = [record for record in records if record["event"] == "trajectory_head"]
+        self.assertEqual(len(heads), 4)
+        self.assertEqual(len(heads[0]["states"]), 5)
+
+    def test_reward_transfer_logs_rounds(self):
+        # Every transfer round is logged with the entries of the history
+        env = Environment(Task(dynamics, action_reward))
+        source = Robot("Source", env, LinearPolicy(0.0, bias=2.0))
+        target = Robot("Target", env, LinearPolicy(0.0))
+        stream = io.StringIO()
+        with MetricsLogger(stream) as logger:
+            result = Experiment([source, target], logger=logger).run_reward_transfer(source, target, horizon=10)
+        rounds = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([record["iteration"] for record in rounds], [entry["iteration"] for entry in result["history"]])
+        self.assertTrue(all(record["event"] == "transfer_round" for record in rounds))
+
+    def test_reward_transfer_refreshes_source_statistics(self):
+        # A refresh, a new horizon or a new source policy collects a fresh source rollout
+        env = Environment(Task(dynamics, action_reward))
+        source = Robot("Source", env, LinearPolicy(0.0, bias=2.0))
+        target = Robot("Target", env, LinearPolicy(0.0))
+        experiment = Experiment([source, target])
+        experiment.run_reward_transfer(source, target, horizon=10)
+        source.data.clear()
+        experiment.run_reward_transfer(source, target, horizon=10, refresh_source=True)
+        self.assertEqual(len(source.data), 10)
+        experiment.run_reward_transfer(source, target, horizon=20)
+        self.assertEqual(len(source.data), 20)
+        source.adjust_policy(AffineAdjustment(offset=1.0))
+        experiment.run_reward_transfer(source, target, horizon=20)
+        np.testing.assert_allclose(experiment.source_statistics["Source"].mean, 3.0)
+        source.policy.update([0.0, 1.0])  # In-place updates are detected as well
+        experiment.run_reward_transfer(source, target, horizon=20)
+        np.testing.assert_allclose(experiment.source_statistics["Source"].mean, 4.0)
+
+    def test_workers_do_not_receive_previous_data(self):
+        # Robots are pickled without the trajectory of their last rollout
+        experiment = self.make_experiment("process")
+        experiment.run_multi_robot(horizon=1000)
+        robot = experiment.robots[0]
+        self.assertEqual(len(robot.data), 1000)
+        spec = RolloutSpec(robot, horizon=10)
+        self.assertEqual(len(pickle.loads(pickle.dumps(spec)).robot.data), 0)
+        self.assertLess(len(pickle.dumps(spec)), 10_000)
+        self.assertEqual(len(spec.detached().robot.data), 0)
+        self.assertEqual(len(copy.deepcopy(robot).data), 1000, "Plain copies of a robot keep its trajectory")
+        self.assertEqual(len(robot.data), 1000)
+
+    def test_failed_rollout_releases_shared_blocks(self):
+        # Blocks exported by successful workers are unlinked when another worker fails
+        env = Environment(Task(dynamics, reward_function))
+        robots = [Robot("Robot1", env, increment_policy), Robot("Robot2", env, failing_policy)]
+        before = set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+        with self.assertRaises(RuntimeError):
+            Experiment(robots, executor="process", max_workers=2).run_multi_robot()
+        after = set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+        self.assertEqual(after - before, set())
+
+    def test_main_transfer_converges(self):
+        # The demo's reward transfer aligns the robots' rewards instead of running into max_iters
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            main()
+        records = [json.loads(line) for line in printed.getvalue().splitlines() if line.startswith("{")]
+        result = records[-1]
+        self.assertEqual(result["event"], "transfer_result")
+        self.assertTrue(result["converged"])
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            self.make_experiment("cluster").run_multi_robot()
+
+if __name__ == '__main__':
+    unittest.main()
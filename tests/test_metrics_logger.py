@@ -0,0 +1,119 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from metrics_logger import MetricsLogger
+
+def read_records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+class TestMetricsLogger(unittest.TestCase):
+    def test_writes_json_lines(self):
+        # Records carry the event, the level and the fields, with NumPy values converted
+        stream = io.StringIO()
+        with MetricsLogger(stream) as logger:
+            logger.log("rollout", robot="Robot1", transitions=np.int64(3), rewards=np.array([1.0, 2.0]))
+        record, = read_records(stream)
+        self.assertEqual(record["event"], "rollout")
+        self.assertEqual(record["level"], "info")
+        self.assertEqual(record["transitions"], 3)
+        self.assertEqual(record["rewards"], [1.0, 2.0])
+        self.assertIn("time", record)
+
+    def test_level_filtering(self):
+        # Records below the threshold are dropped and reported by enabled_for
+        stream = io.StringIO()
+        with MetricsLogger(stream, level="info") as logger:
+            self.assertFalse(logger.enabled_for("debug"))
+            self.assertTrue(logger.enabled_for("warning"))
+            logger.log("detail", level="debug")
+            logger.log("summary")
+            logger.log("problem", level="error")
+        self.assertEqual([record["event"] for record in read_records(stream)], ["summary", "problem"])
+        with self.assertRaises(ValueError):
+            MetricsLogger(stream, level="verbose")
+
+    def test_sampling(self):
+        # Sampled events keep roughly their rate, other events are always kept
+        stream = io.StringIO()
+        with MetricsLogger(stream, sample_rates={"step": 0.25, "never": 0.0}, seed=0) as logger:
+            for _ in range(1000):
+                logger.log("step")
+                logger.log("never")
+            logger.log("episode")
+        events = [record["event"] for record in read_records(stream)]
+        self.assertNotIn("never", events)
+        self.assertEqual(events.count("episode"), 1)
+        self.assertGreater(events.count("step"), 180)
+        self.assertLess(events.count("step"), 320)
+        self.assertEqual(logger.logged + logger.sampled_out, 2001)
+
+    def test_flush_and_close(self):
+        # Flush waits for queued records; close appends the rest to the file and stops the writer
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.jsonl")
+            logger = MetricsLogger(path=path, batch_size=7)
+            for index in range(100):
+                logger.log("step", index=index)
+            logger.flush()
+            with open(path) as handle:
+                self.assertEqual(len(handle.readlines()), 100)
+            logger.log("done")
+            logger.close()
+            self.assertFalse(logger._thread.is_alive())
+            with open(path) as handle:
+                records = [json.loads(line) for line in handle]
+        self.assertEqual([record.get("index") for record in records[:100]], list(range(100)))
+        self.assertEqual(records[-1]["event"], "done")
+        logger.log("ignored")  # Logging after close is a no-op
+
+    def test_write_errors_are_reported(self):
+        # A failing stream does not block flush or close; the lost records are reported instead
+        stream = io.StringIO()
+        stream.close()
+        logger = MetricsLogger(stream)
+        logger.log("rollout")
+        with self.assertRaises(RuntimeError):
+            logger.flush()
+        self.assertEqual(logger.failed, 1)
+        logger.flush()  # Errors are reported once
+        logger.log("rollout")
+        with self.assertRaises(RuntimeError):
+            logger.close()
+        self.assertEqual(logger.failed, 2)
+
+    def test_dead_writer_is_reported(self):
+        # flush reports a writer thread that stopped instead of waiting for it forever
+        class ExitingStream:
+            def write(self, text):
+                raise SystemExit  # Not an Exception, so it ends the writer thread
+        excepthook = threading.excepthook
+        threading.excepthook = lambda args: None  # The thread's death is expected
+        try:
+            logger = MetricsLogger(ExitingStream())
+            logger.log("first")
+            logger._thread.join(5)
+        finally:
+            threading.excepthook = excepthook
+        self.assertFalse(logger._thread.is_alive())
+        logger.log("second")
+        with self.assertRaises(RuntimeError):
+            logger.flush()
+        logger.close()
+
+    def test_disabled_logger(self):
+        # Without an output, or when disabled, no thread is started and nothing is recorded
+        threads = threading.active_count()
+        for logger in (MetricsLogger(), MetricsLogger(io.StringIO(), enabled=False)):
+            self.assertFalse(logger.enabled_for("error"))
+            logger.log("rollout")
+            logger.flush()
+            logger.close()
+            self.assertEqual(logger.logged, 0)
+        self.assertEqual(threading.active_count(), threads)
+
+if __name__ == '__main__':
+    unittest.main()
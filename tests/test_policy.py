@@ -0,0 +1,117 @@
+import pickle
+import unittest
+import numpy as np
+from policy import LinearPolicy, MLPPolicy, Policy, TabularPolicy
+from policy_pipeline import AffineAdjustment, PolicyPipeline
+from robot import Robot
+from environment import Environment
+from task import Task
+
+class TestPolicy(unittest.TestCase):
+    def test_linear_batched_act(self):
+        # Batched actions match per-state calls for matrix weights
+        policy = LinearPolicy([[1.0, 2.0], [0.0, -1.0]], bias=[0.5, 0.0])
+        states = np.array([[1.0, 1.0], [2.0, -3.0], [0.0, 0.0]])
+        expected = np.array([policy(state) for state in states])
+        np.testing.assert_allclose(policy.act(states), expected)
+        np.testing.assert_allclose(policy(np.array([1.0, 1.0])), [3.5, -1.0])
+
+    def test_linear_absorbs_affine_adjustment(self):
+        # Absorbing an adjustment is equivalent to applying it as a pipeline stage
+        adjustment = AffineAdjustment(action_scale=2.0, state_scale=-0.5, offset=[1.0, 3.0])
+        for weights in (1.5, [1.5, -2.0], [[1.0, 2.0], [3.0, 4.0]]):
+            policy = LinearPolicy(weights, bias=0.25)
+            pipeline = PolicyPipeline(LinearPolicy(weights, bias=0.25)).then(adjustment)
+            self.assertTrue(policy.absorb(adjustment))
+            state = np.array([1.0, -2.0])
+            np.testing.assert_allclose(policy(state), pipeline(state))
+
+    def test_linear_absorbs_in_place(self):
+        # Parameters keep their storage when the adjustment does not change their shape
+        policy = LinearPolicy([1.0, 1.0], bias=[0.0, 0.0])
+        weights, bias = policy.params()
+        policy.absorb(AffineAdjustment(action_scale=2.0, offset=1.0))
+        self.assertIs(policy.weights, weights)
+        self.assertIs(policy.bias, bias)
+        np.testing.assert_allclose(bias, [1.0, 1.0])
+
+    def test_non_square_matrix_rejects_state_terms(self):
+        # A state-dependent term cannot be folded into a non-square matrix
+        policy = LinearPolicy(np.ones((1, 2)))
+        self.assertFalse(policy.absorb(AffineAdjustment(state_scale=1.0)))
+        self.assertFalse(policy.absorb(lambda s, a: a))
+
+    def test_tabular_lookup(self):
+        # States map to grid cells, and states outside the grid use the edge cells
+        policy = TabularPolicy(low=[0.0, 0.0], high=[1.0, 1.0], bins=2, table=[0.0, 1.0, 2.0, 3.0])
+        states = np.array([[0.1, 0.1], [0.1, 0.9], [0.9, 0.1], [5.0, 5.0], [-1.0, 0.6]])
+        np.testing.assert_allclose(policy.act(states), [0.0, 1.0, 2.0, 3.0, 1.0])
+        self.assertEqual(policy(np.array([0.9, 0.9])), 3.0)
+        self.assertTrue(policy.absorb(AffineAdjustment(offset=1.0)))
+        self.assertFalse(policy.absorb(AffineAdjustment(state_scale=1.0)))
+        np.testing.assert_allclose(policy.table, [1.0, 2.0, 3.0, 4.0])
+
+    def test_mlp_act_and_absorb(self):
+        # The MLP evaluates batches and absorbs state-independent adjustments in its output layer
+        policy = MLPPolicy.random([2, 8, 2], rng=np.random.default_rng(0), scale=1.0)
+        states = np.random.default_rng(1).normal(size=(5, 2))
+        actions = policy.act(states)
+        self.assertEqual(actions.shape, (5, 2))
+        np.testing.assert_allclose(policy(states[0]), actions[0])
+        adjustment = AffineAdjustment(action_scale=[2.0, -1.0], offset=0.5)
+        self.assertTrue(policy.absorb(adjustment))
+        np.testing.assert_allclose(policy.act(states), adjustment(states, actions))
+
+    def test_update_and_set_params(self):
+        # Updates and assignments modify the parameter arrays in place
+        policy = MLPPolicy.random([2, 3, 1], rng=np.random.default_rng(0))
+        params = policy.params()
+        before = [param.copy() for param in params]
+        policy.update([np.ones_like(param) for param in params], learning_rate=0.1)
+        for param, old in zip(policy.params(), before):
+            np.testing.assert_allclose(param, old + 0.1)
+        policy.set_params(before)
+        for param, old, original in zip(policy.params(), before, params):
+            self.assertIs(param, original)
+            np.testing.assert_allclose(param, old)
+        with self.assertRaises(ValueError):
+            policy.update(before[:1])
+        with self.assertRaises(ValueError):
+            policy.set_params(before + before)
+
+    def test_policy_is_abstract(self):
+        # The base class cannot be instantiated without act and params
+        with self.assertRaises(TypeError):
+            Policy()
+
+    def test_pickle_round_trip(self):
+        # Policies can be sent to worker processes
+        for policy in (LinearPolicy(2.0, 1.0), TabularPolicy(0.0, 1.0, 4), MLPPolicy.random([1, 4, 1])):
+            copy = pickle.loads(pickle.dumps(policy))
+            for param, copied in zip(policy.params(), copy.params()):
+                np.testing.assert_array_equal(param, copied)
+
+    def test_robot_absorbs_adjustment(self):
+        # Adjusting a robot with a linear policy folds the adjustment into a new policy instead of wrapping it
+        env = Environment(Task(lambda s, a: s + a, lambda s, a: 0.0))
+        policy = LinearPolicy(1.0, bias=1.0)
+        robot = Robot("Robot", env, policy)
+        robot.adjust_policy(AffineAdjustment(state_scale=-0.5, offset=2.0))
+        self.assertIsInstance(robot.policy, LinearPolicy)
+        np.testing.assert_allclose(robot.policy(np.array([2.0, 4.0])), [4.0, 5.0])
+        np.testing.assert_allclose(policy(np.array([2.0, 4.0])), [3.0, 5.0], err_msg="The original policy should be unchanged")
+
+    def test_shared_policy_is_not_modified(self):
+        # Robots sharing a policy instance are adjusted independently
+        env = Environment(Task(lambda s, a: s + a, lambda s, a: 0.0))
+        policy = LinearPolicy(1.0)
+        first, second = Robot("First", env, policy), Robot("Second", env, policy)
+        first.adjust_policy(AffineAdjustment(action_scale=2.0))
+        second.adjust_policy(AffineAdjustment(offset=1.0))
+        np.testing.assert_allclose(first.policy(np.ones(1)), [2.0])
+        np.testing.assert_allclose(second.policy(np.ones(1)), [2.0])
+        np.testing.assert_allclose(policy(np.ones(1)), [1.0])
+        self.assertIsNone(policy.absorbed(lambda s, a: a))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import unittest
+import numpy as np
+from policy_pipeline import AffineAdjustment, PolicyPipeline
+
+class TestPolicyPipeline(unittest.TestCase):
+    def setUp(self):
+        # A base policy that moves one unit away from the state
+        self.pipeline = PolicyPipeline(lambda s: s + 1)
+
+    def test_affine_folding(self):
+        # Consecutive affine adjustments fold into a single equivalent stage
+        first = AffineAdjustment(action_scale=2.0, state_scale=-0.5, offset=1.0)
+        second = AffineAdjustment(action_scale=0.5, offset=3.0)
+        pipeline = self.pipeline.then(first).then(second)
+        self.assertEqual(pipeline.depth, 1, "Affine stages should be folded")
+        state = np.array([1.0, -2.0])
+        expected = second(state, first(state, state + 1))
+        np.testing.assert_allclose(pipeline(state), expected)
+
+    def test_depth_stays_flat(self):
+        # Many refinement rounds do not grow the chain
+        pipeline = self.pipeline
+        for _ in range(sys.getrecursionlimit() * 2):
+            pipeline = pipeline.then(AffineAdjustment(offset=0.001))
+        self.assertEqual(pipeline.depth, 1)
+        self.assertAlmostEqual(pipeline(0.0), 1.0 + sys.getrecursionlimit() * 2 * 0.001)
+
+    def test_generic_stages_do_not_recurse(self):
+        # Arbitrary stages are applied in a loop, not through nested frames
+        pipeline = self.pipeline
+        for _ in range(sys.getrecursionlimit() * 2):
+            pipeline = pipeline.then(lambda s, a: a + 1)
+        self.assertEqual(pipeline.depth, sys.getrecursionlimit() * 2)
+        self.assertEqual(pipeline(0), 1 + sys.getrecursionlimit() * 2)
+
+    def test_then_leaves_original_unchanged(self):
+        # Extending a pipeline returns a new one
+        extended = self.pipeline.then(AffineAdjustment(offset=10.0))
+        self.assertEqual(self.pipeline.depth, 0)
+        self.assertEqual(self.pipeline(0), 1)
+        self.assertEqual(extended(0), 11.0)
+
+    def test_nested_pipeline_is_flattened(self):
+        inner = self.pipeline.then(lambda s, a: a * 3)
+        outer = PolicyPipeline(inner).then(lambda s, a: a - 1)
+        self.assertEqual(outer.depth, 2)
+        self.assertEqual(outer(1), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import unittest
+import numpy as np
+from environment import Environment
+from experiment import Experiment
+from profiling import Profiler
+from robot import Robot
+from task import Task
+
+# Module-level callables, so robots can be pickled for the process executor
+def dynamics(state, action):
+    return state + action
+
+def reward_function(state, action):
+    return -np.abs(state - action)
+
+def policy(state):
+    return -0.5 * state
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        # Two robots sharing one environment
+        self.env = Environment(Task(dynamics, reward_function))
+        self.robots = [Robot("Robot1", self.env, policy), Robot("Robot2", self.env, policy)]
+
+    def test_record_and_merge(self):
+        # Measurements accumulate per phase and merge across profilers
+        profiler = Profiler()
+        profiler.record("policy", 0.5)
+        profiler.record("policy", 1.5)
+        other = Profiler()
+        other.record("policy", 1.0, calls=2)
+        other.record("reward", 0.25)
+        summary = profiler.merge(other).summary()
+        self.assertEqual(summary["policy"], {"calls": 4, "total_seconds": 3.0, "mean_seconds": 0.75})
+        self.assertEqual(summary["reward"]["calls"], 1)
+        self.assertEqual(json.loads(profiler.to_json()), summary)
+
+    def test_robot_phases(self):
+        # Every phase of a rollout is counted once per step
+        robot = self.robots[0]
+        robot.profiler = Profiler()
+        robot.perform_task()
+        for phase in ("policy", "step", "dynamics", "reward", "record"):
+            self.assertEqual(robot.profiler.counts[phase], 100, f"Phase {phase} should be counted every step")
+        self.assertIsNone(self.env.profiler, "The environment's profiler should be restored after the rollout")
+
+    def test_disabled_by_default(self):
+        # Without profiling, nothing is collected
+        experiment = Experiment(self.robots)
+        experiment.run_multi_robot()
+        self.assertEqual(experiment.profiles, {})
+        self.assertIsNone(self.robots[0].profiler)
+
+    def test_experiment_summary(self):
+        # Measurements are aggregated per method and robot, including from worker processes
+        for executor in ("serial", "process"):
+            experiment = Experiment(self.robots, executor=executor, profile=True)
+            experiment.run_multi_robot()
+            experiment.run_co_training()
+            summary = experiment.profile_summary()
+            self.assertEqual(summary["run_multi_robot"]["Robot1"]["dynamics"]["calls"], 100)
+            self.assertEqual(summary["run_co_training"]["Robot2"]["policy"]["calls"], 200)
+            self.assertEqual(summary["run_co_training"]["total"]["step"]["calls"], 400)
+            self.assertEqual(json.loads(experiment.profile_json()), summary)
+            self.assertIsNone(self.robots[0].profiler, "Robots should not keep the experiment's profilers")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import pickle
+import unittest
+import numpy as np
+from quantile_sketch import QuantileMapping, QuantileSketch
+
+class TestQuantileSketch(unittest.TestCase):
+    def setUp(self):
+        # A long stream, fed in chunks as it would arrive from rollouts
+        self.values = np.random.default_rng(0).normal(size=200_000)
+        self.levels = np.linspace(0.01, 0.99, 99)
+
+    def rank_error(self, sketch):
+        ranks = np.searchsorted(np.sort(self.values), sketch.quantile(self.levels)) / len(self.values)
+        return np.max(np.abs(ranks - self.levels))
+
+    def test_accuracy_in_bounded_memory(self):
+        # Quantiles stay within a small rank error while the sketch keeps few items
+        sketch = QuantileSketch.from_chunks(np.array_split(self.values, 50), k=200)
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertLess(self.rank_error(sketch), 0.02)
+        self.assertLess(sketch.size, 3 * sketch.k)
+        self.assertEqual((sketch.min, sketch.max), (self.values.min(), self.values.max()))
+
+    def test_merge(self):
+        # Sketches of separate parts merge into a sketch of the whole stream
+        parts = [QuantileSketch(seed=i).update(part) for i, part in enumerate(np.array_split(self.values, 4))]
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        self.assertEqual(merged.count, len(self.values))
+        self.assertLess(self.rank_error(merged), 0.02)
+
+    def test_cdf_inverts_quantile(self):
+        # The cdf is vectorized and consistent with the quantiles
+        sketch = QuantileSketch().update(self.values)
+        np.testing.assert_allclose(sketch.cdf(sketch.quantile(self.levels)), self.levels, atol=1e-9)
+        self.assertEqual(sketch.cdf(np.array([[-100.0, 100.0]])).tolist(), [[0.0, 1.0]])
+
+    def test_small_streams_are_exact(self):
+        # Streams that fit in the top compactor are not compacted
+        sketch = QuantileSketch(k=50).update([3.0, 1.0, 2.0])
+        np.testing.assert_allclose(sketch.quantile([0.0, 0.5, 1.0]), [1.0, 2.0, 3.0])
+        with self.assertRaises(ValueError):
+            QuantileSketch().quantile(0.5)
+
+    def test_quantile_mapping(self):
+        # Target rewards are mapped onto the source distribution, shape included
+        source = QuantileSketch().update(5.0 + 2.0 * self.values)
+        target = QuantileSketch().update(self.values)
+        mapping = pickle.loads(pickle.dumps(QuantileMapping(source, target)))
+        rewards = np.array([[-1.0, 0.0], [0.5, 1.5]])
+        np.testing.assert_allclose(mapping.map(rewards), 5.0 + 2.0 * rewards, atol=0.1)
+        self.assertAlmostEqual(float(mapping(None, None, 0.0)), 5.0, delta=0.1)
+
+if __name__ == '__main__':
+    unittest.main()
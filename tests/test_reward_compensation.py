@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from reward_compensation import RewardCompensation
 from robot import Robot
 from environment import Environment
@@ -44,6 +45,48 @@ class TestRewardCompensation(unittest.TestCase):
         
         self.assertEqual(first_compensated_reward, expected_reward, "Compensated reward should match expected modified reward")
 
+    def test_apply_compensation_steps_once(self):
+        # Compensation changes only the rewards; the trajectory matches an uncompensated rollout
+        uncompensated = Robot("Reference", self.env, lambda s: s - 1).perform_task()
+        expected_states = uncompensated.states.copy()
+        expected_rewards = uncompensated.rewards.copy()
+        compensation_func = self.reward_compensation.calculate_compensation()
+        self.reward_compensation.apply_compensation(self.robot2, compensation_func)
+        self.reward_compensation.apply_compensation(self.robot2, compensation_func)
+        compensated_data = self.robot2.perform_task()
+        np.testing.assert_array_equal(compensated_data.states, expected_states)
+        np.testing.assert_array_equal(compensated_data.rewards, compensation_func(None, None, compensation_func(None, None, expected_rewards)))
+        self.assertEqual(len(self.robot2.environment.compensation_funcs), 2, "Compensations should be stacked without nesting wrappers")
+
+    def test_from_streams(self):
+        # Streaming chunks of rewards gives the same compensation as the in-memory data
+        source_rewards = np.array([r for _, _, r in self.robot1_data], dtype=float)
+        target_rewards = np.array([r for _, _, r in self.robot2_data], dtype=float) - 2.0
+        streamed = RewardCompensation.from_streams((chunk for chunk in np.array_split(source_rewards, 3)),
+                                                   (chunk for chunk in np.array_split(target_rewards, 4)))
+        self.assertEqual(str(streamed), "RewardCompensation(Source Data Length: 10, Target Data Length: 10)")
+        compensation_func = streamed.calculate_compensation()
+        self.assertAlmostEqual(compensation_func(0, 0, 0.0), 2.0)
+
+    def test_quantile_mode(self):
+        # Quantile mapping matches spread as well as location, from data or from streamed sketches
+        rng = np.random.default_rng(0)
+        source_rewards, target_rewards = 3.0 * rng.normal(size=20_000) + 1.0, rng.normal(size=20_000)
+        streamed = RewardCompensation.from_streams(np.array_split(source_rewards, 5), np.array_split(target_rewards, 5), sketch_k=200)
+        mapping = streamed.calculate_compensation(mode="quantile")
+        np.testing.assert_allclose(mapping.map(np.array([-1.0, 0.0, 1.0])), [-2.0, 1.0, 4.0], atol=0.15)
+        np.testing.assert_allclose(streamed.source_statistics().mean, np.mean(source_rewards))
+        with self.assertRaises(ValueError):
+            RewardCompensation.from_streams([source_rewards], [target_rewards]).calculate_compensation(mode="quantile")
+
+    def test_from_streaming_rollouts(self):
+        # Statistics can be fed directly from chunked rollouts as they are produced
+        streamed = RewardCompensation.from_streams(self.robot1.rollout(horizon=20, chunk_size=8),
+                                                   self.robot2.rollout(horizon=20, chunk_size=8))
+        expected = RewardCompensation(self.robot1.perform_task(horizon=20), self.robot2.perform_task(horizon=20))
+        np.testing.assert_allclose(streamed.calculate_compensation()(None, None, 0.0),
+                                   expected.calculate_compensation()(None, None, 0.0))
+
 if __name__ == '__main__':
     unittest.main()
 
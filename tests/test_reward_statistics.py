@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from reward_statistics import RewardStatistics
+
+class TestRewardStatistics(unittest.TestCase):
+    def setUp(self):
+        # Rewards with a non-trivial mean and spread
+        self.rewards = np.random.default_rng(0).normal(3.0, 2.0, size=1000)
+
+    def test_chunked_update_matches_numpy(self):
+        # Feeding chunks gives the same statistics as NumPy on the full array
+        statistics = RewardStatistics.from_chunks(np.array_split(self.rewards, 7))
+        self.assertEqual(statistics.count, 1000)
+        self.assertAlmostEqual(float(statistics.mean), self.rewards.mean())
+        self.assertAlmostEqual(float(statistics.variance), self.rewards.var())
+        self.assertEqual(float(statistics.min), self.rewards.min())
+        self.assertEqual(float(statistics.max), self.rewards.max())
+
+    def test_merge(self):
+        # Accumulators built by separate workers merge into the combined statistics
+        left = RewardStatistics().update(self.rewards[:300])
+        right = RewardStatistics().update(self.rewards[300:])
+        merged = RewardStatistics().merge(left).merge(right)
+        self.assertEqual(merged.count, 1000)
+        self.assertAlmostEqual(float(merged.mean), self.rewards.mean())
+        self.assertAlmostEqual(float(merged.std), self.rewards.std())
+
+    def test_array_rewards(self):
+        # Array-valued rewards are summarized elementwise
+        rewards = self.rewards.reshape(500, 2)
+        statistics = RewardStatistics.from_chunks([rewards[:100], rewards[100:]])
+        np.testing.assert_allclose(statistics.mean, rewards.mean(axis=0))
+        np.testing.assert_allclose(statistics.variance, rewards.var(axis=0))
+
+    def test_empty(self):
+        statistics = RewardStatistics().update([])
+        self.assertEqual(statistics.count, 0)
+        self.assertIsNone(statistics.mean)
+        self.assertIsNone(statistics.variance)
+
+if __name__ == '__main__':
+    unittest.main()
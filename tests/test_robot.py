@@ -1,7 +1,12 @@
+import tracemalloc
 import unittest
+import numpy as np
+from policy import LinearPolicy
 from robot import Robot
+from trajectory_buffer import TrajectoryBuffer
 from environment import Environment
 from task import Task
+from tests.test_environment import STATE_DIM, LargeEnvironment, damped_dynamics, zero_reward
 
 class TestRobot(unittest.TestCase):
     def setUp(self):
@@ -35,6 +40,69 @@ class TestRobot(unittest.TestCase):
         initial_state = self.robot.environment.reset()
         self.assertEqual(initial_state, 0, "Initial state should be 0 as defined in Environment.get_initial_state")
 
+    def test_horizon_and_termination(self):
+        # Episodes stop at the horizon or as soon as the task reports a terminal state
+        self.assertEqual(len(self.robot.perform_task(horizon=7)), 7)
+        task = Task(lambda s, a: s + a, lambda s, a: -np.abs(s - a), termination=lambda s: np.all(s >= 5))
+        robot = Robot("TerminatingRobot", Environment(task), lambda s: np.ones_like(s))
+        data = robot.perform_task(horizon=100)
+        self.assertEqual(len(data), 5, "The episode should end when the state reaches 5")
+        np.testing.assert_array_equal(data.dones, [False] * 4 + [True])
+
+    def test_streaming_rollout(self):
+        # Transitions are yielded one at a time without touching the robot's buffer
+        rollout = self.robot.rollout(horizon=10)
+        state, action, reward, next_state, done = next(rollout)
+        np.testing.assert_array_equal(next_state, state + action)
+        self.assertFalse(done)
+        self.assertEqual(len(list(rollout)), 9)
+        self.assertEqual(len(self.robot.data), 0)
+
+    def test_chunked_rollout(self):
+        # Chunks are independent buffers; the last chunk holds the remainder
+        chunks = list(self.robot.rollout(horizon=25, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertTrue(chunks[-1].dones[-1])
+        np.testing.assert_array_equal(chunks[1].states[0], chunks[0].next_states[-1])
+
+    def test_seeded_exploration(self):
+        # An episode seed fixes both the exploration noise and the environment's noise
+        env = Environment(Task(lambda s, a: s + a, lambda s, a: 0.0), initial_state_noise=1.0)
+        robot = Robot("NoisyBot", env, lambda s: np.zeros(2), exploration_noise=0.5)
+        first = robot.perform_task(horizon=5, seed=11).actions.copy()
+        self.assertTrue(np.all(first != 0), "Actions should carry exploration noise")
+        np.testing.assert_array_equal(robot.perform_task(horizon=5, seed=11).actions, first)
+        self.assertFalse(np.array_equal(robot.perform_task(horizon=5, seed=12).actions, first))
+
+    def test_inplace_rollout_matches_allocating_rollout(self):
+        # In-place dynamics and actions record the same data as the allocating path
+        results = []
+        for inplace in (True, False):
+            env = LargeEnvironment(Task(damped_dynamics, zero_reward, inplace=inplace), initial_state_noise=0.1)
+            robot = Robot("Robot", env, LinearPolicy(-0.5, bias=0.1), buffer_capacity=10, exploration_noise=0.2)
+            results.append(robot.perform_task(horizon=10, seed=4))
+        for name in TrajectoryBuffer.COLUMNS:
+            np.testing.assert_allclose(results[0].column(name), results[1].column(name), rtol=1e-12)
+
+    def test_inplace_rollout_allocates_less_than_a_state(self):
+        # Once an episode is running, steps and recording allocate far less than a single state array
+        env = LargeEnvironment(Task(damped_dynamics, zero_reward, inplace=True))
+        robot = Robot("Robot", env, LinearPolicy(-0.5, bias=0.1), exploration_noise=0.2)
+        buffer = TrajectoryBuffer(capacity=50)
+        transitions = robot.rollout(horizon=50)
+        for _ in range(3):
+            buffer.append(*next(transitions))  # Episode setup and buffer allocation
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            for transition in transitions:
+                buffer.append(*transition)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(buffer), 50)
+        self.assertLess(peak - baseline, STATE_DIM * 8 // 10, "47 in-place steps should allocate less than a tenth of one state")
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from shared_trajectory import SharedStatisticsBoard, SharedTrajectoryHandle, StatisticsBoard
+from trajectory_buffer import TrajectoryBuffer
+
+def publish_from_worker(board, slot):
+    board.publish(slot, np.full(board.shape, slot + 1.0), count=slot + 1)
+    return board.read(slot)[2]
+
+def export_from_worker(length):
+    buffer = TrajectoryBuffer()
+    for step in range(length):
+        buffer.append(float(step), 0.0, 0.0, float(step + 1))
+    return SharedTrajectoryHandle.export(buffer)
+
+class TestSharedTrajectory(unittest.TestCase):
+    def setUp(self):
+        # A ring buffer that has wrapped around, so export has to reorder it
+        self.buffer = TrajectoryBuffer(capacity=4, overwrite=True)
+        for step in range(6):
+            self.buffer.append(np.array([step, -step]), step, float(step), np.array([step + 1, -step]), done=step == 5)
+
+    def test_round_trip(self):
+        # The attached buffer holds the transitions in chronological order
+        handle = SharedTrajectoryHandle.export(self.buffer)
+        data = handle.attach()
+        self.assertEqual(len(data), 4)
+        for name in TrajectoryBuffer.COLUMNS:
+            np.testing.assert_array_equal(data.column(name), self.buffer.ordered_column(name))
+
+    def test_attach_unlinks_block(self):
+        # The block is unlinked on attach, while the attached views stay valid
+        handle = SharedTrajectoryHandle.export(self.buffer)
+        states = handle.attach().states
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=handle.name)
+        np.testing.assert_array_equal(states[:, 0], [2, 3, 4, 5])
+
+    def test_empty_buffer(self):
+        # Empty trajectories need no shared block
+        handle = SharedTrajectoryHandle.export(TrajectoryBuffer())
+        self.assertIsNone(handle.name)
+        self.assertEqual(len(handle.attach()), 0)
+
+    def test_discard(self):
+        # Discarding unlinks a block that will never be attached
+        handle = SharedTrajectoryHandle.export(self.buffer)
+        handle.discard()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=handle.name)
+        handle.discard()  # Discarding twice is harmless
+
+    def test_worker_handoff_is_not_tracked(self):
+        # Blocks handed from workers to the parent produce no resource tracker warnings
+        script = (
+            "from concurrent.futures import ProcessPoolExecutor\n"
+            "from test_shared_trajectory import export_from_worker\n"
+            "with ProcessPoolExecutor(max_workers=2) as pool:\n"
+            "    handles = list(pool.map(export_from_worker, range(1, 5)))\n"
+            "assert [len(handle.attach()) for handle in handles] == [1, 2, 3, 4]\n"
+        )
+        tests = os.path.dirname(os.path.abspath(__file__))
+        path = os.pathsep.join([tests, os.path.join(tests, "..", "src")])
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=path), timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn("resource_tracker", result.stderr)
+
+    def test_board_publish_and_read(self):
+        # Each publish advances the slot's version by two and leaves it even
+        for board_class in (StatisticsBoard, SharedStatisticsBoard):
+            with board_class(2, (3,)) as board:
+                self.assertIsNone(board.mean())
+                board.publish(0, [1.0, 2.0, 3.0], count=5)
+                value, count, version = board.read(0)
+                np.testing.assert_array_equal(value, [1.0, 2.0, 3.0])
+                self.assertEqual((count, version), (5, 2))
+                np.testing.assert_array_equal(board.mean(), [1.0, 2.0, 3.0], "Unpublished slots are ignored")
+
+    def test_board_shared_with_workers(self):
+        # Workers attach to the board by name and their writes are visible to the parent
+        with SharedStatisticsBoard(3, (2,)) as board:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                versions = list(pool.map(publish_from_worker, [board] * 3, range(3)))
+            self.assertEqual(versions, [2, 2, 2])
+            values, counts, _ = board.snapshot()
+            np.testing.assert_array_equal(values, [[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]])
+            np.testing.assert_array_equal(counts, [1, 2, 3])
+            np.testing.assert_array_equal(board.mean(), [2.0, 2.0])
+
+    def test_read_waits_for_writer(self):
+        # Readers wait for a slow writer to finish and give up only after the timeout
+        with SharedStatisticsBoard(1) as board:
+            board._versions[0] = 1
+            with self.assertRaises(RuntimeError):
+                board.read(0, timeout=0.01)
+
+            def finish_write():
+                time.sleep(0.05)  # Longer than a spinning reader would have waited
+                board._values[0] = 4.0
+                board._counts[0] = 1
+                board._versions[0] = 2
+            writer = threading.Thread(target=finish_write)
+            writer.start()
+            value, count, version = board.read(0)
+            writer.join()
+            self.assertEqual((float(value), count, version), (4.0, 1, 2))
+
+if __name__ == '__main__':
+    unittest.main()
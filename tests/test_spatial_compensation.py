@@ -0,0 +1,62 @@
+import pickle
+import unittest
+import numpy as np
+from environment import Environment
+from experiment import Experiment
+from reward_compensation import RewardCompensation
+from robot import Robot
+from spatial_compensation import SpatialRewardIndex, StateConditionedCompensation
+from task import Task
+
+class TestSpatialCompensation(unittest.TestCase):
+    def setUp(self):
+        # Source and target rewards differ by an amount that depends on the state
+        grid = np.linspace(-1.0, 1.0, 21)
+        self.states = np.stack(np.meshgrid(grid, grid), axis=-1).reshape(-1, 2)
+        self.source_rewards = -np.sum(self.states ** 2, axis=1)
+        self.target_rewards = self.source_rewards - 2.0 * self.states[:, 0]
+
+    def test_nearest_neighbor_estimate(self):
+        # With one neighbor, queries on indexed states return their own rewards
+        index = SpatialRewardIndex(self.states, self.source_rewards, k=1)
+        np.testing.assert_allclose(index.estimate(self.states[:5]), self.source_rewards[:5])
+        self.assertAlmostEqual(float(index.estimate(self.states[7])), self.source_rewards[7])
+
+    def test_kernel_weighting(self):
+        # A narrow kernel concentrates on the closest neighbor, a wide kernel averages
+        index = SpatialRewardIndex([[0.0], [1.0]], [0.0, 10.0], k=2, bandwidth=0.05)
+        self.assertAlmostEqual(float(index.estimate(0.1)), 0.0, places=5)
+        wide = SpatialRewardIndex([[0.0], [1.0]], [0.0, 10.0], k=2, bandwidth=1e6)
+        self.assertAlmostEqual(float(wide.estimate(0.1)), 5.0, places=5)
+
+    def test_state_conditioned_difference(self):
+        # The compensation recovers the state-dependent gap between the datasets
+        compensation = StateConditionedCompensation(self.states, self.source_rewards, self.states, self.target_rewards, k=1)
+        queries = np.array([[0.5, 0.0], [-0.5, 0.3]])
+        np.testing.assert_allclose(compensation.difference(queries), 2.0 * queries[:, 0])
+        self.assertAlmostEqual(float(compensation(queries[0], None, 1.0)), 2.0)
+        restored = pickle.loads(pickle.dumps(compensation))
+        np.testing.assert_allclose(restored.difference(queries), compensation.difference(queries))
+
+    def test_reward_compensation_state_mode(self):
+        # RewardCompensation builds the state-conditioned mode from tuple data as well
+        source = list(zip(self.states, self.states, self.source_rewards))
+        target = list(zip(self.states, self.states, self.target_rewards))
+        compensation_func = RewardCompensation(source, target).calculate_compensation(mode="state", k=1)
+        self.assertAlmostEqual(float(compensation_func(np.array([0.2, 0.1]), None, 0.0)), 0.4)
+        with self.assertRaises(ValueError):
+            RewardCompensation(source, target).calculate_compensation(mode="quantum")
+
+    def test_experiment_state_mode(self):
+        # The experiment installs the state-conditioned offset as a policy stage
+        env = Environment(Task(lambda s, a: 0.5 * s + a, lambda s, a: -np.abs(s - a)))
+        source = Robot("Source", env, lambda s: s + 1)
+        target = Robot("Target", env, lambda s: s - 1)
+        source.perform_task(horizon=20)
+        target.perform_task(horizon=20)
+        Experiment([source, target]).apply_reward_compensation(source, target, mode="state", k=3)
+        self.assertEqual(target.policy.depth, 1)
+        self.assertEqual(len(target.perform_task(horizon=20)), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+from functools import partial
+import numpy as np
+from policy import LinearPolicy
+from sweep import Sweep, TransferPair, config_hash
+from task import Task
+
+# Module-level callables, so cells can be content-addressed and sent to worker processes
+def scaled_dynamics(gain, state, action):
+    return gain * state + action
+
+def action_reward(offset, state, action):
+    return np.mean(action) + offset
+
+def make_fragile_task(gain=0.5, offset=0.0):
+    if gain < 0:
+        raise ValueError("Unstable gain")
+    return make_task(gain, offset)
+
+def identity_policy(state):
+    return state
+
+def doubling_policy(state):
+    return 2 * state
+
+def make_task(gain=0.5, offset=0.0):
+    return Task(partial(scaled_dynamics, gain), partial(action_reward, offset))
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pair = TransferPair("pair", LinearPolicy(0.0, bias=2.0), LinearPolicy(0.0), source_params={"offset": 0.0})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_sweep(self, offsets, executor="serial", seeds=(0, 1)):
+        return Sweep(make_task, {"gain": [0.5, 0.9], "offset": offsets}, [self.pair], seeds=seeds, horizon=10,
+                     cache_dir=self.directory.name, executor=executor, max_workers=2,
+                     environment_kwargs={"initial_state_noise": 0.1}, transfer_kwargs={"max_iters": 5})
+
+    def test_cells_and_results(self):
+        # Every grid combination, pair and seed yields one result in grid order
+        sweep = self.make_sweep([0.0, -1.0])
+        results = sweep.run()
+        self.assertEqual(len(results), 8)
+        self.assertEqual([result["params"] for result in results[:4:2]], [{"gain": 0.5, "offset": 0.0}, {"gain": 0.5, "offset": -1.0}])
+        self.assertEqual([result["seed"] for result in results[:2]], [0, 1])
+        self.assertTrue(all(result["converged"] for result in results))
+        self.assertAlmostEqual(results[2]["compensation_factor"], 3.0, msg="A target offset of -1 needs an extra unit of compensation")
+        np.testing.assert_array_equal(self.pair.target_policy.bias, 0.0, "Cells must not modify the pair's policies")
+
+    def test_cached_cells_are_not_recomputed(self):
+        # Re-running loads every cell, and growing the grid only computes the new cells
+        first = self.make_sweep([0.0]).run()
+        sweep = self.make_sweep([0.0])
+        self.assertEqual(sweep.run(), first)
+        self.assertEqual((sweep.cached, sweep.computed), (4, 0))
+        grown = self.make_sweep([0.0, -1.0])
+        grown.run()
+        self.assertEqual((grown.cached, grown.computed), (4, 4))
+
+    def test_failing_cell_keeps_completed_cells(self):
+        # Cells finished before or alongside a failing cell are stored, so a re-run only computes what is missing
+        for executor in ("serial", "thread"):
+            with tempfile.TemporaryDirectory() as directory:
+                def sweep(gains):
+                    return Sweep(make_fragile_task, {"gain": gains}, [self.pair], seeds=(0, 1), horizon=10,
+                                 cache_dir=directory, executor=executor, max_workers=2)
+                failing = sweep([0.5, -1.0, 0.9])
+                with self.assertRaises(ValueError):
+                    failing.run()
+                self.assertEqual(failing.computed, 4, executor)
+                rerun = sweep([0.5, 0.9])
+                rerun.run()
+                self.assertEqual((rerun.cached, rerun.computed), (4, 0), executor)
+
+    def test_executors_match_serial(self):
+        # Cell results do not depend on where the cells are computed
+        serial = Sweep(make_task, {"gain": [0.5, 0.9]}, [self.pair], seeds=[3], horizon=10, environment_kwargs={"initial_state_noise": 0.1}).run()
+        for executor in ("thread", "process"):
+            results = Sweep(make_task, {"gain": [0.5, 0.9]}, [self.pair], seeds=[3], horizon=10, executor=executor,
+                            environment_kwargs={"initial_state_noise": 0.1}).run()
+            self.assertEqual(results, serial)
+
+    def test_config_hash(self):
+        # Hashes follow the content of policies and reject callables without a stable identity
+        self.assertEqual(config_hash({"policy": LinearPolicy(1.0)}), config_hash({"policy": LinearPolicy(1.0)}))
+        self.assertNotEqual(config_hash({"policy": LinearPolicy(1.0)}), config_hash({"policy": LinearPolicy(2.0)}))
+        self.assertNotEqual(config_hash({"seed": 0}), config_hash({"seed": 1}))
+        with self.assertRaises(ValueError):
+            config_hash({"task_factory": lambda: None})
+
+    def test_config_hash_follows_function_code(self):
+        # Editing a function under the same name changes its hash, so stale cells are not reused
+        original = identity_policy.__code__
+        before = config_hash({"policy": identity_policy})
+        self.assertEqual(config_hash({"policy": identity_policy}), before)
+        try:
+            identity_policy.__code__ = doubling_policy.__code__  # Stands in for an edit of the function body
+            self.assertNotEqual(config_hash({"policy": identity_policy}), before)
+        finally:
+            identity_policy.__code__ = original
+        self.assertEqual(config_hash({"policy": identity_policy}), before)
+        self.assertNotEqual(config_hash({"task_factory": make_task}), config_hash({"task_factory": partial}),
+                            "Callables without code are still hashed by name")
+
+if __name__ == '__main__':
+    unittest.main()
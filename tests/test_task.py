@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from task import Task
 
 class TestTask(unittest.TestCase):
@@ -36,6 +37,30 @@ class TestTask(unittest.TestCase):
         self.assertEqual(simulated_next_state, next_state, "Simulate step did not return the correct next state")
         self.assertEqual(simulated_reward, reward, "Simulate step did not return the correct reward")
 
+    def test_simulate_batch_fallback(self):
+        # A scalar-only task is evaluated row by row and matches simulate_step
+        states = np.array([0.0, 1.0, 2.0])
+        actions = np.array([5.0, 5.0, 5.0])
+        next_states, rewards = self.task.simulate_batch(states, actions)
+        for i in range(3):
+            expected_state, expected_reward = self.task.simulate_step(states[i], actions[i])
+            self.assertEqual(next_states[i], expected_state, "Batched next state should match the scalar path")
+            self.assertEqual(rewards[i], expected_reward, "Batched reward should match the scalar path")
+
+    def test_simulate_batch_vectorized(self):
+        # A vectorized task is validated against the scalar path and evaluated in one call
+        task = Task(lambda s, a: s + a, lambda s, a: -np.sum((s - a) ** 2, axis=-1), vectorized=True,
+                    example_state=np.zeros(2), example_action=np.ones(2))
+        next_states, rewards = task.simulate_batch(np.zeros((4, 2)), np.ones((4, 2)))
+        np.testing.assert_array_equal(next_states, np.ones((4, 2)))
+        np.testing.assert_array_equal(rewards, np.full(4, -2.0))
+
+    def test_invalid_vectorized_declaration(self):
+        # A reward that reduces over the batch axis cannot be declared vectorized
+        with self.assertRaises(ValueError):
+            Task(lambda s, a: s + a, lambda s, a: -np.sum((s - a) ** 2), vectorized=True,
+                 example_state=np.zeros(2), example_action=np.ones(2))
+
 if __name__ == '__main__':
     unittest.main()
 
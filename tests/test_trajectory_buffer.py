@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from trajectory_buffer import TrajectoryBuffer
+
+class TestTrajectoryBuffer(unittest.TestCase):
+    def setUp(self):
+        # A small buffer that has to grow after four transitions
+        self.buffer = TrajectoryBuffer(capacity=4)
+
+    def fill(self, buffer, count):
+        for i in range(count):
+            buffer.append(np.array([i, i]), np.array([1.0, 1.0]), -float(i), np.array([i + 1, i + 1]), done=(i == count - 1))
+
+    def test_append_and_columns(self):
+        # Columns are inferred from the first transition and integer states are stored as floats
+        self.fill(self.buffer, 3)
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(self.buffer.states.shape, (3, 2))
+        self.assertEqual(self.buffer.states.dtype, np.float64)
+        np.testing.assert_array_equal(self.buffer.rewards, [0.0, -1.0, -2.0])
+        np.testing.assert_array_equal(self.buffer.dones, [False, False, True])
+
+    def test_columns_are_views(self):
+        # Reading a column must not copy the underlying storage
+        self.fill(self.buffer, 2)
+        rewards = self.buffer.rewards
+        rewards[0] = 42.0
+        self.assertEqual(self.buffer.rewards[0], 42.0, "Column should be a view of the buffer storage")
+
+    def test_growth(self):
+        # A full buffer grows and keeps every transition in order
+        self.fill(self.buffer, 10)
+        self.assertEqual(len(self.buffer), 10)
+        self.assertGreaterEqual(self.buffer.capacity, 10)
+        np.testing.assert_array_equal(self.buffer.rewards, -np.arange(10.0))
+
+    def test_ring_overwrite(self):
+        # A ring buffer keeps only the most recent transitions
+        ring = TrajectoryBuffer(capacity=4, overwrite=True)
+        self.fill(ring, 6)
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(ring.capacity, 4)
+        np.testing.assert_array_equal(ring.ordered_column("rewards"), [-2.0, -3.0, -4.0, -5.0])
+        state, _, reward = ring[0]
+        np.testing.assert_array_equal(state, [2.0, 2.0])
+        self.assertEqual(reward, -2.0)
+
+    def test_rejected_transition_leaves_buffer_unchanged(self):
+        # A transition that does not fit the columns is neither counted nor overwrites the oldest row
+        for buffer in (TrajectoryBuffer(capacity=4), TrajectoryBuffer(capacity=4, overwrite=True)):
+            self.fill(buffer, 4)
+            states = buffer.ordered_column("states").copy()
+            with self.assertRaises(ValueError):
+                buffer.append(np.zeros(3), np.ones(2), 0.0, np.zeros(3))
+            self.assertEqual(len(buffer), 4)
+            np.testing.assert_array_equal(buffer.ordered_column("states"), states)
+
+    def test_tuple_access_and_clear(self):
+        # Transitions remain available as (state, action, reward) tuples
+        self.fill(self.buffer, 3)
+        state, action, reward = self.buffer[-1]
+        np.testing.assert_array_equal(state, [2.0, 2.0])
+        self.assertEqual(len(self.buffer[:2]), 2)
+        self.buffer.clear()
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(len(self.buffer.rewards), 0)
+
+    def test_from_columns(self):
+        # Existing arrays are wrapped without copying and grow into new storage on append
+        columns = {"states": np.arange(3.0), "actions": np.zeros(3), "rewards": np.ones(3), "next_states": np.arange(1.0, 4.0), "dones": np.zeros(3, dtype=bool)}
+        buffer = TrajectoryBuffer.from_columns(columns)
+        self.assertEqual(len(buffer), 3)
+        self.assertTrue(np.shares_memory(buffer.states, columns["states"]))
+        buffer.append(3.0, 0.0, 1.0, 4.0)
+        np.testing.assert_array_equal(buffer.states, [0.0, 1.0, 2.0, 3.0])
+        with self.assertRaises(ValueError):
+            TrajectoryBuffer.from_columns(dict(columns, rewards=np.ones(2)))
+
+if __name__ == '__main__':
+    unittest.main()
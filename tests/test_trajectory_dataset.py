@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+import numpy as np
+from environment import Environment
+from reward_compensation import RewardCompensation
+from robot import Robot
+from task import Task
+from trajectory_buffer import TrajectoryBuffer
+from trajectory_dataset import TrajectoryDataset, TrajectoryDatasetWriter
+
+class TestTrajectoryDataset(unittest.TestCase):
+    def setUp(self):
+        # A temporary directory holding the datasets written by each test
+        self.directory = tempfile.TemporaryDirectory()
+        self.task = Task(lambda s, a: s + a, lambda s, a: -np.abs(s - 5))
+        self.env = Environment(self.task)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_robot_writes_dataset(self):
+        # Two episodes are appended across several flushes and read back as memory maps
+        robot = Robot("SourceRobot", self.env, lambda s: s + 1)
+        path = f"{self.directory.name}/source"
+        with robot.open_dataset(path, flush_every=32) as writer:
+            first = robot.perform_task(writer=writer).rewards.copy()
+            second = robot.perform_task(writer=writer).rewards.copy()
+        dataset = TrajectoryDataset(path)
+        self.assertEqual(len(dataset), 200)
+        self.assertIsInstance(dataset.rewards, np.memmap)
+        self.assertEqual(dataset.metadata["robot"], "SourceRobot")
+        np.testing.assert_array_equal(dataset.rewards, np.concatenate([first, second]))
+        self.assertEqual(int(dataset.dones.sum()), 2, "Each episode should end with a done transition")
+        state, action, _ = dataset[1]
+        np.testing.assert_array_equal(state, [1.0, 1.0])
+        np.testing.assert_array_equal(action, [2.0, 2.0])
+
+    def test_extend_and_empty(self):
+        # Buffers can be appended whole, and empty datasets can still be opened
+        robot = Robot("Robot", self.env, lambda s: s * 2)
+        with TrajectoryDatasetWriter(f"{self.directory.name}/extended") as writer:
+            writer.extend(robot.perform_task())
+        np.testing.assert_array_equal(TrajectoryDataset(f"{self.directory.name}/extended").states, robot.data.states)
+        TrajectoryDatasetWriter(f"{self.directory.name}/empty").close()
+        self.assertEqual(len(TrajectoryDataset(f"{self.directory.name}/empty")), 0)
+
+    def test_mismatched_blocks_are_rejected(self):
+        # Blocks must match the row shapes saved by the first block and have columns of equal length
+        def buffer(dim, count):
+            block = TrajectoryBuffer()
+            for _ in range(count):
+                block.append(np.zeros(dim), np.zeros(dim), 0.0, np.zeros(dim))
+            return block
+        path = f"{self.directory.name}/mismatched"
+        with TrajectoryDatasetWriter(path) as writer:
+            writer.extend(buffer(2, 5))
+            with self.assertRaises(ValueError):
+                writer.extend(buffer(3, 4))
+            columns = {name: buffer(2, 3).column(name) for name in TrajectoryBuffer.COLUMNS}
+            columns["rewards"] = columns["rewards"][:2]
+            with self.assertRaises(ValueError):
+                writer._write(columns)
+        dataset = TrajectoryDataset(path)
+        self.assertEqual(len(dataset), 5)
+        np.testing.assert_array_equal(dataset.states, np.zeros((5, 2)))
+
+    def test_compensation_from_datasets(self):
+        # Compensation over memory-mapped datasets matches the in-memory computation
+        source = Robot("SourceRobot", self.env, lambda s: s + 1)
+        target = Robot("TargetRobot", self.env, lambda s: s - 1)
+        for robot in (source, target):
+            with robot.open_dataset(f"{self.directory.name}/{robot.name}") as writer:
+                robot.perform_task(writer=writer)
+        expected = RewardCompensation(source.data, target.data).calculate_compensation()
+        compensation = RewardCompensation.from_datasets(f"{self.directory.name}/SourceRobot", f"{self.directory.name}/TargetRobot")
+        np.testing.assert_allclose(compensation.calculate_compensation()(None, None, 0.0), expected(None, None, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
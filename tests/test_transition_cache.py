@@ -0,0 +1,113 @@
+import copy
+import pickle
+import unittest
+import numpy as np
+from environment import Environment
+from experiment import Experiment
+from robot import Robot
+from task import Task
+from transition_cache import TransitionCache
+
+class TestTransitionCache(unittest.TestCase):
+    def setUp(self):
+        # Count calls to check that cached results are not recomputed
+        self.calls = {"dynamics": 0, "reward": 0}
+
+        def dynamics(s, a):
+            self.calls["dynamics"] += 1
+            return np.clip(s + a, -1.0, 1.0)
+
+        def reward_function(s, a):
+            self.calls["reward"] += 1
+            return -float(np.sum(np.abs(s)))
+
+        self.dynamics = dynamics
+        self.reward_function = reward_function
+
+    def test_hits_and_misses(self):
+        # Repeated evaluations are answered from the cache
+        cache = TransitionCache()
+        task = Task(self.dynamics, self.reward_function, cache=cache)
+        for _ in range(3):
+            task.simulate_step(np.zeros(2), np.ones(2))
+        self.assertEqual(self.calls, {"dynamics": 1, "reward": 1})
+        statistics = cache.statistics()
+        self.assertEqual((statistics["hits"], statistics["misses"], statistics["entries"]), (4, 2, 2))
+
+    def test_cached_arrays_are_read_only(self):
+        task = Task(self.dynamics, self.reward_function, cache=TransitionCache())
+        next_state = task.compute_next_state(np.zeros(2), np.ones(2))
+        with self.assertRaises(ValueError):
+            next_state[0] = 5.0
+
+    def test_quantization(self):
+        # States in the same grid cell share an entry
+        task = Task(self.dynamics, self.reward_function, cache=TransitionCache(quantization=0.1))
+        first = task.compute_reward(np.array([0.51, 0.0]), np.zeros(2))
+        second = task.compute_reward(np.array([0.52, 0.0]), np.zeros(2))
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls["reward"], 1)
+
+    def test_lru_eviction(self):
+        # The least recently used entry is evicted once the bound is exceeded
+        cache = TransitionCache(max_entries=2)
+        task = Task(self.dynamics, self.reward_function, cache=cache)
+        task.compute_reward(0.0, 0.0)
+        task.compute_reward(1.0, 0.0)
+        task.compute_reward(0.0, 0.0)  # Refresh the first entry
+        task.compute_reward(2.0, 0.0)  # Evicts the entry for state 1
+        self.assertEqual(cache.evictions, 1)
+        task.compute_reward(0.0, 0.0)
+        task.compute_reward(1.0, 0.0)
+        self.assertEqual(self.calls["reward"], 4)
+
+    def test_memory_bound(self):
+        cache = TransitionCache(max_bytes=10_000)
+        task = Task(self.dynamics, self.reward_function, cache=cache)
+        for i in range(1000):
+            task.compute_next_state(np.full(16, float(i)), np.zeros(16))
+        self.assertLessEqual(cache.statistics()["bytes"], 10_000)
+        self.assertGreater(cache.evictions, 0)
+
+    def test_shared_across_robots(self):
+        # Robots of one experiment sharing a task reuse each other's evaluations
+        cache = TransitionCache()
+        env = Environment(Task(self.dynamics, self.reward_function, cache=cache))
+        robots = [Robot("Robot1", env, lambda s: np.ones_like(s)), Robot("Robot2", env, lambda s: np.ones_like(s))]
+        Experiment(robots).run_multi_robot(horizon=10)
+        self.assertEqual(cache.misses, 4, "Only the first two distinct transitions should be computed")
+        np.testing.assert_array_equal(robots[0].data.states, robots[1].data.states)
+
+    def test_shared_between_tasks(self):
+        # Tasks with different dynamics sharing one cache receive their own results
+        cache = TransitionCache()
+        source = Task(lambda s, a: s + a, self.reward_function, cache=cache)
+        target = Task(lambda s, a: 10 * s + a, self.reward_function, cache=cache)
+        state, action = np.ones(2), np.ones(2)
+        np.testing.assert_array_equal(source.compute_next_state(state, action), [2.0, 2.0])
+        np.testing.assert_array_equal(target.compute_next_state(state, action), [11.0, 11.0])
+        self.assertEqual(self.calls["reward"], 0)
+        source.compute_reward(state, action)
+        target.compute_reward(state, action)
+        self.assertEqual(self.calls["reward"], 1, "Tasks sharing a reward function share its entries")
+
+    def test_shared_across_thread_workers(self):
+        # Detached copies for thread workers use the original cache instead of a private copy
+        cache = TransitionCache()
+        env = Environment(Task(self.dynamics, self.reward_function, cache=cache))
+        robots = [Robot("Robot1", env, lambda s: np.ones_like(s)), Robot("Robot2", env, lambda s: np.ones_like(s))]
+        Experiment(robots, executor="thread", max_workers=2).run_multi_robot(horizon=10)
+        self.assertEqual(cache.hits + cache.misses, 40, "Every evaluation of both workers should go through the shared cache")
+        self.assertLessEqual(cache.misses, 8)
+        self.assertIs(copy.deepcopy(env).task.cache, cache)
+
+    def test_pickled_cache_starts_empty(self):
+        # Worker processes receive the cache settings but not the entries
+        cache = TransitionCache(max_bytes=1000, quantization=0.5, max_entries=10)
+        Task(self.dynamics, self.reward_function, cache=cache).compute_next_state(np.zeros(2), np.ones(2))
+        restored = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(len(restored), 0)
+        self.assertEqual((restored.max_bytes, restored.quantization, restored.max_entries), (1000, 0.5, 10))
+
+if __name__ == '__main__':
+    unittest.main()
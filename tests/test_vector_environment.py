@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from environment import Environment
+from vector_environment import VectorEnvironment
+from task import Task
+
+class TestVectorEnvironment(unittest.TestCase):
+    def setUp(self):
+        # Elementwise dynamics and rewards work unchanged on a leading batch axis
+        self.task = Task(lambda s, a: s + 2 * a, lambda s, a: 100 - np.abs(s - a), vectorized=True)
+        self.vector_env = VectorEnvironment(self.task, num_envs=4)
+
+    def test_reset(self):
+        # All copies start at the origin
+        states = self.vector_env.reset()
+        self.assertEqual(states.shape, (4, 2), "States should have shape (num_envs, state_dim)")
+        np.testing.assert_array_equal(states, np.zeros((4, 2)))
+
+    def test_step_matches_single_environment(self):
+        # Every copy should evolve exactly like an independent Environment
+        actions = np.arange(8, dtype=float).reshape(4, 2)
+        self.vector_env.reset()
+        next_states, rewards = self.vector_env.step(actions)
+        for i in range(4):
+            env = Environment(self.task)
+            expected_state, expected_reward = env.step(actions[i])
+            np.testing.assert_array_equal(next_states[i], expected_state)
+            np.testing.assert_array_equal(rewards[i], expected_reward)
+
+    def test_masked_reset(self):
+        # Only the masked copies should return to the initial state
+        self.vector_env.reset()
+        self.vector_env.step(np.ones((4, 2)))
+        states = self.vector_env.reset(mask=[True, False, True, False])
+        np.testing.assert_array_equal(states[[0, 2]], np.zeros((2, 2)))
+        np.testing.assert_array_equal(states[[1, 3]], np.full((2, 2), 2.0))
+
+    def test_seeded_noise_matches_single_environments(self):
+        # Copy i draws the same initial states as an Environment seeded with the i-th spawned child
+        vector_env = VectorEnvironment(self.task, num_envs=3, initial_state_noise=0.5, seed=7)
+        envs = [Environment(self.task, initial_state_noise=0.5, seed=child) for child in np.random.SeedSequence(7).spawn(3)]
+        states = vector_env.reset()
+        np.testing.assert_array_equal(states, [env.reset() for env in envs])
+        vector_env.step(np.ones((3, 2)))
+        states = vector_env.reset(mask=[False, True, False])
+        np.testing.assert_array_equal(states[1], envs[1].reset(), "Masked resets only draw for the reset copies")
+        np.testing.assert_array_equal(vector_env.reset()[0], envs[0].reset())
+
+    def test_scalar_task_fallback(self):
+        # A task without declared batch semantics is stepped through the per-copy loop
+        scalar_task = Task(lambda s, a: s + 2 * a, lambda s, a: float(np.sum(s - a)))
+        vector_env = VectorEnvironment(scalar_task, num_envs=3)
+        next_states, rewards = vector_env.step(np.ones((3, 2)))
+        np.testing.assert_array_equal(next_states, np.full((3, 2), 2.0))
+        np.testing.assert_array_equal(rewards, np.full(3, -2.0))
+
+    def test_invalid_shapes(self):
+        # Mismatched action batches and masks are rejected
+        with self.assertRaises(ValueError):
+            self.vector_env.step(np.ones((3, 2)))
+        with self.assertRaises(ValueError):
+            self.vector_env.reset(mask=[True, False])
+
+if __name__ == '__main__':
+    unittest.main()